@@ -0,0 +1,191 @@
+import os
+import logging
+import datetime
+from zoneinfo import ZoneInfo
+
+from psycopg2.extras import execute_values
+
+from db_pg import conexao, filtro_buscas_recentes
+from fuso_horario import FUSO_BUSCA
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de atualização (horas) conforme a antecedência do voo (dias até a partida).
+# A última faixa (None) vale para qualquer antecedência maior.
+INTERVALOS_POR_ANTECEDENCIA = (
+    (3, 3),
+    (14, 6),
+    (30, 12),
+    (90, 24),
+    (None, 72),
+)
+
+# Quanto a volatilidade encurta o intervalo e aumenta o valor de uma busca:
+# com coeficiente de variação 0,2 e fator 5, o intervalo cai pela metade.
+FATOR_VOLATILIDADE = 5.0
+
+# Volatilidade assumida para (trecho, data) sem histórico recente
+VOLATILIDADE_DESCONHECIDA = 0.25
+
+# Buscas que falharam voltam a ficar pendentes após no máximo este intervalo
+INTERVALO_APOS_FALHA = datetime.timedelta(hours=1)
+
+def carregar_agenda():
+    """
+    Lê a configuração do agendador das variáveis de ambiente:
+      - AGENDA_ORCAMENTO: número máximo de buscas por execução (padrão 100).
+      - AGENDA_JANELA_DIAS: dias de histórico usados no cálculo da volatilidade (padrão 14).
+    """
+    return {
+        "orcamento": int(os.getenv("AGENDA_ORCAMENTO", "100")),
+        "janela_dias": int(os.getenv("AGENDA_JANELA_DIAS", "14")),
+    }
+
+def preparar_agenda(cur):
+    """
+    Cria a tabela com o próximo horário de atualização de cada (trecho, data do voo) por
+    pipeline: automation.py e automation_playwright.py rodam com os mesmos parâmetros e cada
+    um tem a sua própria agenda.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS agenda_buscas (
+            pipeline TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            data_voo DATE NOT NULL,
+            proxima_em TIMESTAMPTZ NOT NULL,
+            ultima_em TIMESTAMPTZ NOT NULL,
+            execucoes INTEGER NOT NULL DEFAULT 0,
+            falhas INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (pipeline, origem, destino, data_voo)
+        )
+    """)
+
+def volatilidade_recente(cur, dias):
+    """
+    Calcula, para cada (trecho, data do voo) buscado nos últimos `dias` dias, o coeficiente de
+    variação do preço (desvio padrão / média) entre as buscas. Retorna {(trecho, data_voo): cv};
+    combinações com uma única observação têm cv 0.
+    """
+    condicao, parametros = filtro_buscas_recentes(cur, dias)
+    cur.execute(f"""
+        SELECT trecho, data_voo::text, COALESCE(stddev_samp(preco) / NULLIF(avg(preco), 0), 0)
+        FROM resultados2
+        WHERE {condicao} AND preco IS NOT NULL
+        GROUP BY 1, 2
+    """, parametros)
+    return {(trecho, data_voo): float(cv) for trecho, data_voo, cv in cur.fetchall()}
+
+def intervalo_atualizacao(antecedencia, volatilidade):
+    """Intervalo até a próxima atualização: menor para voos próximos e preços voláteis."""
+    for limite, horas in INTERVALOS_POR_ANTECEDENCIA:
+        if limite is None or antecedencia <= limite:
+            break
+    return datetime.timedelta(hours=horas) / (1 + FATOR_VOLATILIDADE * volatilidade)
+
+def valor_busca(antecedencia, volatilidade, atraso):
+    """
+    Valor relativo de executar uma busca agora. Cresce com a proximidade da partida, com a
+    volatilidade recente do preço e com o atraso em relação ao horário previsto (em
+    intervalos de atualização; 1 = vencida agora).
+    """
+    return (1 / (1 + antecedencia / 7)) * (1 + FATOR_VOLATILIDADE * volatilidade) * atraso
+
+def _chave(param):
+    return (param.get("origem"), param.get("destino"), param.get("data"))
+
+def selecionar_buscas(parametros, pipeline, orcamento=None, agora=None):
+    """
+    Escolhe, entre os parâmetros (dicionários com origem, destino e data), as buscas a executar
+    nesta rodada do `pipeline` ("automation", "automation_playwright"), pela agenda dele:
+      - descarta duplicatas e datas de voo já passadas;
+      - mantém apenas as buscas vencidas (nunca executadas ou com proxima_em no passado);
+      - ordena por valor_busca e preenche o orçamento (padrão AGENDA_ORCAMENTO) com as de
+        maior valor. As demais ficam para as próximas execuções.
+    """
+    config = carregar_agenda()
+    orcamento = config["orcamento"] if orcamento is None else orcamento
+    agora = agora or datetime.datetime.now(datetime.timezone.utc)
+    hoje = agora.astimezone(ZoneInfo(FUSO_BUSCA)).date()
+
+    with conexao() as conn, conn.cursor() as cur:
+        preparar_agenda(cur)
+        volatilidades = volatilidade_recente(cur, config["janela_dias"])
+        cur.execute(
+            "SELECT origem, destino, data_voo::text, proxima_em FROM agenda_buscas "
+            "WHERE pipeline = %s AND data_voo >= %s",
+            (pipeline, hoje),
+        )
+        proximas = {(origem, destino, data_voo): proxima for origem, destino, data_voo, proxima in cur.fetchall()}
+        conn.commit()
+
+    vistas = set()
+    candidatas = []
+    passadas = em_dia = 0
+    for param in parametros:
+        chave = _chave(param)
+        if chave in vistas:
+            continue
+        vistas.add(chave)
+        origem, destino, data_voo = chave
+        antecedencia = (datetime.date.fromisoformat(data_voo) - hoje).days
+        if antecedencia < 0:
+            passadas += 1
+            continue
+        volatilidade = volatilidades.get((f"{origem} x {destino}", data_voo), VOLATILIDADE_DESCONHECIDA)
+        proxima = proximas.get(chave)
+        if proxima is None:
+            # Nunca buscada: tratada como dois intervalos em atraso
+            atraso = 2.0
+        elif proxima > agora:
+            em_dia += 1
+            continue
+        else:
+            atraso = 1 + (agora - proxima) / intervalo_atualizacao(antecedencia, volatilidade)
+        candidatas.append((valor_busca(antecedencia, volatilidade, atraso), param))
+
+    candidatas.sort(key=lambda candidata: candidata[0], reverse=True)
+    selecionadas = [param for _, param in candidatas[:orcamento]]
+    logger.info("Agenda de %s: %d buscas distintas, %d com data passada, %d em dia, %d vencidas; "
+                "%d selecionadas (orçamento %d).", pipeline, len(vistas), passadas, em_dia, len(candidatas),
+                len(selecionadas), orcamento)
+    return selecionadas
+
+def registrar_execucoes(execucoes, pipeline, agora=None):
+    """
+    Registra o resultado das buscas executadas pelo `pipeline`, uma lista de (parametro,
+    sucesso), e agenda a próxima atualização de cada uma conforme intervalo_atualizacao (ou
+    INTERVALO_APOS_FALHA, se menor, quando a busca falhou). Remove da agenda as datas de voo
+    já passadas.
+    """
+    if not execucoes:
+        return
+    config = carregar_agenda()
+    agora = agora or datetime.datetime.now(datetime.timezone.utc)
+    hoje = agora.astimezone(ZoneInfo(FUSO_BUSCA)).date()
+
+    with conexao() as conn, conn.cursor() as cur:
+        preparar_agenda(cur)
+        volatilidades = volatilidade_recente(cur, config["janela_dias"])
+        linhas = {}
+        for param, sucesso in execucoes:
+            origem, destino, data_voo = _chave(param)
+            antecedencia = max(0, (datetime.date.fromisoformat(data_voo) - hoje).days)
+            volatilidade = volatilidades.get((f"{origem} x {destino}", data_voo), VOLATILIDADE_DESCONHECIDA)
+            intervalo = intervalo_atualizacao(antecedencia, volatilidade)
+            if not sucesso:
+                intervalo = min(intervalo, INTERVALO_APOS_FALHA)
+            linhas[(origem, destino, data_voo)] = (
+                pipeline, origem, destino, data_voo, agora + intervalo, agora, 1, 0 if sucesso else 1
+            )
+        execute_values(cur, """
+            INSERT INTO agenda_buscas (pipeline, origem, destino, data_voo, proxima_em, ultima_em, execucoes, falhas)
+            VALUES %s
+            ON CONFLICT (pipeline, origem, destino, data_voo) DO UPDATE SET
+                proxima_em = EXCLUDED.proxima_em,
+                ultima_em = EXCLUDED.ultima_em,
+                execucoes = agenda_buscas.execucoes + 1,
+                falhas = agenda_buscas.falhas + EXCLUDED.falhas
+        """, list(linhas.values()))
+        cur.execute("DELETE FROM agenda_buscas WHERE data_voo < %s", (hoje,))
+        conn.commit()
@@ -1,45 +1,122 @@
-# Dicionário com coordenadas de aeroportos do Brasil e extras
-airport_coords = {
-    "GRU": (-23.4356, -46.4731),
-    "CGH": (-23.6261, -46.6561),
-    "GIG": (-22.8090, -43.2506),
-    "SDU": (-22.9105, -43.1630),
-    "CNF": (-19.6244, -43.9714),
-    "BSB": (-15.8698, -47.9208),
-    "REC": (-8.1264, -34.9234),
-    "CWB": (-25.5280, -49.1750),
-    "SSA": (-12.9081, -38.3228),
-    "FOR": (-3.7766, -38.5321),
-    "POA": (-29.9939, -51.1711),
-    "BEL": (-1.3792, -48.4760),
-    "MAO": (-3.0386, -60.0497),
-    "VCP": (-23.0076, -47.1340),
-    "NAT": (-5.9111, -35.2750),
-    "VIX": (-20.2584, -40.2863),
-    "CGB": (-15.6015, -56.0970),
-    "JFK": (40.6413, -73.7781)
-}
+import os
+import json
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Cadastro único dos aeroportos: código -> latitude, longitude e região
+ARQUIVO_AEROPORTOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aeroportos.json")
+
+RAIO_TERRA_KM = 6371.0
+
+def haversine(coord1, coord2):
+    """
+    Calcula a distância (em km) entre duas coordenadas (latitude, longitude) usando a fórmula de Haversine.
+    Para aeroportos cadastrados, prefira IndiceAeroportos.distancia, que consulta a matriz pré-calculada.
+    """
+    lat1, lon1 = coord1
+    lat2, lon2 = coord2
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return RAIO_TERRA_KM * c
+
+def matriz_distancias(coordenadas):
+    """
+    Calcula, de forma vetorizada, a matriz (n x n) de distâncias de Haversine em km entre todas
+    as coordenadas de um array (n x 2) de (latitude, longitude) em graus.
+    """
+    radianos = np.radians(np.asarray(coordenadas, dtype=np.float64))
+    lat = radianos[:, 0]
+    lon = radianos[:, 1]
+    dlat = lat[None, :] - lat[:, None]
+    dlon = lon[None, :] - lon[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+class IndiceAeroportos:
+    """
+    Índice dos aeroportos em arrays: a posição de cada código é resolvida uma vez por um
+    dicionário, e coordenadas, região e distâncias são lidas por indexação direta. A matriz de
+    distâncias entre todos os pares é calculada uma única vez, na criação do índice.
+
+    Atributos:
+        codigos: tupla com os códigos, na ordem das linhas dos arrays.
+        coordenadas: array (n x 2) de latitude e longitude.
+        regioes: tupla com os nomes das regiões; regiao_por_aeroporto guarda o índice nessa tupla.
+        distancias: array (n x n) de distâncias em km.
+    """
+
+    def __init__(self, aeroportos):
+        self.codigos = tuple(aeroportos)
+        self.posicao = {codigo: i for i, codigo in enumerate(self.codigos)}
+        self.coordenadas = np.array(
+            [(dados["lat"], dados["lon"]) for dados in aeroportos.values()], dtype=np.float64
+        ).reshape(-1, 2)
+        self.regioes = tuple(sorted({dados["regiao"] for dados in aeroportos.values()}))
+        posicao_regiao = {regiao: i for i, regiao in enumerate(self.regioes)}
+        self.regiao_por_aeroporto = np.array(
+            [posicao_regiao[dados["regiao"]] for dados in aeroportos.values()], dtype=np.int16
+        )
+        self.distancias = matriz_distancias(self.coordenadas)
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_AEROPORTOS):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __contains__(self, codigo):
+        return codigo in self.posicao
+
+    def coordenada(self, codigo):
+        """Retorna (latitude, longitude) do aeroporto, ou None se o código não estiver cadastrado."""
+        i = self.posicao.get(codigo)
+        return None if i is None else tuple(self.coordenadas[i].tolist())
+
+    def regiao(self, codigo, padrao="N/A"):
+        """Retorna a região do aeroporto, ou `padrao` se o código não estiver cadastrado."""
+        i = self.posicao.get(codigo)
+        return padrao if i is None else self.regioes[self.regiao_por_aeroporto[i]]
+
+    def distancia(self, origem, destino):
+        """Distância em km entre dois aeroportos cadastrados, ou None se algum não estiver."""
+        i = self.posicao.get(origem)
+        j = self.posicao.get(destino)
+        if i is None or j is None:
+            return None
+        return float(self.distancias[i, j])
+
+    def distancia_formatada(self, origem, destino):
+        """Distância arredondada em texto, como gravada em 'distancia_km', ou "N/A"."""
+        distancia = self.distancia(origem, destino)
+        return "N/A" if distancia is None else str(round(distancia, 2))
+
+    def distancias_em_lote(self, origens, destinos):
+        """
+        Distâncias em km para listas de origens e destinos (pares na mesma posição), com uma
+        única indexação na matriz. Pares com código não cadastrado resultam em NaN.
+        """
+        i = np.array([self.posicao.get(codigo, -1) for codigo in origens], dtype=np.intp)
+        j = np.array([self.posicao.get(codigo, -1) for codigo in destinos], dtype=np.intp)
+        distancias = self.distancias[i, j]
+        distancias[(i < 0) | (j < 0)] = np.nan
+        return distancias
+
+@lru_cache(maxsize=None)
+def indice_aeroportos(caminho=ARQUIVO_AEROPORTOS):
+    """Retorna o índice de aeroportos do processo, carregado de `caminho` na primeira chamada."""
+    return IndiceAeroportos.carregar(caminho)
+
+# Dicionário com coordenadas de aeroportos do Brasil e extras (compatibilidade)
+airport_coords = {codigo: indice_aeroportos().coordenada(codigo) for codigo in indice_aeroportos().codigos}
 
 # Função para obter a região a partir do código do aeroporto
 def obter_regiao(codigo):
-    mapping = {
-        'GRU': 'regiao sudeste',
-        'CGH': 'regiao sudeste',
-        'GIG': 'regiao sudeste',
-        'SDU': 'regiao sudeste',
-        'CNF': 'regiao sudeste',
-        'BSB': 'regiao centro-oeste',
-        'REC': 'regiao nordeste',
-        'CWB': 'regiao sul',
-        'SSA': 'regiao nordeste',
-        'FOR': 'regiao nordeste',
-        'POA': 'regiao sul',
-        'BEL': 'regiao norte',
-        'MAO': 'regiao norte',
-        'VCP': 'regiao sudeste',
-        'NAT': 'regiao nordeste',
-        'VIX': 'regiao sudeste',
-        'CGB': 'regiao centro-oeste',
-        'JFK': 'regiao internacional'
-    }
-    return mapping.get(codigo, 'regiao desconhecida')
+    return indice_aeroportos().regiao(codigo)
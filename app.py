@@ -1,12 +1,12 @@
 import streamlit as st
 import datetime
 import pandas as pd
-import math
 import sys
 import asyncio
 import concurrent.futures
-from pesquisa_voos import search_flights
-from airports import airport_coords, obter_regiao
+from pesquisa_voos import search_flights, estatisticas_coalescencia
+from airports import airport_coords, obter_regiao, indice_aeroportos
+from precos import normalizar_preco, normalizar_precos
 from db import init_db, salva_resultados_em_db, salva_historico_em_db, busca_resultados, busca_historico
 from historico_precos import scrape 
 
@@ -16,19 +16,6 @@ init_db()
 if "resultados" not in st.session_state:
     st.session_state["resultados"] = None
 
-def haversine(coord1, coord2):
-    # Fórmula de Haversine para calcular a distância (em km) entre duas coordenadas
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    R = 6371  # Raio da Terra em km
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
 def fetch_voos_por_data(date_str, origem, destino, search_date, num_results):
     resultados = []
     try:
@@ -40,8 +27,12 @@ def fetch_voos_por_data(date_str, origem, destino, search_date, num_results):
         else:
             raise e
     if result.flights:
-        # Ordena os voos pelo preço e seleciona os melhores conforme o número solicitado
-        sorted_flights = sorted(result.flights, key=lambda f: f.price)
+        # Ordena os voos pelo valor numérico do preço (sem preço vão para o fim) e seleciona
+        # os melhores conforme o número solicitado
+        def ordem_preco(flight):
+            preco = normalizar_preco(flight.price)
+            return (preco is None, preco or 0)
+        sorted_flights = sorted(result.flights, key=ordem_preco)
         melhores_voos = sorted_flights[:num_results]
         flight_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
         for flight in melhores_voos:
@@ -55,11 +46,7 @@ def fetch_voos_por_data(date_str, origem, destino, search_date, num_results):
                 "dia_semana_voo": flight_date.strftime("%A"),
                 "dia_semana_busca": search_date.strftime("%A")
             }
-            if origem in airport_coords and destino in airport_coords:
-                distancia = haversine(airport_coords[origem], airport_coords[destino])
-                voo_info["distancia_km"] = str(round(distancia, 2))
-            else:
-                voo_info["distancia_km"] = "N/A"
+            voo_info["distancia_km"] = indice_aeroportos().distancia_formatada(origem, destino)
             resultados.append(voo_info)
     return resultados
 
@@ -80,12 +67,13 @@ def app():
             try:
                 # Divide o trecho para extrair origem e destino
                 if sys.platform.startswith("win"):
+                    # No Windows, o Playwright precisa do loop Proactor para abrir o navegador
                     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-                    flight_date_str = flight_date_input.strftime("%Y-%m-%d")
-                    print(origem, destino, flight_date_str)
-                    # Executa a função de scraping de forma síncrona utilizando asyncio.run       
-                    asyncio.run(scrape(origem, destino, flight_date_str))
-                    st.success("Histórico de preços gerado com sucesso! Confira abaixo os dados carregados.")
+                flight_date_str = flight_date_input.strftime("%Y-%m-%d")
+                print(origem, destino, flight_date_str)
+                # Executa a função de scraping de forma síncrona utilizando asyncio.run
+                asyncio.run(scrape(origem, destino, flight_date_str))
+                st.success("Histórico de preços gerado com sucesso! Confira abaixo os dados carregados.")
             except Exception as e:
                 st.error(f"Erro ao gerar histórico: {e}")
         
@@ -107,8 +95,8 @@ def app():
             data_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             # Converte os valores da coluna "Tempo" para uppercase
             df_precos["Tempo"] = df_precos["Tempo"].str.upper()
-            # Remove o símbolo "R$" e espaços em branco
-            df_precos["Preço"] = df_precos["Preço"].str.replace("R$", "", regex=False).str.strip()
+            # Converte os preços ("R$ 1.234") em números
+            df_precos["Preço"] = normalizar_precos(df_precos["Preço"])
             # Cria um dicionário mapeando cada tempo para seu respectivo preço (caso haja duplicatas, pega o primeiro)
             price_dict = df_precos.groupby("Tempo")["Preço"].first().to_dict()
             
@@ -197,6 +185,12 @@ def app():
                 completed += 1
                 progress_bar.progress(completed / total_days)
         
+        coalescencia = estatisticas_coalescencia()
+        st.sidebar.caption(
+            f"Buscas ao Google neste servidor: {coalescencia['execucoes']} "
+            f"(+{coalescencia['coalescidas']} chamadas atendidas por buscas idênticas em andamento)"
+        )
+
         if resultados:
             now = datetime.datetime.now()
             for r in resultados:
@@ -1,15 +1,31 @@
+import os
 import json
+import argparse
 import sys
+import time
 import asyncio
+import logging
 import datetime
-import math
-from pesquisa_voos import search_flights
-from db_pg import init_db, salva_resultados_em_db
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from zoneinfo import ZoneInfo
+from pesquisa_voos import search_flights_async, fechar_cliente_http, estatisticas_cache
+from cache_voos import cache_habilitado
+from airports import indice_aeroportos
+from precos import normalizar_preco
+from controle_concorrencia import ControladorAIMD, classificar_erro, espera_backoff
+from fuso_horario import FUSO_BUSCA
+from db_pg import init_db, salva_resultados_em_db, fechar_pool
+from agendador import selecionar_buscas, registrar_execucoes
+from diario_execucao import DiarioExecucao, caminho_diario
+from planejador import planejar, agrupar_por_trecho, resumo_plano
+from registro import configurar_logging, contexto_busca
+from metricas import metricas
+
+logger = logging.getLogger(__name__)
 
 def carregar_parametros(json_file="params_flights.json"):
     """
-    Carrega os parâmetros de busca de voos a partir de um arquivo JSON.
+    Carrega o plano de buscas de um arquivo JSON e o expande (planejador.planejar) em uma
+    lista de buscas sem duplicatas, sem datas passadas e agrupada por trecho.
     Exemplo de estrutura do JSON:
     [
       {
@@ -18,107 +34,83 @@ def carregar_parametros(json_file="params_flights.json"):
          "data": "2025-03-25"
       },
       {
-         "origem": "SDU",
-         "destino": "CGH",
-         "data": "2025-03-30"
+         "rotas": ["SDU-CGH", "CNF-SDU"],
+         "proximos_dias": 60,
+         "dias_semana": ["sex", "dom"]
       }
     ]
     """
     with open(json_file, "r", encoding="utf-8") as f:
         parametros = json.load(f)
-    return parametros
+    return planejar(parametros)
 
-def carregar_regioes(json_file="regioes.json"):
-    """
-    Carrega o mapeamento de aeroportos para regiões a partir de um arquivo JSON.
-    """
-    with open(json_file, "r", encoding="utf-8") as f:
-        regioes = json.load(f)
-    return regioes
-
-def carregar_airport_coords(json_file="airport_coords.json"):
-    """
-    Carrega as coordenadas (latitude e longitude) dos aeroportos a partir de um arquivo JSON.
-    """
-    with open(json_file, "r", encoding="utf-8") as f:
-        coords = json.load(f)
-    return coords
+# Duração típica de uma busca via Fast Flights, usada na estimativa do plano
+SEGUNDOS_POR_BUSCA_ESTIMADOS = 3
 
-def haversine(coord1, coord2):
-    """
-    Calcula a distância (em km) entre duas coordenadas (latitude, longitude) usando a fórmula de Haversine.
+async def buscar_voo(origem, destino, data_str, controlador=None, tentativas=None):
     """
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    R = 6371  # Raio da Terra em km
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-
-def tratar_preco(preco_valor):
-    """
-    Converte o valor do preço para um número (float).
-    Se o valor já for numérico, retorna-o diretamente.
-    Se for uma string, remove '$', espaços e formata a vírgula para ponto.
-    Se não puder converter, retorna None.
-    """
-    print(preco_valor)
-    if preco_valor is None:
-        return None
-
-    # Se já for um número, retorna-o
-    if isinstance(preco_valor, (int, float)):
-        return preco_valor
+    Realiza a busca de voos para a data informada e retorna o voo mais barato.
+    A região de origem e a distância entre os aeroportos vêm do índice de aeroportos
+    (airports.py); códigos não cadastrados resultam em "N/A".
 
-    # Converte para string, caso não seja
-    preco_str = str(preco_valor)
-    if "unavailable" in preco_str.lower():
-        print("indisponivel")
-        return None
+    Cada tentativa ocupa uma vaga do controlador de concorrência (AIMD), que recebe a latência
+    ou o tipo de falha. Uma página sem voos ("No flights found" no fast-flights) é um resultado
+    vazio: conta como sucesso para o controlador e não é repetida. Falhas são repetidas até
+    `tentativas` vezes (padrão FF_TENTATIVAS ou 4) com backoff exponencial e jitter, aguardado
+    fora da vaga; esgotadas as tentativas, a última exceção é propagada.
 
-    # Remove "R$" e espaços
-    preco_limpo = preco_str.replace("$", "").strip()
-    # Remove separadores de milhar e substitui vírgula por ponto
-    preco_limpo = preco_limpo.replace(".", "").replace(",", ".")
-    try:
-        return int(preco_limpo)
-    except ValueError:
-        print("Erro de tratamento de valor")
-        return None
+    As buscas usam search_flights_async, sem ocupar uma thread enquanto esperam a resposta.
 
-def buscar_voo(origem, destino, data_str, regioes, airport_coords):
-    """
-    Realiza a busca de voos para a data informada e retorna o voo mais barato.
-    Obtém a região de origem a partir do arquivo de mapeamento e calcula a distância entre
-    os aeroportos caso as coordenadas estejam disponíveis.
+    A latência de cada tentativa, as retentativas e o desfecho (ok, vazio ou erro) são
+    contabilizados por trecho nas métricas da execução (metricas.py).
     """
-    search_date = datetime.date.today()
-    try:
-        result = search_flights(data_str, origem, destino)
-    except Exception as e:
-        print(f"Erro ao buscar voos para {data_str} ({origem} -> {destino}): {e}")
-        return None
+    if controlador is None:
+        controlador = ControladorAIMD()
+    if tentativas is None:
+        tentativas = int(os.getenv("FF_TENTATIVAS", "4"))
+    if tentativas < 1:
+        raise ValueError("tentativas (FF_TENTATIVAS) deve ser maior que zero.")
+    rotulos = {"etapa": "search_flights", "trecho": f"{origem} x {destino}"}
+    for tentativa in range(tentativas):
+        async with controlador.vaga_async():
+            inicio = time.perf_counter()
+            try:
+                result = await search_flights_async(data_str, origem, destino)
+                latencia = time.perf_counter() - inicio
+                controlador.registrar_sucesso(latencia)
+                metricas.observar("ff_latencia_segundos", latencia, **rotulos)
+                break
+            except Exception as e:
+                latencia = time.perf_counter() - inicio
+                metricas.observar("ff_latencia_segundos", latencia, **rotulos)
+                tipo = classificar_erro(e)
+                if tipo == "vazio":
+                    controlador.registrar_sucesso(latencia)
+                    result = None
+                    break
+                ultimo_erro = e
+                controlador.registrar_falha(tipo)
+                with contexto_busca(tentativa=tentativa + 1):
+                    logger.warning("Erro ao buscar voos (tentativa %d/%d) [%s]: %s",
+                                   tentativa + 1, tentativas, tipo, e)
+        if tentativa + 1 == tentativas:
+            metricas.incrementar("ff_buscas_total", desfecho="erro", **rotulos)
+            raise ultimo_erro
+        controlador.registrar_retentativa()
+        metricas.incrementar("ff_retentativas_total", **rotulos)
+        await asyncio.sleep(espera_backoff(tentativa))
 
     if hasattr(result, "flights") and result.flights:
-        # Seleciona o voo mais barato
-        sorted_flights = sorted(result.flights, key=lambda f: f.price)
-        flight = sorted_flights[0]
+        # Seleciona o voo mais barato pelo valor numérico do preço; voos sem preço vão para o fim
+        precos = [normalizar_preco(getattr(f, "price", None)) for f in result.flights]
+        indice = min(range(len(precos)), key=lambda i: (precos[i] is None, precos[i] or 0))
+        flight = result.flights[indice]
         flight_date = datetime.datetime.strptime(data_str, '%Y-%m-%d').date()
-        hora_busca = datetime.datetime.now()
-        # Obtém a região do aeroporto de origem
-        regiao_origem = regioes.get(origem, "N/A")
-        # Calcula a distância se as coordenadas estiverem disponíveis
-        if origem in airport_coords and destino in airport_coords:
-            distancia = haversine(airport_coords[origem], airport_coords[destino])
-            distancia_str = str(round(distancia, 2))
-        else:
-            distancia_str = "N/A"
-        preco_tratado = tratar_preco(getattr(flight, "price", ""))
+        hora_busca = datetime.datetime.now(ZoneInfo(FUSO_BUSCA))
+        aeroportos = indice_aeroportos()
+        regiao_origem = aeroportos.regiao(origem)
+        distancia_str = aeroportos.distancia_formatada(origem, destino)
+        preco_tratado = precos[indice]
         trecho = f"{origem} x {destino}"
         voo_info = {
             "TRECHO": trecho,
@@ -129,60 +121,115 @@ def buscar_voo(origem, destino, data_str, regioes, airport_coords):
             "preco": preco_tratado,
             "companhia": flight.name,
             "dia_semana_voo": flight_date.strftime("%A"),
-            "data_busca": search_date.strftime("%Y-%m-%d"),
+            "data_busca": hora_busca.strftime("%Y-%m-%d"),
             "horario_busca": hora_busca.strftime("%H:%M:%S"),
-            "dia_semana_busca": search_date.strftime("%A"),
+            "dia_semana_busca": hora_busca.strftime("%A"),
             "regiao_origem": regiao_origem,
             "distancia_km": distancia_str
         }
-        print(f"[DEBUG] Voo encontrado: {voo_info}")
+        logger.debug("Voo encontrado: %s", voo_info)
+        metricas.incrementar("ff_buscas_total", desfecho="ok", **rotulos)
         return voo_info
     else:
-        print(f"Nenhum voo encontrado para {data_str} ({origem} -> {destino}).")
+        logger.debug("Nenhum voo encontrado.")
+        metricas.incrementar("ff_buscas_total", desfecho="vazio", **rotulos)
         return None
 
-def tarefa_automatizada():
+async def tarefa_automatizada(usar_agenda=True, orcamento=None, retomar=False):
     """
     Função principal que:
       - Inicializa o banco de dados.
-      - Carrega os parâmetros de busca de voos, o mapeamento de regiões e as coordenadas dos aeroportos.
-      - Para cada conjunto de parâmetros, busca o voo mais barato do dia.
-      - Salva os resultados no banco de dados.
+      - Carrega os parâmetros de busca de voos.
+      - Com usar_agenda, mantém apenas as buscas vencidas de maior valor dentro do orçamento
+        (agendador.py); sem ela, busca todos os parâmetros.
+      - Para cada conjunto de parâmetros, busca o voo mais barato do dia, registrando cada
+        desfecho no diário da execução (diario_execucao.py) assim que a busca termina.
+      - Salva os resultados no banco de dados e agenda a próxima atualização de cada busca.
+
+    Com retomar=True, continua a última execução interrompida: as buscas planejadas são as do
+    diário e apenas as ainda não concluídas são executadas.
     """
     init_db()  # Inicializa o banco e cria as tabelas, se necessário
-    print("[INFO] Banco de dados inicializado.")
-    parametros = carregar_parametros()
-    regioes = carregar_regioes()
-    airport_coords = carregar_airport_coords()
-    todos_resultados = []
-    resultados_ordenados = {}
-
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_param = {
-            executor.submit(buscar_voo, param.get("origem"), param.get("destino"), param.get("data"), regioes, airport_coords): i
-            for i, param in enumerate(parametros)
-        }
-
-        for future in as_completed(future_to_param):
-            index = future_to_param[future]  # Obtém a posição original
+    logger.info("Banco de dados inicializado.")
+    diario = DiarioExecucao(caminho_diario("automation"))
+    if retomar and diario.carregar():
+        logger.info("Retomando a execução %s: %d de %d buscas já concluídas.", diario.execucao,
+                    len(diario.parametros) - len(diario.pendentes()), len(diario.parametros))
+    else:
+        if retomar:
+            logger.info("Nenhuma execução interrompida para retomar; iniciando uma nova.")
+        parametros = carregar_parametros()
+        if usar_agenda:
+            parametros = agrupar_por_trecho(selecionar_buscas(parametros, "automation", orcamento))
+        diario.iniciar(parametros)
+    pendentes = diario.pendentes()
+    controlador = ControladorAIMD()
+    resumo_plano(pendentes, int(controlador.limite), SEGUNDOS_POR_BUSCA_ESTIMADOS)
+
+    async def buscar_e_registrar(param):
+        origem, destino, data = param.get("origem"), param.get("destino"), param.get("data")
+        with contexto_busca(trecho=f"{origem} x {destino}", data=data):
             try:
-                resultado = future.result()
-                if resultado:
-                    resultados_ordenados[index] = resultado
+                resultado = await buscar_voo(origem, destino, data, controlador)
             except Exception as e:
-                print(f"[ERROR] Falha ao buscar voo: {e}")
+                logger.error("Falha ao buscar voo: %s", e)
+                diario.registrar(param, None, falhou=True)
+                raise
+            diario.registrar(param, resultado)
+            return resultado
+
+    # Uma tarefa por busca no mesmo event loop; a concorrência efetiva é a do controlador
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(buscar_e_registrar(param) for param in pendentes), return_exceptions=True)
+    falhas = sum(isinstance(resultado, Exception) for resultado in resultados)
+    encontrados = sum(bool(resultado) and not isinstance(resultado, Exception) for resultado in resultados)
+    logger.info("Buscas concluídas: %d com voo, %d sem voo, %d com falha em %.1f s.",
+                encontrados, len(resultados) - encontrados - falhas, falhas, time.perf_counter() - inicio)
+
+    logger.info("Controle de concorrência: %s", controlador.resumo())
 
-    # Ordena os resultados para garantir que sejam salvos na ordem original
-    for i in sorted(resultados_ordenados.keys()):
-        todos_resultados.append(resultados_ordenados[i])
+    # Inclui os resultados das buscas concluídas antes da interrupção, na ordem do plano
+    todos_resultados = diario.resultados()
 
     if todos_resultados:
-        salva_resultados_em_db(todos_resultados)
-        print(f"[INFO] Total de {len(todos_resultados)} registros salvos no banco de dados.")
+        contagem = salva_resultados_em_db(todos_resultados)
+        logger.info("Total de %d registros salvos no banco de dados (%d já existentes).",
+                    contagem["inseridos"], contagem["ignorados"])
     else:
-        print("[WARN] Nenhum resultado obtido para salvar.")
+        logger.warning("Nenhum resultado obtido para salvar.")
+    if usar_agenda:
+        registrar_execucoes(diario.execucoes(), "automation")
+    diario.encerrar()
+    if cache_habilitado():
+        logger.info("Cache de buscas: %s", estatisticas_cache())
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca automatizada de voos (Fast Flights).")
+    parser.add_argument("--sem-agenda", action="store_true",
+                        help="busca todos os parâmetros, ignorando a agenda de atualização")
+    parser.add_argument("--orcamento", type=int,
+                        help="número máximo de buscas nesta execução (padrão AGENDA_ORCAMENTO)")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a última execução interrompida, pulando as buscas já concluídas")
+    parser.add_argument("--url-base",
+                        help="endereço no lugar de https://www.google.com, como o do servidor simulado "
+                             "(benchmarks/servidor_simulado.py); padrão GOOGLE_FLIGHTS_URL_BASE")
+    args = parser.parse_args()
+    if args.url_base:
+        os.environ["GOOGLE_FLIGHTS_URL_BASE"] = args.url_base
+    configurar_logging()
+
     if sys.platform.startswith("win"):
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-    tarefa_automatizada()
\ No newline at end of file
+    async def main():
+        try:
+            await tarefa_automatizada(usar_agenda=not args.sem_agenda, orcamento=args.orcamento, retomar=args.resume)
+        finally:
+            await fechar_cliente_http()
+
+    try:
+        asyncio.run(main())
+    finally:
+        fechar_pool()
+        # Gravadas também quando a execução falha, que é quando elas mais interessam
+        logger.info("Métricas da execução gravadas em %s.", ", ".join(metricas.exportar("automation")))
\ No newline at end of file
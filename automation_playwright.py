@@ -1,72 +1,37 @@
+import os
 import json
+import time
 import asyncio
+import logging
+import argparse
 import datetime
-import math
 from zoneinfo import ZoneInfo
 
-from db_pg import init_db, salva_resultados_em_db
+from airports import indice_aeroportos
+from precos import normalizar_preco
+from fuso_horario import FUSO_BUSCA
+from db_pg import init_db, salva_resultados_em_db, fechar_pool
+from agendador import selecionar_buscas, registrar_execucoes
+from diario_execucao import DiarioExecucao, caminho_diario
+from planejador import planejar, agrupar_por_trecho, resumo_plano
 from pesquisa_voos_playwright import scrape_day
+from pool_paginas import PoolPaginas, processar_fila
+from registro import configurar_logging, contexto_busca
+from metricas import metricas
 from playwright.async_api import async_playwright
 
+logger = logging.getLogger(__name__)
+
 def carregar_parametros(json_file="params_flights.json"):
     """
-    Carrega os parâmetros de busca de voos a partir de um arquivo JSON.
+    Carrega o plano de buscas de um arquivo JSON e o expande (planejador.planejar) em uma
+    lista de buscas sem duplicatas, sem datas passadas e agrupada por trecho.
     """
     with open(json_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return planejar(json.load(f))
 
-def carregar_regioes(json_file="regioes.json"):
-    """
-    Carrega o mapeamento de aeroportos para regiões a partir de um arquivo JSON.
-    """
-    with open(json_file, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def carregar_airport_coords(json_file="airport_coords.json"):
-    """
-    Carrega as coordenadas (latitude e longitude) dos aeroportos a partir de um arquivo JSON.
-    """
-    with open(json_file, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def haversine(coord1, coord2):
-    """
-    Calcula a distância (em km) entre duas coordenadas (latitude, longitude)
-    usando a fórmula de Haversine.
-    """
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    R = 6371  # Raio da Terra em km
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-def tratar_preco(preco_valor):
-    """
-    Converte o valor do preço para um número (int).
-    Se o valor já for numérico, retorna-o diretamente.
-    Se for uma string, remove 'R$', espaços e formata a vírgula para ponto.
-    Se não puder converter, retorna None.
-    """
-    if preco_valor is None:
-        return None
-    if isinstance(preco_valor, (int, float)):
-        return preco_valor
-
-    preco_str = str(preco_valor)
-    if "unavailable" in preco_str.lower():
-        return None
-
-    preco_limpo = preco_str.replace("R$", "").strip()
-    preco_limpo = preco_limpo.replace(".", "").replace(",", ".")
-    try:
-        return int(preco_limpo)
-    except ValueError:
-        return None
+# Duração típica de uma busca via Playwright, usada na estimativa do plano
+SEGUNDOS_POR_BUSCA_ESTIMADOS = 10
 
 def validar_voo_info(voo_info):
     """
@@ -78,33 +43,39 @@ def validar_voo_info(voo_info):
             return False
     return True
 
-async def buscar_voo_playwright(origin, destination, flight_date, regioes, airport_coords, browser):
+async def buscar_voo_playwright(origin, destination, flight_date, pool):
     """
     Tenta realizar a busca do voo via Playwright, repetindo a busca até 3 vezes
-    caso não obtenha um resultado válido.
+    caso não obtenha um resultado válido. Cada tentativa usa uma página emprestada
+    do pool, que é reaproveitada entre buscas em vez de aberta a cada tentativa.
+    Retentativas e o desfecho final (ok, vazio ou erro) entram nas métricas da execução.
     """
     max_attempts = 3
     attempt = 0
     flight_info = None
+    erro = None
+    rotulos = {"etapa": "scrape_day", "trecho": f"{origin} x {destination}"}
     while attempt < max_attempts:
-        try:
-            page = await browser.new_page()
-            flight_info = await scrape_day(page, origin, destination, flight_date)
-        except Exception as e:
-            print(f"[ERROR] Erro ao buscar voos para {flight_date} ({origin} -> {destination}) na tentativa {attempt+1}: {e}")
-        finally:
+        if attempt:
+            metricas.incrementar("ff_retentativas_total", **rotulos)
+        with contexto_busca(tentativa=attempt + 1):
+            erro = None
             try:
-                await page.close()
+                async with pool.pagina() as page:
+                    flight_info = await scrape_day(page, origin, destination, flight_date)
             except Exception as e:
-                print("[WARN] Erro ao fechar a página:", e)
-        if flight_info:
-            break
-        else:
-            print(f"[WARN] Tentativa {attempt+1} - Nenhum voo encontrado para {flight_date} ({origin} -> {destination}).")
+                erro = e
+                logger.warning("Erro ao buscar voos na tentativa %d: %s", attempt + 1, e)
+            if flight_info:
+                break
+            else:
+                logger.debug("Tentativa %d - Nenhum voo encontrado.", attempt + 1)
         attempt += 1
+    desfecho = "ok" if flight_info else ("erro" if erro is not None else "vazio")
+    metricas.incrementar("ff_buscas_total", desfecho=desfecho, **rotulos)
     return flight_info
 
-async def processar_parametro(param, regioes, airport_coords, browser):
+async def processar_parametro(param, pool):
     """
     Processa um parâmetro de busca:
       - Realiza a busca do voo utilizando Playwright.
@@ -113,30 +84,27 @@ async def processar_parametro(param, regioes, airport_coords, browser):
     origin = param.get("origem")
     destination = param.get("destino")
     flight_date = param.get("data")
-    print(f"[INFO] Processando voo: {origin} -> {destination} em {flight_date}")
-    
-    flight = await buscar_voo_playwright(origin, destination, flight_date, regioes, airport_coords, browser)
+    logger.debug("Processando voo: %s -> %s em %s", origin, destination, flight_date)
+
+    flight = await buscar_voo_playwright(origin, destination, flight_date, pool)
     if not flight:
-        print(f"[ERROR] Não foi possível obter um voo válido para {origin} -> {destination} em {flight_date}.")
+        logger.warning("Não foi possível obter um voo válido.")
         return None
 
     flight_date_obj = datetime.datetime.strptime(flight_date, "%Y-%m-%d").date()
-    agora_br = datetime.datetime.now(ZoneInfo("America/Sao_Paulo"))
+    agora_br = datetime.datetime.now(ZoneInfo(FUSO_BUSCA))
     trecho = f"{origin} x {destination}"
-    regiao_origem = regioes.get(origin, "N/A")
-    if origin in airport_coords and destination in airport_coords:
-        distancia = haversine(airport_coords[origin], airport_coords[destination])
-        distancia_str = str(round(distancia, 2))
-    else:
-        distancia_str = "N/A"
-    preco_tratado = tratar_preco(flight.get("preco"))
+    aeroportos = indice_aeroportos()
+    regiao_origem = aeroportos.regiao(origin)
+    distancia_str = aeroportos.distancia_formatada(origin, destination)
+    preco_tratado = normalizar_preco(flight.get("preco"))
 
     # Monta o dicionário com todos os campos exigidos para a tabela
     voo_info = {
         "TRECHO": trecho,
         "data_voo": flight_date,
         "hora_partida": flight.get("horario_partida", "N/A"),
-        "hora_chegada": flight.get("horario_chegada", "N/A"),  # Dado não obtido via Playwright
+        "hora_chegada": flight.get("horario_chegada", "N/A"),
         "preco": preco_tratado,
         "companhia": flight.get("companhia", "N/A"),
         "dia_semana_voo": flight_date_obj.strftime("%A"),
@@ -146,42 +114,107 @@ async def processar_parametro(param, regioes, airport_coords, browser):
         "regiao_origem": regiao_origem,
         "distancia_km": distancia_str
     }
-    print(f"[DEBUG] Voo encontrado: {voo_info}")
+    logger.debug("Voo encontrado: %s", voo_info)
     if validar_voo_info(voo_info):
         return voo_info
     else:
-        print("[WARN] Voo com parâmetros inválidos.")
+        logger.warning("Voo com parâmetros inválidos.")
         return None
 
-async def tarefa_automatizada():
+async def tarefa_automatizada(usar_agenda=True, orcamento=None, retomar=False):
     """
     Função principal que:
       - Inicializa o banco de dados.
-      - Carrega os parâmetros, as regiões e as coordenadas dos aeroportos.
-      - Realiza as buscas de voos de forma assíncrona utilizando Playwright.
-      - Salva os resultados no banco de dados.
+      - Carrega os parâmetros de busca.
+      - Com usar_agenda, mantém apenas as buscas vencidas de maior valor dentro do orçamento
+        (agendador.py).
+      - Realiza as buscas de voos de forma assíncrona utilizando Playwright, com uma fila
+        consumida por um pool limitado de páginas (PW_CONCORRENCIA), registrando cada desfecho
+        no diário da execução (diario_execucao.py) assim que a busca termina.
+      - Salva os resultados no banco de dados e agenda a próxima atualização de cada busca.
+
+    Com retomar=True, continua a última execução interrompida, executando apenas as buscas
+    do diário ainda não concluídas.
     """
     init_db()
-    print("[INFO] Banco de dados inicializado.")
-    parametros = carregar_parametros()
-    regioes = carregar_regioes()
-    airport_coords = carregar_airport_coords()
+    logger.info("Banco de dados inicializado.")
+    diario = DiarioExecucao(caminho_diario("automation_playwright"))
+    if retomar and diario.carregar():
+        logger.info("Retomando a execução %s: %d de %d buscas já concluídas.", diario.execucao,
+                    len(diario.parametros) - len(diario.pendentes()), len(diario.parametros))
+    else:
+        if retomar:
+            logger.info("Nenhuma execução interrompida para retomar; iniciando uma nova.")
+        parametros = carregar_parametros()
+        if usar_agenda:
+            parametros = agrupar_por_trecho(selecionar_buscas(parametros, "automation_playwright", orcamento))
+        diario.iniciar(parametros)
+    pendentes = diario.pendentes()
 
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        tasks = []
-        for param in parametros:
-            tasks.append(processar_parametro(param, regioes, airport_coords, browser))
-        resultados = await asyncio.gather(*tasks)
+        async with PoolPaginas(browser) as pool:
+            resumo_plano(pendentes, pool.tamanho, SEGUNDOS_POR_BUSCA_ESTIMADOS)
+            logger.info("Pool de páginas: %d simultâneas, contexto reciclado a cada %d usos.",
+                        pool.tamanho, pool.usos_por_contexto)
+            desfechos = {"com_voo": 0, "sem_voo": 0, "falhas": 0}
+
+            async def processar_e_registrar(param):
+                with contexto_busca(trecho=f"{param.get('origem')} x {param.get('destino')}", data=param.get("data")):
+                    try:
+                        resultado = await processar_parametro(param, pool)
+                    except Exception:
+                        desfechos["falhas"] += 1
+                        diario.registrar(param, None, falhou=True)
+                        raise
+                    desfechos["com_voo" if resultado else "sem_voo"] += 1
+                    # Sem voo válido conta como falha: a busca é repetida ao retomar
+                    diario.registrar(param, resultado, falhou=resultado is None)
+                    return resultado
+
+            inicio = time.perf_counter()
+            await processar_fila(pendentes, processar_e_registrar, pool.tamanho)
+            logger.info("Buscas concluídas: %d com voo, %d sem voo, %d com falha em %.1f s.",
+                        desfechos["com_voo"], desfechos["sem_voo"], desfechos["falhas"], time.perf_counter() - inicio)
+            logger.info("Pool de páginas: %d empréstimos, %d contextos criados.",
+                        pool.emprestimos, pool.contextos_criados)
         await browser.close()
 
-    # Filtra os resultados válidos (não None)
-    resultados_validos = [r for r in resultados if r is not None]
+    # Resultados válidos desta execução, inclusive os obtidos antes de uma interrupção
+    resultados_validos = diario.resultados()
     if resultados_validos:
-        salva_resultados_em_db(resultados_validos)
-        print(f"[INFO] Total de {len(resultados_validos)} registros salvos no banco de dados.")
+        contagem = salva_resultados_em_db(resultados_validos)
+        logger.info("Total de %d registros salvos no banco de dados (%d já existentes).",
+                    contagem["inseridos"], contagem["ignorados"])
     else:
-        print("[WARN] Nenhum resultado obtido para salvar.")
+        logger.warning("Nenhum resultado obtido para salvar.")
+    if usar_agenda:
+        registrar_execucoes(diario.execucoes(), "automation_playwright")
+    diario.encerrar()
 
 if __name__ == "__main__":
-    asyncio.run(tarefa_automatizada())
+    parser = argparse.ArgumentParser(description="Busca automatizada de voos (Playwright).")
+    parser.add_argument("--sem-agenda", action="store_true",
+                        help="busca todos os parâmetros, ignorando a agenda de atualização")
+    parser.add_argument("--orcamento", type=int,
+                        help="número máximo de buscas nesta execução (padrão AGENDA_ORCAMENTO)")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a última execução interrompida, pulando as buscas já concluídas")
+    parser.add_argument("--url-base",
+                        help="endereço no lugar de https://www.google.com, como o do servidor simulado "
+                             "(benchmarks/servidor_simulado.py); padrão GOOGLE_FLIGHTS_URL_BASE")
+    parser.add_argument("--gravacao", choices=("gravar", "reproduzir"),
+                        help="grava o tráfego de cada busca em HAR ou o reproduz sem rede "
+                             "(gravacao_trafego.py); padrão PW_GRAVACAO")
+    args = parser.parse_args()
+    if args.url_base:
+        os.environ["GOOGLE_FLIGHTS_URL_BASE"] = args.url_base
+    if args.gravacao:
+        os.environ["PW_GRAVACAO"] = args.gravacao
+    configurar_logging()
+
+    try:
+        asyncio.run(tarefa_automatizada(usar_agenda=not args.sem_agenda, orcamento=args.orcamento, retomar=args.resume))
+    finally:
+        fechar_pool()
+        logger.info("Métricas da execução gravadas em %s.", ", ".join(metricas.exportar("automation_playwright")))
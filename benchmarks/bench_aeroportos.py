@@ -0,0 +1,57 @@
+"""
+Compara as formas de obter a distância entre pares de aeroportos: haversine recalculado a
+cada par (como os scripts faziam), consulta à matriz pré-calculada de IndiceAeroportos par a
+par e em lote (distancias_em_lote). Também mede a criação do índice. Imprime o resultado em JSON.
+
+Uso:
+    python benchmarks/bench_aeroportos.py [--pares 100000] [--repeticoes 5]
+"""
+import random
+import argparse
+
+from comum import cronometrar, resultado, imprimir
+
+from airports import ARQUIVO_AEROPORTOS, IndiceAeroportos, haversine, indice_aeroportos
+
+def gerar_pares(codigos, pares, semente=42):
+    """Pares (origem, destino) sorteados entre os aeroportos cadastrados, com origem != destino."""
+    random.seed(semente)
+    return [tuple(random.sample(codigos, 2)) for _ in range(pares)]
+
+def executar(pares, repeticoes):
+    indice = indice_aeroportos()
+    lista_pares = gerar_pares(list(indice.codigos), pares)
+    origens = [origem for origem, _ in lista_pares]
+    destinos = [destino for _, destino in lista_pares]
+    coordenadas = {codigo: indice.coordenada(codigo) for codigo in indice.codigos}
+
+    casos = {
+        "haversine_por_par": lambda: [
+            haversine(coordenadas[origem], coordenadas[destino]) for origem, destino in lista_pares
+        ],
+        "indice_distancia": lambda: [indice.distancia(origem, destino) for origem, destino in lista_pares],
+        "indice_distancia_formatada": lambda: [
+            indice.distancia_formatada(origem, destino) for origem, destino in lista_pares
+        ],
+        "indice_distancias_em_lote": lambda: indice.distancias_em_lote(origens, destinos),
+    }
+    resultados = [
+        resultado("aeroportos", nome, pares, cronometrar(funcao, repeticoes))
+        for nome, funcao in casos.items()
+    ]
+    criacao = cronometrar(lambda: IndiceAeroportos.carregar(ARQUIVO_AEROPORTOS), repeticoes)
+    resultados.append(resultado("aeroportos", "carregar_indice", len(indice), criacao))
+
+    # Diferença máxima (km) entre a matriz pré-calculada e o haversine escalar
+    divergencia = max(
+        abs(indice.distancia(origem, destino) - haversine(coordenadas[origem], coordenadas[destino]))
+        for origem, destino in lista_pares[:1000]
+    )
+    return {"resultados": resultados, "divergencia_maxima_km": divergencia}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das consultas de distância entre aeroportos.")
+    parser.add_argument("--pares", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    imprimir(executar(args.pares, args.repeticoes))
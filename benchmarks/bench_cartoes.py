@@ -0,0 +1,172 @@
+"""
+Mede a extração dos cartões de voo sobre páginas do Google Flights salvas em
+benchmarks/fixtures/*.html, sem acesso à rede: cada página é carregada no Chromium do
+Playwright com set_content e toda requisição é abortada. Compara extrair_cartoes (uma chamada
+a page.evaluate) com a leitura anterior, campo a campo por elemento, e mede voo_mais_barato.
+Imprime o resultado em JSON.
+
+A única fixture do repositório, voos_sintetico.html, é sintética: marcação mínima no layout
+de DEFINICOES_SELETORES, sem os scripts, estilos e a profundidade do DOM de uma página real.
+Os números medem portanto apenas essa marcação e não representam o custo sobre o Google
+Flights; o JSON informa quantas fixtures reais foram medidas e avisa quando nenhuma foi.
+Para medir o layout real, salve uma página de resultados (Ctrl+S no navegador) em
+benchmarks/fixtures/. A fixture sintética é gerada com:
+    python benchmarks/bench_cartoes.py --gerar-fixture [--cartoes 60]
+
+Uso:
+    python benchmarks/bench_cartoes.py [--repeticoes 20] [--cartoes 60]
+Sem o Playwright instalado, apenas voo_mais_barato é medido, sobre cartões sintéticos.
+"""
+import os
+import glob
+import time
+import random
+import asyncio
+import argparse
+from html import escape
+
+from comum import cronometrar, resultado, imprimir
+
+from extracao_cartoes import definicao_seletores, extrair_cartoes, voo_mais_barato
+
+DIRETORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_SINTETICA = os.path.join(DIRETORIO_FIXTURES, "voos_sintetico.html")
+
+COMPANHIAS = ("LATAM", "GOL", "Azul", "Azul, GOL", "LATAM, Delta")
+
+def gerar_cartoes(cartoes, semente=42):
+    """Cartões sintéticos, no formato devolvido por extrair_cartoes."""
+    sorteio = random.Random(semente)
+    gerados = []
+    for _ in range(cartoes):
+        partida = sorteio.randint(5 * 60, 22 * 60)
+        duracao = sorteio.randint(55, 600)
+        chegada = (partida + duracao) % (24 * 60)
+        preco = sorteio.randint(180, 4500)
+        paradas = sorteio.choice((0, 0, 1, 2))
+        gerados.append({
+            "horario_partida": f"{partida // 60:02d}:{partida % 60:02d}",
+            "horario_chegada": f"{chegada // 60:02d}:{chegada % 60:02d}",
+            "preco": f"R$ {preco:,}".replace(",", "."),
+            "preco_rotulo": f"{preco} Reais brasileiros",
+            "companhia": sorteio.choice(COMPANHIAS),
+            "paradas": "Direto" if paradas == 0 else f"{paradas} parada{'s' if paradas > 1 else ''}",
+            "duracao": f"{duracao // 60} h {duracao % 60} min",
+        })
+    return gerados
+
+def renderizar_html(cartoes):
+    """Página de resultados com a marcação que os seletores da versão 2025-05 esperam."""
+    itens = []
+    for c in cartoes:
+        rotulo_paradas = "Voo direto." if c["paradas"] == "Direto" else f"{c['paradas']}."
+        itens.append(f"""  <li class="pIav2d">
+    <div>
+      <span aria-label="Horário de partida: {c['horario_partida']}.">{c['horario_partida']}</span> –
+      <span aria-label="Horário de chegada: {c['horario_chegada']}.">{c['horario_chegada']}</span>
+    </div>
+    <div class="sSHqwe tPgKwe ogfYpf"><span>{escape(c['companhia'])}</span></div>
+    <div aria-label="Duração total: {c['duracao']}.">{c['duracao']}</div>
+    <div><span aria-label="{rotulo_paradas}">{c['paradas']}</span></div>
+    <div class="YMlIz FpEdX"><span aria-label="{c['preco_rotulo']}" role="text">{c['preco']}</span></div>
+  </li>""")
+    return (
+        '<!DOCTYPE html>\n<html lang="pt-BR">\n<head><meta charset="utf-8"><title>Google Flights</title></head>\n'
+        "<body>\n<ul>\n" + "\n".join(itens) + "\n</ul>\n</body>\n</html>\n"
+    )
+
+async def extrair_por_elemento_anterior(page, definicao):
+    """
+    Leitura usada por scrape_day antes de extrair_cartoes: uma chamada ao navegador para
+    listar os cartões e outras duas (query_selector e inner_text/get_attribute) por campo.
+    """
+    cartoes = []
+    for cartao in await page.query_selector_all(definicao["cartao"]):
+        voo = {}
+        for nome, campo in definicao["campos"].items():
+            el = await cartao.query_selector(campo["seletor"])
+            if el is None:
+                voo[nome] = None
+            elif campo.get("atributo"):
+                voo[nome] = await el.get_attribute(campo["atributo"])
+            else:
+                voo[nome] = (await el.inner_text()).strip()
+        cartoes.append(voo)
+    return cartoes
+
+async def _cronometrar_async(corrotina, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        await corrotina()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+async def _medir_fixtures(caminhos, repeticoes):
+    from playwright.async_api import async_playwright
+
+    definicao = definicao_seletores()
+    resultados = []
+    divergentes = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        # Nenhum acesso à rede: imagens, scripts e estilos referenciados pela página salva são abortados
+        await page.route("**/*", lambda route: route.abort())
+        for caminho in caminhos:
+            with open(caminho, "r", encoding="utf-8") as f:
+                await page.set_content(f.read(), wait_until="domcontentloaded")
+            fixture = os.path.basename(caminho)
+            cartoes = await extrair_cartoes(page, definicao)
+            anteriores = await extrair_por_elemento_anterior(page, definicao)
+            casos = {
+                "extrair_cartoes": lambda: extrair_cartoes(page, definicao),
+                "extrair_por_elemento_anterior": lambda: extrair_por_elemento_anterior(page, definicao),
+            }
+            for nome, corrotina in casos.items():
+                segundos = await _cronometrar_async(corrotina, repeticoes)
+                resultados.append(resultado("cartoes", nome, len(cartoes), segundos, fixture=fixture))
+            segundos = cronometrar(lambda: voo_mais_barato(cartoes), repeticoes)
+            resultados.append(resultado("cartoes", "voo_mais_barato", len(cartoes), segundos, fixture=fixture))
+            if anteriores != cartoes:
+                divergentes.append(fixture)
+        await browser.close()
+    # Fixtures em que as duas formas de extração não devolveram os mesmos cartões
+    return {"resultados": resultados, "fixtures_com_divergencia": divergentes}
+
+AVISO_SINTETICO = "apenas marcação sintética medida; salve páginas reais em benchmarks/fixtures/"
+
+def executar(repeticoes, cartoes):
+    caminhos = sorted(glob.glob(os.path.join(DIRETORIO_FIXTURES, "*.html")))
+    reais = [os.path.basename(c) for c in caminhos if os.path.abspath(c) != FIXTURE_SINTETICA]
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        sinteticos = gerar_cartoes(cartoes)
+        segundos = cronometrar(lambda: voo_mais_barato(sinteticos), repeticoes)
+        return {
+            "resultados": [resultado("cartoes", "voo_mais_barato", cartoes, segundos, fixture="sintetica")],
+            "fixtures_reais": [],
+            "aviso": f"playwright não instalado; extração no navegador não medida; {AVISO_SINTETICO}",
+        }
+    relatorio = asyncio.run(_medir_fixtures(caminhos, repeticoes))
+    relatorio["fixtures_reais"] = reais
+    if not reais:
+        relatorio["aviso"] = AVISO_SINTETICO
+    return relatorio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da extração dos cartões de voo (sem rede).")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--cartoes", type=int, default=60,
+                        help="cartões da fixture sintética (ou da lista sem navegador)")
+    parser.add_argument("--gerar-fixture", action="store_true",
+                        help=f"grava a fixture sintética em {os.path.relpath(FIXTURE_SINTETICA)} e sai")
+    args = parser.parse_args()
+    if args.gerar_fixture:
+        os.makedirs(DIRETORIO_FIXTURES, exist_ok=True)
+        with open(FIXTURE_SINTETICA, "w", encoding="utf-8") as f:
+            f.write(renderizar_html(gerar_cartoes(args.cartoes)))
+        print(FIXTURE_SINTETICA)
+    else:
+        imprimir(executar(args.repeticoes, args.cartoes))
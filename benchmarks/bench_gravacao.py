@@ -0,0 +1,233 @@
+"""
+Mede o caminho de gravação da tabela resultados2 para 1k, 10k e 100k linhas sintéticas:
+  - sqlite (padrão, sem servidor): a estratégia de salva_resultados_em_db (lotes de
+    INSERT ... ON CONFLICT DO NOTHING sobre o índice único da chave natural) reproduzida em
+    um banco SQLite temporário, comparada à verificação linha a linha anterior;
+  - postgres: o próprio db_pg.salva_resultados_em_db e a versão linha a linha anterior, no
+    banco configurado no .env, dentro de um schema novo (--esquema, padrão
+    bench_gravacao_<pid>) removido ao final. Os comandos do benchmark são qualificados com o
+    schema e as funções de db_pg o recebem pelo DB_SEARCH_PATH; o benchmark se recusa a
+    rodar em "public" ou se as conexões não estiverem no schema. Para um Postgres local sem
+    SSL, use DB_SSLMODE=disable.
+Cada caso parte de uma tabela vazia; "repetidos" grava as mesmas linhas uma segunda vez, todas
+descartadas como duplicatas. A versão linha a linha tem custo quadrático e só é medida até
+--max-linhas-anterior. Imprime o resultado em JSON.
+
+Uso:
+    python benchmarks/bench_gravacao.py [--banco sqlite|postgres] [--linhas 1000 10000 100000]
+                                        [--repeticoes 3] [--max-linhas-anterior 10000]
+                                        [--esquema bench_gravacao_<pid>]
+"""
+import os
+import re
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import tempfile
+
+from comum import resultado, imprimir
+
+from db_pg import COLUNAS_RESULTADO, DB_BATCH_SIZE_PADRAO
+
+AEROPORTOS = ("GRU", "CGH", "GIG", "SDU", "BSB", "CNF", "SSA", "REC", "POA", "FOR", "CWB", "MAO")
+COMPANHIAS = ("LATAM", "GOL", "Azul", "Azul, GOL")
+
+def gerar_resultados(linhas, semente=42):
+    """Resultados sintéticos no formato gravado pelos scripts, todos com chave natural distinta."""
+    random.seed(semente)
+    inicio = datetime.datetime(2025, 1, 1, 0, 0, 0)
+    resultados = []
+    for i in range(linhas):
+        origem, destino = random.sample(AEROPORTOS, 2)
+        buscado_em = inicio + datetime.timedelta(seconds=i)
+        data_voo = buscado_em.date() + datetime.timedelta(days=random.randint(1, 120))
+        resultados.append({
+            "TRECHO": f"{origem} x {destino}",
+            "data_voo": data_voo.isoformat(),
+            "hora_partida": f"{random.randint(5, 22):02d}:{random.choice((0, 15, 30, 45)):02d}",
+            "hora_chegada": f"{random.randint(6, 23):02d}:{random.choice((0, 15, 30, 45)):02d}",
+            "preco": random.randint(180, 4500),
+            "companhia": random.choice(COMPANHIAS),
+            "dia_semana_voo": data_voo.strftime("%A"),
+            "data_busca": buscado_em.strftime("%Y-%m-%d"),
+            "horario_busca": buscado_em.strftime("%H:%M:%S"),
+            "dia_semana_busca": buscado_em.strftime("%A"),
+            "regiao_origem": "Sudeste",
+            "distancia_km": str(round(random.uniform(300, 3000), 2)),
+        })
+    return resultados
+
+_SQLITE_TABELA = """
+    CREATE TABLE resultados2 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        TRECHO TEXT, data_voo TEXT, hora_partida TEXT, hora_chegada TEXT, preco INTEGER,
+        companhia TEXT, dia_semana_voo TEXT, data_busca TEXT, horario_busca TEXT,
+        dia_semana_busca TEXT, regiao_origem TEXT, distancia_km TEXT
+    )
+"""
+_SQLITE_INDICE = f"CREATE UNIQUE INDEX resultados2_chave_natural ON resultados2 ({', '.join(COLUNAS_RESULTADO)})"
+_SQLITE_INSERT = (
+    f"INSERT INTO resultados2 ({', '.join(COLUNAS_RESULTADO)}) "
+    f"VALUES ({', '.join('?' * len(COLUNAS_RESULTADO))}) ON CONFLICT DO NOTHING"
+)
+_SQLITE_EXISTE = (
+    "SELECT COUNT(*) FROM resultados2 WHERE " + " AND ".join(f"{c} = ?" for c in COLUNAS_RESULTADO)
+)
+
+def _sqlite_em_lote(conn, resultados):
+    linhas = [tuple(r.get(c) for c in COLUNAS_RESULTADO) for r in resultados]
+    antes = conn.total_changes
+    for inicio in range(0, len(linhas), DB_BATCH_SIZE_PADRAO):
+        conn.executemany(_SQLITE_INSERT, linhas[inicio:inicio + DB_BATCH_SIZE_PADRAO])
+    conn.commit()
+    return conn.total_changes - antes
+
+def _sqlite_linha_a_linha(conn, resultados):
+    inseridos = 0
+    for r in resultados:
+        linha = tuple(r.get(c) for c in COLUNAS_RESULTADO)
+        if conn.execute(_SQLITE_EXISTE, linha).fetchone()[0] == 0:
+            conn.execute(_SQLITE_INSERT, linha)
+            inseridos += 1
+    conn.commit()
+    return inseridos
+
+def _medir_sqlite(resultados, repeticoes, medir_anterior):
+    """Menores tempos de cada caso no SQLite, cada repetição partindo de um banco novo."""
+    casos = {"lote_on_conflict": [], "lote_on_conflict_repetidos": []}
+    if medir_anterior:
+        casos["linha_a_linha_anterior"] = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for repeticao in range(repeticoes):
+            for caso in casos:
+                conn = sqlite3.connect(os.path.join(diretorio, f"bench_{repeticao}_{caso}.db"))
+                conn.execute(_SQLITE_TABELA)
+                if caso != "linha_a_linha_anterior":
+                    # A tabela anterior não tinha o índice único; a duplicidade era verificada por SELECT
+                    conn.execute(_SQLITE_INDICE)
+                if caso == "lote_on_conflict_repetidos":
+                    _sqlite_em_lote(conn, resultados)
+                gravar = _sqlite_linha_a_linha if caso == "linha_a_linha_anterior" else _sqlite_em_lote
+                inicio = time.perf_counter()
+                gravar(conn, resultados)
+                casos[caso].append(time.perf_counter() - inicio)
+                conn.close()
+    return {caso: min(tempos) for caso, tempos in casos.items()}
+
+def _postgres_linha_a_linha(esquema, resultados):
+    """salva_resultados_em_db antes da gravação em lote: um SELECT e um INSERT por registro."""
+    from db_pg import conexao
+
+    condicoes = " AND ".join(f"{c} = %s" for c in COLUNAS_RESULTADO)
+    insert = (
+        f"INSERT INTO {esquema}.resultados2 ({', '.join(COLUNAS_RESULTADO)}) "
+        f"VALUES ({', '.join(['%s'] * len(COLUNAS_RESULTADO))})"
+    )
+    with conexao() as conn, conn.cursor() as cur:
+        for r in resultados:
+            linha = tuple(r.get(c) for c in COLUNAS_RESULTADO)
+            cur.execute(f"SELECT COUNT(*) FROM {esquema}.resultados2 WHERE {condicoes}", linha)
+            if cur.fetchone()[0] == 0:
+                cur.execute(insert, linha)
+        conn.commit()
+
+def _recriar_tabela_postgres(esquema, com_indice):
+    from db_pg import conexao, init_db
+
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {esquema}.resultados2")
+        conn.commit()
+    init_db()
+    if not com_indice:
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute(f"DROP INDEX {esquema}.resultados2_chave_natural")
+            conn.commit()
+
+def _medir_postgres(esquema, resultados, repeticoes, medir_anterior):
+    from db_pg import salva_resultados_em_db
+
+    casos = {"salva_resultados_em_db": [], "salva_resultados_em_db_repetidos": []}
+    if medir_anterior:
+        casos["linha_a_linha_anterior"] = []
+    for _ in range(repeticoes):
+        for caso in casos:
+            _recriar_tabela_postgres(esquema, com_indice=caso != "linha_a_linha_anterior")
+            if caso == "salva_resultados_em_db_repetidos":
+                salva_resultados_em_db(resultados)
+            if caso == "linha_a_linha_anterior":
+                gravar = lambda dados: _postgres_linha_a_linha(esquema, dados)
+            else:
+                gravar = salva_resultados_em_db
+            inicio = time.perf_counter()
+            gravar(resultados)
+            casos[caso].append(time.perf_counter() - inicio)
+    return {caso: min(tempos) for caso, tempos in casos.items()}
+
+def _criar_esquema_postgres(esquema):
+    """
+    Cria o schema do benchmark e aponta o pool de db_pg para ele. A configuração do banco é
+    lida uma única vez por processo (carregar_config), então é recarregada e o pool refeito
+    com o novo DB_SEARCH_PATH; as conexões são conferidas com current_schema() antes de
+    qualquer gravação, já que init_db e salva_resultados_em_db usam nomes sem schema.
+    """
+    if not re.fullmatch(r"[a-z_][a-z0-9_]*", esquema):
+        raise ValueError(f"Nome de schema inválido para o benchmark: {esquema!r}")
+    if esquema == "public":
+        raise ValueError("O benchmark de gravação não roda no schema public: ele apaga e recria resultados2.")
+    from db_pg import carregar_config, conexao, fechar_pool
+
+    os.environ["DB_SEARCH_PATH"] = esquema
+    carregar_config.cache_clear()
+    fechar_pool()
+    with conexao() as conn, conn.cursor() as cur:
+        # Falha se o schema já existir: um schema existente nunca é usado nem removido
+        cur.execute(f"CREATE SCHEMA {esquema}")
+        conn.commit()
+        cur.execute("SELECT current_schema()")
+        atual = cur.fetchone()[0]
+    if atual != esquema:
+        _remover_esquema_postgres(esquema)
+        raise RuntimeError(f"As conexões usam o schema {atual!r} em vez de {esquema!r}; benchmark cancelado.")
+
+def _remover_esquema_postgres(esquema):
+    from db_pg import conexao, fechar_pool
+
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA {esquema} CASCADE")
+        conn.commit()
+    fechar_pool()
+
+def executar(banco, tamanhos, repeticoes, max_linhas_anterior, esquema=None):
+    if banco == "postgres":
+        # Schema próprio desta execução, criado aqui e removido ao final: nada é gravado nas
+        # tabelas reais
+        esquema = esquema or f"bench_gravacao_{os.getpid()}"
+        _criar_esquema_postgres(esquema)
+    resultados = []
+    try:
+        for linhas in tamanhos:
+            dados = gerar_resultados(linhas)
+            if banco == "postgres":
+                tempos = _medir_postgres(esquema, dados, repeticoes, linhas <= max_linhas_anterior)
+            else:
+                tempos = _medir_sqlite(dados, repeticoes, linhas <= max_linhas_anterior)
+            resultados.extend(
+                resultado("gravacao", caso, linhas, segundos, banco=banco) for caso, segundos in tempos.items()
+            )
+    finally:
+        if banco == "postgres":
+            _remover_esquema_postgres(esquema)
+    return {"resultados": resultados}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da gravação de resultados2.")
+    parser.add_argument("--banco", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--max-linhas-anterior", type=int, default=10_000,
+                        help="maior tamanho em que a gravação linha a linha anterior é medida")
+    parser.add_argument("--esquema", help="schema novo usado e removido no modo postgres (padrão bench_gravacao_<pid>)")
+    args = parser.parse_args()
+    imprimir(executar(args.banco, args.linhas, args.repeticoes, args.max_linhas_anterior, args.esquema))
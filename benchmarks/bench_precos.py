@@ -0,0 +1,91 @@
+"""
+Compara a normalização de preços de precos.py (por valor e em lote) com o código que ela
+substituiu (tratar_preco dos scripts de automação e a regex de scrape_day), sobre uma coluna
+sintética de preços nos formatos vistos nos pipelines. Imprime o resultado em JSON.
+
+Uso:
+    python benchmarks/bench_precos.py [--linhas 100000] [--repeticoes 5] [--distintos 2000]
+"""
+import re
+import random
+import argparse
+
+from comum import cronometrar, resultado, imprimir
+
+import pandas as pd
+
+from precos import normalizar_preco, normalizar_precos
+
+FORMATOS = (
+    lambda v: f"R$ {v:,}".replace(",", "."),
+    lambda v: f"R${v:,}",
+    lambda v: f"US$ {v:,}.{random.randint(0, 99):02d}",
+    lambda v: f"{v} Reais brasileiros",
+    lambda v: f"R$ {v:,} – R$ {v + 300:,}".replace(",", "."),
+    lambda v: "unavailable",
+    lambda v: v,
+)
+
+def tratar_preco_anterior(preco_valor):
+    """tratar_preco de automation_playwright.py antes da unificação (sem os prints)."""
+    if preco_valor is None:
+        return None
+    if isinstance(preco_valor, (int, float)):
+        return preco_valor
+    preco_str = str(preco_valor)
+    if "unavailable" in preco_str.lower():
+        return None
+    preco_limpo = preco_str.replace("R$", "").strip()
+    preco_limpo = preco_limpo.replace(".", "").replace(",", ".")
+    try:
+        return int(preco_limpo)
+    except ValueError:
+        return None
+
+def regex_scrape_day_anterior(preco_valor):
+    """Conversão usada por scrape_day antes da unificação: mantém apenas os dígitos."""
+    digitos = re.sub(r"\D", "", str(preco_valor or ""))
+    return float(digitos) if digitos else None
+
+def gerar_precos(linhas, distintos=None, semente=42):
+    """
+    Gera `linhas` preços em formatos variados. Com `distintos`, os preços são sorteados de um
+    conjunto com esse número de textos diferentes, como em colunas reais, que repetem muito.
+    """
+    random.seed(semente)
+    if distintos:
+        base = [random.choice(FORMATOS)(random.randint(80, 25000)) for _ in range(distintos)]
+        return [random.choice(base) for _ in range(linhas)]
+    return [random.choice(FORMATOS)(random.randint(80, 25000)) for _ in range(linhas)]
+
+def executar(linhas, repeticoes, distintos=None):
+    precos = gerar_precos(linhas, distintos)
+    serie = pd.Series(precos, dtype=object)
+    casos = {
+        "tratar_preco_anterior": lambda: [tratar_preco_anterior(p) for p in precos],
+        "regex_scrape_day_anterior": lambda: [regex_scrape_day_anterior(p) for p in precos],
+        "normalizar_preco": lambda: [normalizar_preco(p) for p in precos],
+        "normalizar_precos": lambda: normalizar_precos(serie),
+    }
+    resultados = [
+        resultado("precos", nome, linhas, cronometrar(funcao, repeticoes), distintos=distintos)
+        for nome, funcao in casos.items()
+    ]
+
+    # Valores convertidos corretamente por cada abordagem, comparados à referência escalar
+    referencia = [normalizar_preco(p) for p in precos]
+    em_lote = normalizar_precos(serie).tolist()
+    divergencias = sum(
+        1 for a, b in zip(referencia, em_lote)
+        if not ((a is None and b != b) or a == b)
+    )
+    return {"resultados": resultados, "divergencias_lote_vs_escalar": divergencias}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da normalização de preços.")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--distintos", type=int,
+                        help="número de textos de preço distintos (padrão: praticamente todos distintos)")
+    args = parser.parse_args()
+    imprimir(executar(args.linhas, args.repeticoes, args.distintos))
@@ -0,0 +1,56 @@
+"""
+Compara dois JSON de benchmarks (de executar.py ou de um bench_*.py), caso a caso, e imprime
+o tempo de antes, o de depois e o ganho (antes / depois; acima de 1 é mais rápido). Casos
+presentes em apenas um dos arquivos aparecem com o outro tempo vazio.
+
+Uso:
+    python benchmarks/comparar.py antes.json depois.json [--json]
+"""
+import json
+import argparse
+
+from comum import imprimir
+
+# Campos que não identificam o caso medido
+_MEDIDAS = {"segundos", "linhas_por_segundo"}
+
+def _chave(registro):
+    return tuple(sorted((k, str(v)) for k, v in registro.items() if k not in _MEDIDAS))
+
+def carregar(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return {_chave(r): r for r in json.load(f)["resultados"]}
+
+def comparar(antes, depois):
+    comparacao = []
+    for chave in list(antes) + [c for c in depois if c not in antes]:
+        anterior = antes.get(chave, {}).get("segundos")
+        atual = depois.get(chave, {}).get("segundos")
+        comparacao.append({
+            **dict(chave),
+            "antes_s": anterior,
+            "depois_s": atual,
+            "ganho": round(anterior / atual, 2) if anterior and atual else None,
+        })
+    return comparacao
+
+def _descricao(linha):
+    identificacao = {k: v for k, v in linha.items() if k not in ("antes_s", "depois_s", "ganho")}
+    principal = f"{identificacao.pop('benchmark', '')}/{identificacao.pop('caso', '')}"
+    extras = " ".join(f"{k}={v}" for k, v in identificacao.items() if v not in ("None", ""))
+    return f"{principal} {extras}".strip()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument("antes")
+    parser.add_argument("depois")
+    parser.add_argument("--json", action="store_true", help="imprime a comparação em JSON")
+    args = parser.parse_args()
+    comparacao = comparar(carregar(args.antes), carregar(args.depois))
+    if args.json:
+        imprimir(comparacao)
+    else:
+        formatar = lambda s: "-" if s is None else f"{s:.6f}"
+        for linha in comparacao:
+            ganho = "-" if linha["ganho"] is None else f"{linha['ganho']:.2f}x"
+            print(f"{_descricao(linha):<70} {formatar(linha['antes_s']):>12} {formatar(linha['depois_s']):>12} {ganho:>8}")
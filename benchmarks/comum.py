@@ -0,0 +1,45 @@
+"""
+Funções compartilhadas pelos benchmarks: medição do menor tempo entre repetições e o formato
+comum dos resultados, para que as saídas de antes e depois de uma mudança sejam comparáveis
+(ver comparar.py).
+"""
+import os
+import sys
+import json
+import time
+import platform
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+def cronometrar(funcao, repeticoes):
+    """Menor tempo (s) entre `repeticoes` execuções."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def resultado(benchmark, caso, linhas, segundos, **extra):
+    """Registro de um caso medido, no formato comum a todos os benchmarks."""
+    return {
+        "benchmark": benchmark,
+        "caso": caso,
+        "linhas": linhas,
+        **extra,
+        "segundos": round(segundos, 6),
+        "linhas_por_segundo": round(linhas / segundos) if segundos else None,
+    }
+
+def ambiente():
+    """Identificação da máquina e das versões, gravada junto com os resultados."""
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+    }
+
+def imprimir(dados):
+    print(json.dumps(dados, indent=2, ensure_ascii=False))
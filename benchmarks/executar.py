@@ -0,0 +1,67 @@
+"""
+Executa todos os benchmarks (sem rede) e imprime um único JSON com os resultados, a máquina e
+o commit medido. Para registrar o antes e o depois de uma mudança de desempenho:
+
+    python benchmarks/executar.py --saida antes.json      # no commit anterior
+    python benchmarks/executar.py --saida depois.json     # com a mudança
+    python benchmarks/comparar.py antes.json depois.json
+
+Uso:
+    python benchmarks/executar.py [--rapido] [--banco sqlite|postgres] [--saida arquivo.json]
+"""
+import json
+import argparse
+import datetime
+import subprocess
+
+from comum import RAIZ, ambiente, imprimir
+
+import bench_precos
+import bench_aeroportos
+import bench_cartoes
+import bench_gravacao
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(rapido=False, banco="sqlite"):
+    linhas = 10_000 if rapido else 100_000
+    repeticoes = 1 if rapido else 3
+    etapas = {
+        "precos": lambda: bench_precos.executar(linhas, repeticoes, distintos=2000),
+        "aeroportos": lambda: bench_aeroportos.executar(linhas, repeticoes),
+        "cartoes": lambda: bench_cartoes.executar(5 if rapido else 20, 60),
+        "gravacao": lambda: bench_gravacao.executar(
+            banco, [1_000, 10_000] if rapido else [1_000, 10_000, 100_000], repeticoes, 10_000
+        ),
+    }
+    saida = {
+        "executado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "ambiente": ambiente(),
+        "resultados": [],
+        "detalhes": {},
+    }
+    for nome, etapa in etapas.items():
+        dados = etapa()
+        saida["resultados"].extend(dados.pop("resultados"))
+        if dados:
+            saida["detalhes"][nome] = dados
+    return saida
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa todos os benchmarks sem acesso à rede.")
+    parser.add_argument("--rapido", action="store_true", help="tamanhos menores e uma repetição por caso")
+    parser.add_argument("--banco", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--saida", help="grava o JSON também neste arquivo")
+    args = parser.parse_args()
+    dados = executar(args.rapido, args.banco)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+    imprimir(dados)
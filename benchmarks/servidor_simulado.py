@@ -0,0 +1,191 @@
+"""
+Servidor HTTP local que imita o Google Flights para testes de carga, sem acessar o Google.
+Responde em /travel/flights tanto às buscas do fast-flights (parâmetro tfs, HTML no layout
+lido por fast_flights.core.parse_response) quanto às páginas abertas pelo Playwright
+(parâmetro q, cartões no layout de extracao_cartoes.DEFINICOES_SELETORES), com latência,
+taxa de erros (500), de limitação (429) e de resultados vazios configuráveis. Os voos de
+cada busca são sintéticos e determinísticos (mesma URL, mesmos voos).
+
+Os scripts de automação usam o servidor com --url-base (ou GOOGLE_FLIGHTS_URL_BASE):
+    python benchmarks/servidor_simulado.py --porta 8800 --latencia-ms 300 --taxa-limitacao 0.02
+    python automation.py --sem-agenda --url-base http://127.0.0.1:8800
+
+GET /_estatisticas devolve, em JSON, quantas requisições tiveram cada desfecho.
+
+Uso:
+    python benchmarks/servidor_simulado.py [--porta 8800] [--latencia-ms 200] [--jitter-ms 100]
+        [--taxa-erro 0] [--taxa-limitacao 0] [--taxa-vazio 0] [--voos 10] [--semente 42]
+"""
+import json
+import time
+import random
+import zlib
+import argparse
+import threading
+from html import escape
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_cartoes import gerar_cartoes
+
+def _paradas_en(paradas):
+    if paradas == "Direto":
+        return "Nonstop"
+    quantidade = int(paradas.split(" ", 1)[0])
+    return f"{quantidade} stop{'s' if quantidade > 1 else ''}"
+
+def pagina_resultados(cartoes, idioma="pt-BR"):
+    """
+    Página de resultados cujos cartões atendem aos dois leitores: os seletores do
+    fast-flights (ul.Rk10dc li, span.mv1WYe, .YMlIz.FpEdX...) e os de extrair_cartoes
+    (li.pIav2d e os aria-label em português). Com idioma "en" (hl=en, usado pelo
+    fast-flights), paradas e preço seguem o formato em inglês.
+    """
+    itens = []
+    for c in cartoes:
+        if idioma == "en":
+            paradas = _paradas_en(c["paradas"])
+            preco = f"R${int(c['preco_rotulo'].split(' ', 1)[0]):,}"
+        else:
+            paradas = c["paradas"]
+            preco = c["preco"]
+        rotulo_paradas = "Voo direto." if c["paradas"] == "Direto" else f"{c['paradas']}."
+        itens.append(
+            '<li class="pIav2d">'
+            f'<div class="sSHqwe tPgKwe ogfYpf"><span>{escape(c["companhia"])}</span></div>'
+            '<span class="mv1WYe">'
+            f'<div><span aria-label="Horário de partida: {c["horario_partida"]}.">{c["horario_partida"]}</span></div>'
+            f'<div><span aria-label="Horário de chegada: {c["horario_chegada"]}.">{c["horario_chegada"]}</span></div>'
+            "</span>"
+            f'<div class="Ak5kof"><div aria-label="Duração total: {c["duracao"]}.">{c["duracao"]}</div></div>'
+            f'<div class="BbR8Ec"><div class="ogfYpf"><span aria-label="{rotulo_paradas}">{paradas}</span></div></div>'
+            f'<div class="YMlIz FpEdX"><span aria-label="{c["preco_rotulo"]}" role="text">{preco}</span></div>'
+            "</li>"
+        )
+    return (
+        f'<!DOCTYPE html><html lang="{idioma}"><head><meta charset="utf-8"><title>Google Flights</title></head>'
+        f'<body><div jsname="IWWDBc"><ul class="Rk10dc">{"".join(itens)}</ul></div></body></html>'
+    )
+
+class ServidorSimulado(ThreadingHTTPServer):
+    """
+    Servidor com uma thread por conexão (keep-alive) que sorteia, para cada busca, a latência
+    (normal com média latencia_ms e desvio jitter_ms) e o desfecho: erro, limitação, vazio
+    ou ok, nas taxas informadas (frações de 0 a 1).
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, endereco, latencia_ms=200, jitter_ms=100, taxa_erro=0.0, taxa_limitacao=0.0,
+                 taxa_vazio=0.0, voos=10, semente=None):
+        super().__init__(endereco, _Manipulador)
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxas = (("erro", taxa_erro), ("limitacao", taxa_limitacao), ("vazio", taxa_vazio))
+        self.voos = voos
+        self.contadores = {"ok": 0, "vazio": 0, "erro": 0, "limitacao": 0}
+        self._sorteio = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def sortear(self):
+        """Retorna (desfecho, segundos de espera) de uma busca e a contabiliza."""
+        with self._lock:
+            espera = max(0.0, self._sorteio.gauss(self.latencia_ms, self.jitter_ms)) / 1000
+            valor = self._sorteio.random()
+            desfecho = "ok"
+            acumulado = 0.0
+            for nome, taxa in self.taxas:
+                acumulado += taxa
+                if valor < acumulado:
+                    desfecho = nome
+                    break
+            self.contadores[desfecho] += 1
+        return desfecho, espera
+
+    def estatisticas(self):
+        with self._lock:
+            return {**self.contadores, "total": sum(self.contadores.values())}
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        # Uma linha por requisição atrapalharia a medição; os totais ficam em /_estatisticas
+        pass
+
+    def _responder(self, status, corpo, tipo="text/html; charset=utf-8", cabecalhos=()):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/_estatisticas":
+            self._responder(200, json.dumps(self.server.estatisticas()), "application/json")
+            return
+        if url.path != "/travel/flights":
+            self._responder(404, "Not Found", "text/plain")
+            return
+
+        desfecho, espera = self.server.sortear()
+        time.sleep(espera)
+        if desfecho == "limitacao":
+            self._responder(429, "Too Many Requests", "text/plain", [("Retry-After", "1")])
+            return
+        if desfecho == "erro":
+            self._responder(500, "Internal Server Error", "text/plain")
+            return
+
+        parametros = parse_qs(url.query)
+        idioma = parametros.get("hl", ["pt-BR"])[0]
+        # Mesma busca (tfs ou q), mesmos voos
+        semente = zlib.crc32((parametros.get("tfs") or parametros.get("q") or [""])[0].encode("utf-8"))
+        cartoes = [] if desfecho == "vazio" else gerar_cartoes(self.server.voos, semente)
+        self._responder(200, pagina_resultados(cartoes, idioma))
+
+def criar_servidor(porta=8800, host="127.0.0.1", **opcoes):
+    """Cria o servidor (porta 0 escolhe uma porta livre, lida em servidor.server_address)."""
+    return ServidorSimulado((host, porta), **opcoes)
+
+def argumentos_servidor(parser):
+    """Acrescenta ao parser as opções do servidor simulado (compartilhadas com simular_carga.py)."""
+    parser.add_argument("--latencia-ms", type=float, default=200, help="latência média de cada busca")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="desvio padrão da latência")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 500")
+    parser.add_argument("--taxa-limitacao", type=float, default=0.0, help="fração de respostas 429")
+    parser.add_argument("--taxa-vazio", type=float, default=0.0, help="fração de páginas sem voos")
+    parser.add_argument("--voos", type=int, default=10, help="voos por página de resultados")
+    parser.add_argument("--semente", type=int, default=42)
+    return parser
+
+def opcoes_servidor(args):
+    return {
+        "latencia_ms": args.latencia_ms,
+        "jitter_ms": args.jitter_ms,
+        "taxa_erro": args.taxa_erro,
+        "taxa_limitacao": args.taxa_limitacao,
+        "taxa_vazio": args.taxa_vazio,
+        "voos": args.voos,
+        "semente": args.semente,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que simula o Google Flights.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8800)
+    args = argumentos_servidor(parser).parse_args()
+    servidor = criar_servidor(args.porta, args.host, **opcoes_servidor(args))
+    host, porta = servidor.server_address[:2]
+    print(f"Servidor simulado em http://{host}:{porta} (use --url-base http://{host}:{porta})", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
@@ -0,0 +1,206 @@
+"""
+Teste de carga de ponta a ponta contra o servidor simulado (servidor_simulado.py), sem
+acessar o Google e sem gravar no banco. Executa uma varredura de N buscas distintas com o
+mesmo código dos scripts de automação e imprime, em JSON, vazão, latência por busca (p50,
+p90, p99 e máxima, do início da busca ao resultado: inclui a espera por uma vaga, as
+retentativas e o backoff), pico de memória (RSS) do processo, desfechos e o que o servidor
+respondeu.
+
+  - modo fast-flights: automation.buscar_voo, com o controle de concorrência AIMD
+    (FF_CONCORRENCIA_INICIAL, FF_CONCORRENCIA_MAX...) e o cache de buscas desativado;
+  - modo playwright: automation_playwright.processar_parametro sobre o pool de páginas
+    (PW_CONCORRENCIA, PW_USOS_POR_CONTEXTO).
+
+Por padrão o servidor é iniciado em um subprocesso, em uma porta livre, com as opções de
+latência e taxas abaixo; com --url-base, usa um servidor já em execução.
+
+Uso:
+    python benchmarks/simular_carga.py [--modo fast-flights|playwright] [--buscas 10000]
+        [--latencia-ms 200] [--jitter-ms 100] [--taxa-erro 0] [--taxa-limitacao 0] [--taxa-vazio 0]
+        [--url-base http://127.0.0.1:8800]
+"""
+import os
+import sys
+import json
+import math
+import time
+import socket
+import asyncio
+import argparse
+import datetime
+import itertools
+import subprocess
+import urllib.request
+
+from comum import RAIZ, ambiente, imprimir
+from servidor_simulado import argumentos_servidor
+
+# Cada busca deve chegar ao servidor: o cache persistente devolveria buscas repetidas entre execuções
+os.environ["CACHE_VOOS_DESATIVADO"] = "1"
+
+from airports import indice_aeroportos
+from planejador import agrupar_por_trecho
+from registro import configurar_logging
+
+def gerar_buscas(quantidade, inicio=None):
+    """
+    `quantidade` buscas distintas: todos os pares de aeroportos cadastrados, repetidos em
+    datas sucessivas a partir de amanhã até completar o total, agrupadas por trecho.
+    """
+    inicio = inicio or datetime.date.today() + datetime.timedelta(days=1)
+    pares = list(itertools.permutations(indice_aeroportos().codigos, 2))
+    buscas = [
+        {"origem": origem, "destino": destino, "data": (inicio + datetime.timedelta(days=i // len(pares))).isoformat()}
+        for i, (origem, destino) in zip(range(quantidade), itertools.cycle(pares))
+    ]
+    return agrupar_por_trecho(buscas)
+
+def percentil(valores_ordenados, q):
+    """Percentil q (0 a 1) pelo método do posto mais próximo."""
+    if not valores_ordenados:
+        return None
+    return valores_ordenados[max(0, math.ceil(q * len(valores_ordenados)) - 1)]
+
+def pico_rss_mb():
+    """Pico de memória residente deste processo, em MB (None onde resource não existe)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def iniciar_servidor(args):
+    """Inicia o servidor simulado em um subprocesso e espera ele aceitar conexões."""
+    porta = _porta_livre()
+    comando = [
+        sys.executable, os.path.join(RAIZ, "benchmarks", "servidor_simulado.py"), "--porta", str(porta),
+        "--latencia-ms", str(args.latencia_ms), "--jitter-ms", str(args.jitter_ms),
+        "--taxa-erro", str(args.taxa_erro), "--taxa-limitacao", str(args.taxa_limitacao),
+        "--taxa-vazio", str(args.taxa_vazio), "--voos", str(args.voos), "--semente", str(args.semente),
+    ]
+    processo = subprocess.Popen(comando, stdout=subprocess.DEVNULL)
+    url_base = f"http://127.0.0.1:{porta}"
+    for _ in range(100):
+        try:
+            estatisticas_servidor(url_base)
+            return processo, url_base
+        except OSError:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError("O servidor simulado não respondeu.")
+
+def estatisticas_servidor(url_base):
+    with urllib.request.urlopen(f"{url_base}/_estatisticas", timeout=5) as resposta:
+        return json.load(resposta)
+
+async def _varrer_fast_flights(buscas, registrar):
+    from automation import buscar_voo
+    from controle_concorrencia import ControladorAIMD
+    from pesquisa_voos import fechar_cliente_http
+
+    controlador = ControladorAIMD()
+
+    async def buscar(param):
+        inicio = time.perf_counter()
+        try:
+            resultado = await buscar_voo(param["origem"], param["destino"], param["data"], controlador)
+            registrar("ok" if resultado else "vazio", time.perf_counter() - inicio)
+        except Exception:
+            registrar("erro", time.perf_counter() - inicio)
+
+    try:
+        await asyncio.gather(*(buscar(param) for param in buscas))
+    finally:
+        await fechar_cliente_http()
+    return {"concorrencia": controlador.resumo()}
+
+async def _varrer_playwright(buscas, registrar):
+    from playwright.async_api import async_playwright
+    from automation_playwright import processar_parametro
+    from pool_paginas import PoolPaginas, processar_fila
+
+    async def buscar(param, pool):
+        inicio = time.perf_counter()
+        try:
+            resultado = await processar_parametro(param, pool)
+            registrar("ok" if resultado else "vazio", time.perf_counter() - inicio)
+        except Exception:
+            registrar("erro", time.perf_counter() - inicio)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        async with PoolPaginas(browser) as pool:
+            await processar_fila(buscas, lambda param: buscar(param, pool), pool.tamanho)
+            detalhes = {"pool": {"tamanho": pool.tamanho, "emprestimos": pool.emprestimos,
+                                 "contextos_criados": pool.contextos_criados}}
+        await browser.close()
+    return detalhes
+
+def executar(modo, quantidade, url_base):
+    os.environ["GOOGLE_FLIGHTS_URL_BASE"] = url_base
+    buscas = gerar_buscas(quantidade)
+    latencias = []
+    desfechos = {"ok": 0, "vazio": 0, "erro": 0}
+
+    def registrar(desfecho, segundos):
+        desfechos[desfecho] += 1
+        latencias.append(segundos)
+
+    varrer = _varrer_playwright if modo == "playwright" else _varrer_fast_flights
+    inicio = time.perf_counter()
+    detalhes = asyncio.run(varrer(buscas, registrar))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "modo": modo,
+        "buscas": len(buscas),
+        "desfechos": desfechos,
+        "duracao_s": round(duracao, 3),
+        "buscas_por_segundo": round(len(buscas) / duracao, 2) if duracao else None,
+        "latencia_s": {
+            "p50": percentil(latencias, 0.50),
+            "p90": percentil(latencias, 0.90),
+            "p99": percentil(latencias, 0.99),
+            "max": latencias[-1] if latencias else None,
+        },
+        "pico_rss_mb": pico_rss_mb(),
+        **detalhes,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga contra o servidor simulado do Google Flights.")
+    parser.add_argument("--modo", choices=("fast-flights", "playwright"), default="fast-flights")
+    parser.add_argument("--buscas", type=int, default=10_000)
+    parser.add_argument("--url-base", help="usa um servidor simulado já em execução neste endereço")
+    args = argumentos_servidor(parser).parse_args()
+    # Falhas isoladas são esperadas na simulação; só os avisos e o resumo final interessam
+    configurar_logging(nivel=os.getenv("LOG_NIVEL", "ERROR"))
+
+    processo = None
+    url_base = args.url_base
+    if url_base is None:
+        processo, url_base = iniciar_servidor(args)
+    try:
+        relatorio = executar(args.modo, args.buscas, url_base)
+        relatorio["servidor"] = {
+            "url_base": url_base,
+            "respostas": estatisticas_servidor(url_base),
+            **({} if args.url_base else {
+                "latencia_ms": args.latencia_ms, "jitter_ms": args.jitter_ms, "taxa_erro": args.taxa_erro,
+                "taxa_limitacao": args.taxa_limitacao, "taxa_vazio": args.taxa_vazio,
+            }),
+        }
+        relatorio["ambiente"] = ambiente()
+        imprimir(relatorio)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
@@ -0,0 +1,122 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from functools import lru_cache
+
+def chave_filtro(date, origem, destino, seat="economy", passageiros=(1, 0, 0, 0), max_stops=2):
+    """
+    Monta a chave normalizada de uma busca: data, origem, destino (códigos em maiúsculas),
+    classe, passageiros (adultos, crianças, bebês no assento, bebês no colo) e máximo de paradas.
+    """
+    return "|".join([
+        str(date).strip(),
+        origem.strip().upper(),
+        destino.strip().upper(),
+        seat.strip().lower(),
+        ",".join(str(int(n)) for n in passageiros),
+        str(max_stops),
+    ])
+
+class CacheResultados:
+    """
+    Cache persistente (SQLite) de resultados de busca, com validade (TTL), limite de entradas
+    com remoção das menos usadas recentemente (LRU) e contadores de acertos/falhas.
+
+    Os valores são serializados com pickle. O mesmo arquivo pode ser compartilhado por vários
+    processos (modo WAL); dentro do processo, o acesso é protegido por um lock.
+    """
+
+    def __init__(self, caminho="cache_voos.db", ttl=1800, max_entradas=5000):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                chave TEXT PRIMARY KEY,
+                valor BLOB NOT NULL,
+                criado_em REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_ultimo_acesso ON cache (ultimo_acesso)")
+        self._conn.commit()
+
+    def obter(self, chave):
+        """Retorna o valor em cache para a chave, ou None se não houver ou tiver expirado."""
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT valor, criado_em FROM cache WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None or agora - linha[1] > self.ttl:
+                if linha is not None:
+                    self._conn.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+                    self._conn.commit()
+                self.falhas += 1
+                return None
+            self._conn.execute("UPDATE cache SET ultimo_acesso = ? WHERE chave = ?", (agora, chave))
+            self._conn.commit()
+            self.acertos += 1
+        return pickle.loads(linha[0])
+
+    def gravar(self, chave, valor):
+        """Grava o valor para a chave e aplica os limites de validade e de tamanho."""
+        agora = time.time()
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, criado_em, ultimo_acesso) VALUES (?, ?, ?, ?)",
+                (chave, dados, agora, agora),
+            )
+            removidas = self._conn.execute(
+                "DELETE FROM cache WHERE criado_em < ?", (agora - self.ttl,)
+            ).rowcount
+            excesso = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entradas
+            if excesso > 0:
+                removidas += self._conn.execute(
+                    "DELETE FROM cache WHERE chave IN (SELECT chave FROM cache ORDER BY ultimo_acesso LIMIT ?)",
+                    (excesso,),
+                ).rowcount
+            self._conn.commit()
+            self.remocoes += removidas
+
+    def limpar(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def estatisticas(self):
+        """Retorna os contadores do processo: acertos, falhas, remoções e taxa de acerto."""
+        total = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "remocoes": self.remocoes,
+            "taxa_acerto": round(self.acertos / total, 3) if total else 0.0,
+        }
+
+def cache_habilitado():
+    """O cache pode ser desligado para todo o processo com CACHE_VOOS_DESATIVADO=1."""
+    return os.getenv("CACHE_VOOS_DESATIVADO", "").lower() not in ("1", "true", "sim")
+
+@lru_cache(maxsize=None)
+def cache_padrao():
+    """
+    Retorna o cache compartilhado pelo processo, configurado pelas variáveis de ambiente
+    CACHE_VOOS_CAMINHO (padrão cache_voos.db), CACHE_VOOS_TTL (segundos, padrão 1800) e
+    CACHE_VOOS_MAX_ENTRADAS (padrão 5000).
+    """
+    return CacheResultados(
+        caminho=os.getenv("CACHE_VOOS_CAMINHO", "cache_voos.db"),
+        ttl=float(os.getenv("CACHE_VOOS_TTL", "1800")),
+        max_entradas=int(os.getenv("CACHE_VOOS_MAX_ENTRADAS", "5000")),
+    )
@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Layouts versionados da resposta GetShoppingResults do Google Flights. Cada caminho é a
+# sequência de índices até o campo, a partir de um item de oferta (ou do payload, para as
+# listas de ofertas). Quando o formato mudar, acrescente uma nova versão e selecione-a com
+# PW_LAYOUT_RESPOSTA.
+LAYOUTS_RESPOSTA = {
+    "2025-05": {
+        # .../data/travel.frontend.flights.FlightsFrontendService/GetShoppingResults?...
+        "url": r"FlightsFrontendService/GetShoppingResults",
+        # Listas de ofertas: "melhores voos" e "outros voos"
+        "listas_ofertas": [(2, 0), (3, 0)],
+        "companhias": (0, 1),
+        "trechos": (0, 2),
+        "horario_partida": (0, 5),
+        "horario_chegada": (0, 8),
+        "duracao_minutos": (0, 9),
+        "preco": (1, 0, 1),
+    },
+}
+LAYOUT_PADRAO = "2025-05"
+
+MODOS_CAPTURA = ("dom", "resposta")
+
+def modo_captura(modo=None):
+    """
+    Resolve o modo de coleta de scrape_day: "dom" (padrão, lê os cartões renderizados) ou
+    "resposta" (lê as ofertas das respostas de dados da própria página). O argumento
+    explícito tem precedência sobre a variável de ambiente PW_MODO_CAPTURA.
+    """
+    modo = (modo or os.getenv("PW_MODO_CAPTURA", "dom")).lower()
+    if modo not in MODOS_CAPTURA:
+        raise ValueError(f"Modo de captura desconhecido: {modo}. Use um de: {', '.join(MODOS_CAPTURA)}")
+    return modo
+
+def layout_resposta(versao=None):
+    """Retorna o layout da versão pedida (ou de PW_LAYOUT_RESPOSTA)."""
+    versao = versao or os.getenv("PW_LAYOUT_RESPOSTA", LAYOUT_PADRAO)
+    try:
+        return LAYOUTS_RESPOSTA[versao]
+    except KeyError:
+        raise ValueError(
+            f"Layout de resposta desconhecido: {versao}. Disponíveis: {', '.join(LAYOUTS_RESPOSTA)}"
+        )
+
+def _caminho(obj, indices):
+    """Segue a sequência de índices em listas aninhadas; retorna None se algum nível faltar."""
+    for indice in indices:
+        if not isinstance(obj, list) or indice >= len(obj):
+            return None
+        obj = obj[indice]
+    return obj
+
+def _horario(valor):
+    """Converte [hora, minuto] (o minuto é omitido quando zero) em "HH:MM"."""
+    if not isinstance(valor, list) or not valor or valor[0] is None:
+        return None
+    minuto = valor[1] if len(valor) > 1 and valor[1] is not None else 0
+    return f"{valor[0]:02d}:{minuto:02d}"
+
+def _payloads(texto):
+    """
+    Extrai os payloads JSON de uma resposta no formato de streaming do Google: prefixo
+    anti-XSSI ")]}'", seguido de blocos precedidos pelo tamanho, cada um com entradas
+    ["wrb.fr", null, "<payload JSON em string>"].
+    """
+    if texto.startswith(")]}'"):
+        texto = texto[4:]
+    for linha in texto.splitlines():
+        linha = linha.strip()
+        if not linha.startswith("["):
+            continue
+        try:
+            blocos = json.loads(linha)
+        except ValueError:
+            continue
+        for bloco in blocos:
+            if isinstance(bloco, list) and len(bloco) > 2 and bloco[0] == "wrb.fr" and isinstance(bloco[2], str):
+                try:
+                    yield json.loads(bloco[2])
+                except ValueError:
+                    continue
+
+def parse_resposta(texto, layout=None):
+    """
+    Converte o corpo de uma resposta GetShoppingResults em uma lista de ofertas com as
+    chaves horario_partida, horario_chegada, companhia, preco (número), paradas e duracao
+    (minutos). Itens sem preço ou fora do layout são ignorados.
+    """
+    layout = layout or layout_resposta()
+    ofertas = []
+    for payload in _payloads(texto):
+        for caminho_lista in layout["listas_ofertas"]:
+            itens = _caminho(payload, caminho_lista)
+            if not isinstance(itens, list):
+                continue
+            for item in itens:
+                preco = _caminho(item, layout["preco"])
+                if not isinstance(preco, (int, float)):
+                    continue
+                companhias = _caminho(item, layout["companhias"])
+                trechos = _caminho(item, layout["trechos"])
+                ofertas.append({
+                    "horario_partida": _horario(_caminho(item, layout["horario_partida"])),
+                    "horario_chegada": _horario(_caminho(item, layout["horario_chegada"])),
+                    "companhia": ", ".join(companhias) if isinstance(companhias, list) else None,
+                    "preco": preco,
+                    "paradas": len(trechos) - 1 if isinstance(trechos, list) and trechos else None,
+                    "duracao": _caminho(item, layout["duracao_minutos"]),
+                })
+    return ofertas
+
+async def capturar_ofertas(page, url, timeouts, cronometro, layout=None):
+    """
+    Navega até `url` ouvindo as respostas de dados da página e retorna todas as ofertas
+    encontradas (sem duplicatas), sem depender da renderização dos cartões. O Google envia
+    os resultados em vários lotes (respostas GetShoppingResults sucessivas), então, depois
+    da primeira, a captura continua até passar timeouts["silencio"] ms sem uma nova resposta,
+    tudo dentro de timeouts["resultados"] ms. Retorna lista vazia se nenhuma resposta vier.
+    """
+    layout = layout or layout_resposta()
+    padrao_url = re.compile(layout["url"])
+    loop = asyncio.get_running_loop()
+    corpos = []
+    leituras = set()
+    nova_resposta = asyncio.Event()
+
+    async def ler(response):
+        try:
+            corpos.append(await response.text())
+        except Exception as e:
+            logger.debug("Não foi possível ler a resposta de dados: %s", e)
+            return
+        nova_resposta.set()
+
+    def ao_responder(response):
+        if not padrao_url.search(response.url):
+            return
+        tarefa = asyncio.ensure_future(ler(response))
+        leituras.add(tarefa)
+        tarefa.add_done_callback(leituras.discard)
+
+    page.on("response", ao_responder)
+    try:
+        with cronometro.etapa("navegacao"):
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeouts["navegacao"])
+        with cronometro.etapa("resultados"):
+            prazo = loop.time() + timeouts["resultados"] / 1000
+            espera = prazo - loop.time()
+            while espera > 0:
+                try:
+                    await asyncio.wait_for(nova_resposta.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    break
+                nova_resposta.clear()
+                espera = min(timeouts["silencio"] / 1000, prazo - loop.time())
+    finally:
+        page.remove_listener("response", ao_responder)
+        # Respostas que chegaram antes de parar de ouvir ainda podem estar sendo lidas
+        if leituras:
+            await asyncio.gather(*leituras, return_exceptions=True)
+
+    with cronometro.etapa("extracao"):
+        ofertas = []
+        vistas = set()
+        for corpo in corpos:
+            for oferta in parse_resposta(corpo, layout):
+                chave = tuple(oferta.values())
+                if chave not in vistas:
+                    vistas.add(chave)
+                    ofertas.append(oferta)
+    if len(corpos) > 1:
+        logger.debug("%d lotes de resultados recebidos.", len(corpos))
+    return ofertas
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+class _Chamada:
+    """Uma execução em andamento, compartilhada pelos chamadores da mesma chave."""
+    __slots__ = ("concluida", "resultado", "erro")
+
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+class SingleFlight:
+    """
+    Coalescência de chamadas concorrentes ("singleflight"): enquanto uma chamada para uma
+    chave estiver em andamento, outros chamadores da mesma chave esperam por ela e recebem o
+    mesmo resultado (ou a mesma exceção), em vez de disparar uma nova execução. Assim que a
+    chamada termina, a chave é liberada e a próxima chamada executa de novo.
+
+    Seguro para uso entre threads (ex.: ThreadPoolExecutor e sessões do Streamlit).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    def executar(self, chave, funcao, *args, **kwargs):
+        with self._lock:
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._em_andamento[chave] = chamada
+                self.execucoes += 1
+            else:
+                self.coalescidas += 1
+
+        if lider:
+            try:
+                chamada.resultado = funcao(*args, **kwargs)
+            except BaseException as e:
+                chamada.erro = e
+            finally:
+                with self._lock:
+                    del self._em_andamento[chave]
+                chamada.concluida.set()
+        else:
+            chamada.concluida.wait()
+
+        if chamada.erro is not None:
+            raise chamada.erro
+        return chamada.resultado
+
+    def estatisticas(self):
+        """Retorna quantas execuções foram feitas e quantas chamadas pegaram carona nelas."""
+        with self._lock:
+            em_andamento = len(self._em_andamento)
+        return {
+            "execucoes": self.execucoes,
+            "coalescidas": self.coalescidas,
+            "em_andamento": em_andamento,
+        }
+
+class SingleFlightAsync:
+    """
+    Versão de SingleFlight para corrotinas em um mesmo event loop: enquanto a busca de uma
+    chave estiver em andamento, as outras tarefas da mesma chave aguardam o mesmo resultado.
+    """
+
+    def __init__(self):
+        self._em_andamento = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    async def executar(self, chave, corrotina, *args, **kwargs):
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            self.execucoes += 1
+            tarefa = asyncio.ensure_future(corrotina(*args, **kwargs))
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        else:
+            self.coalescidas += 1
+        # shield: o cancelamento de uma das tarefas em espera não cancela a busca compartilhada
+        return await asyncio.shield(tarefa)
+
+    def estatisticas(self):
+        return {
+            "execucoes": self.execucoes,
+            "coalescidas": self.coalescidas,
+            "em_andamento": len(self._em_andamento),
+        }
@@ -0,0 +1,194 @@
+import os
+import time
+import asyncio
+import random
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager, asynccontextmanager
+
+def classificar_erro(erro):
+    """
+    Classifica uma exceção da busca em "vazio" (o fast-flights levanta RuntimeError
+    "No flights found" quando a página não tem voos, um desfecho legítimo e não uma falha),
+    "limitacao" (HTTP 429 / limite de requisições), "timeout" ou "erro", para orientar o
+    controle de concorrência.
+    """
+    texto = str(erro).lower()
+    if "no flights found" in texto:
+        return "vazio"
+    if "429" in texto or "too many requests" in texto or "rate limit" in texto:
+        return "limitacao"
+    if (isinstance(erro, TimeoutError) or "timeout" in type(erro).__name__.lower()
+            or "timed out" in texto or "timeout" in texto):
+        return "timeout"
+    return "erro"
+
+def espera_backoff(tentativa, base=None, teto=None):
+    """
+    Tempo de espera (s) antes da próxima tentativa: backoff exponencial com jitter completo,
+    sorteado entre 0 e min(teto, base * 2^tentativa). Os padrões vêm de FF_BACKOFF_BASE (1 s)
+    e FF_BACKOFF_MAX (30 s).
+    """
+    base = base if base is not None else float(os.getenv("FF_BACKOFF_BASE", "1"))
+    teto = teto if teto is not None else float(os.getenv("FF_BACKOFF_MAX", "30"))
+    return random.uniform(0, min(teto, base * 2 ** tentativa))
+
+class ControladorAIMD:
+    """
+    Controle de concorrência AIMD (aumento aditivo, redução multiplicativa), no estilo do
+    controle de congestionamento do TCP:
+      - cada sucesso com latência até `latencia_alvo` soma `incremento / limite` ao limite,
+        ou seja, cerca de +1 vaga a cada "janela" completa de requisições saudáveis;
+      - sucessos lentos mantêm o limite;
+      - limitação (429), timeouts e erros multiplicam o limite por `fator_reducao`, no
+        máximo uma vez a cada `intervalo_reducao` segundos (uma rajada de falhas conta uma vez).
+
+    O limite fica entre `minimo` e `maximo`. Os padrões vêm das variáveis de ambiente
+    FF_CONCORRENCIA_INICIAL (2), FF_CONCORRENCIA_MAX (16) e FF_LATENCIA_ALVO (8 s).
+
+    Uso com threads:
+        with controlador.vaga():
+            ...
+
+    Uso em um event loop (todas as tarefas no mesmo loop):
+        async with controlador.vaga_async():
+            ...
+    """
+
+    def __init__(self, inicial=None, minimo=1, maximo=None, incremento=1.0, fator_reducao=0.5,
+                 latencia_alvo=None, intervalo_reducao=2.0):
+        self.minimo = minimo
+        self.maximo = maximo or int(os.getenv("FF_CONCORRENCIA_MAX", "16"))
+        inicial = inicial or int(os.getenv("FF_CONCORRENCIA_INICIAL", "2"))
+        self.limite = float(max(self.minimo, min(self.maximo, inicial)))
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.latencia_alvo = latencia_alvo or float(os.getenv("FF_LATENCIA_ALVO", "8"))
+        self.intervalo_reducao = intervalo_reducao
+        self.em_uso = 0
+        self.sucessos = 0
+        self.falhas = Counter()
+        self.retentativas = 0
+        self.aumentos = 0
+        self.reducoes = 0
+        self.limite_maximo_atingido = self.limite
+        self._ultima_reducao = 0.0
+        self._latencia_total = 0.0
+        self._inicio = time.monotonic()
+        self._ultima_mudanca = self._inicio
+        self._limite_x_tempo = 0.0
+        self._condicao = threading.Condition()
+        # Tarefas assíncronas à espera de vaga, em ordem de chegada
+        self._esperas_async = deque()
+
+    def _acumular_tempo(self, agora):
+        # Integra o limite no tempo para calcular o limite médio da execução
+        self._limite_x_tempo += int(self.limite) * (agora - self._ultima_mudanca)
+        self._ultima_mudanca = agora
+
+    def _notificar(self):
+        # Acorda as threads que esperam por vaga e entrega as vagas livres às primeiras tarefas
+        # assíncronas da fila, já reservadas: cada vaga acorda uma única tarefa
+        self._condicao.notify_all()
+        while self._esperas_async and self.pode_iniciar():
+            futuro = self._esperas_async.popleft()
+            if not futuro.done():
+                self.em_uso += 1
+                futuro.set_result(None)
+
+    def pode_iniciar(self):
+        """Indica se há vaga livre dentro do limite atual."""
+        return self.em_uso < int(self.limite)
+
+    def registrar_sucesso(self, latencia):
+        with self._condicao:
+            self.sucessos += 1
+            self._latencia_total += latencia
+            if latencia <= self.latencia_alvo and self.limite < self.maximo:
+                self._acumular_tempo(time.monotonic())
+                anterior = int(self.limite)
+                self.limite = min(self.maximo, self.limite + self.incremento / self.limite)
+                if int(self.limite) > anterior:
+                    self.aumentos += 1
+                    self.limite_maximo_atingido = max(self.limite_maximo_atingido, self.limite)
+                    self._notificar()
+
+    def registrar_falha(self, tipo):
+        with self._condicao:
+            self.falhas[tipo] += 1
+            agora = time.monotonic()
+            if agora - self._ultima_reducao >= self.intervalo_reducao:
+                self._acumular_tempo(agora)
+                self.limite = max(float(self.minimo), self.limite * self.fator_reducao)
+                self._ultima_reducao = agora
+                self.reducoes += 1
+
+    def registrar_retentativa(self):
+        with self._condicao:
+            self.retentativas += 1
+
+    def adquirir(self):
+        with self._condicao:
+            while not self.pode_iniciar():
+                self._condicao.wait()
+            self.em_uso += 1
+
+    def liberar(self):
+        with self._condicao:
+            self.em_uso -= 1
+            self._notificar()
+
+    @contextmanager
+    def vaga(self):
+        """Espera uma vaga dentro do limite atual e a libera ao final do bloco."""
+        self.adquirir()
+        try:
+            yield
+        finally:
+            self.liberar()
+
+    @asynccontextmanager
+    async def vaga_async(self):
+        """Como vaga(), mas aguarda a vaga sem bloquear o event loop."""
+        futuro = None
+        with self._condicao:
+            if not self._esperas_async and self.pode_iniciar():
+                self.em_uso += 1
+            else:
+                futuro = asyncio.get_running_loop().create_future()
+                self._esperas_async.append(futuro)
+        if futuro is not None:
+            try:
+                await futuro
+            except asyncio.CancelledError:
+                with self._condicao:
+                    if not futuro.cancelled():
+                        # A vaga já tinha sido reservada para esta tarefa: passa para a próxima
+                        self.em_uso -= 1
+                        self._notificar()
+                    elif futuro in self._esperas_async:
+                        self._esperas_async.remove(futuro)
+                raise
+        try:
+            yield
+        finally:
+            self.liberar()
+
+    def resumo(self):
+        """Resumo da execução: limite em que a concorrência se estabilizou, ajustes e falhas."""
+        with self._condicao:
+            agora = time.monotonic()
+            self._acumular_tempo(agora)
+            duracao = agora - self._inicio
+            return {
+                "limite_final": int(self.limite),
+                "limite_medio": round(self._limite_x_tempo / duracao, 2) if duracao else int(self.limite),
+                "limite_maximo": int(self.limite_maximo_atingido),
+                "aumentos": self.aumentos,
+                "reducoes": self.reducoes,
+                "sucessos": self.sucessos,
+                "falhas": dict(self.falhas),
+                "retentativas": self.retentativas,
+                "latencia_media_s": round(self._latencia_total / self.sucessos, 2) if self.sucessos else None,
+                "duracao_s": round(duracao, 1),
+            }
@@ -79,36 +79,57 @@ def salva_historico_em_db(historico):
     conn.commit()
     conn.close()
 
-def export_db_to_csv(csv_filename):
+def export_db_to_csv(csv_filename, tamanho_lote=1000):
     """
     Exporta todos os registros da tabela 'resultados' para um arquivo CSV.
     O csv_filename é o nome do arquivo CSV de destino.
+    As linhas são lidas e gravadas em lotes de tamanho_lote, sem carregar a tabela em memória.
     Retorna o nome do arquivo CSV criado.
     """
     conn = sqlite3.connect('resultados.db')
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM resultados")
-    rows = cur.fetchall()
-    headers = [description[0] for description in cur.description]
-    conn.close()
-    
-    with open(csv_filename, mode='w', newline='', encoding='utf-8') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        csv_writer.writerow(headers)
-        csv_writer.writerows(rows)
-        
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM resultados")
+        headers = [description[0] for description in cur.description]
+        with open(csv_filename, mode='w', newline='', encoding='utf-8') as csvfile:
+            csv_writer = csv.writer(csvfile)
+            csv_writer.writerow(headers)
+            while True:
+                rows = cur.fetchmany(tamanho_lote)
+                if not rows:
+                    break
+                csv_writer.writerows(rows)
+    finally:
+        conn.close()
+
     return csv_filename
 
-def busca_resultados():
-    """Retorna todos os registros da tabela 'resultados' como uma lista de dicionários."""
+def iter_lotes_resultados(tamanho_lote=1000):
+    """Gera os registros da tabela 'resultados' em lotes (listas de dicionários)."""
     conn = sqlite3.connect('resultados.db')
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM resultados")
-    rows = cur.fetchall()
-    headers = [description[0] for description in cur.description]
-    conn.close()
-    results = [dict(zip(headers, row)) for row in rows]
-    return results
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM resultados")
+        headers = [description[0] for description in cur.description]
+        while True:
+            rows = cur.fetchmany(tamanho_lote)
+            if not rows:
+                break
+            yield [dict(zip(headers, row)) for row in rows]
+    finally:
+        conn.close()
+
+def iter_resultados(tamanho_lote=1000):
+    """Gera os registros da tabela 'resultados' um a um, como dicionários."""
+    for lote in iter_lotes_resultados(tamanho_lote):
+        yield from lote
+
+def busca_resultados():
+    """
+    Retorna todos os registros da tabela 'resultados' como uma lista de dicionários.
+    Para tabelas grandes, prefira iter_resultados() ou iter_lotes_resultados().
+    """
+    return list(iter_resultados())
 
 def busca_historico():
     """Retorna todos os registros da tabela 'historico' como uma lista de dicionários."""
@@ -1,172 +1,542 @@
 import os
+import time
+import datetime
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
 import psycopg2
-import csv
+from psycopg2 import pool
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
-def get_connection():
+from metricas import metricas
+from fuso_horario import FUSO_BUSCA
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def carregar_config():
     """
-    Obtém a conexão com o banco de dados PostgreSQL usando a variável de ambiente DATABASE_URL.
+    Carrega uma única vez por processo as variáveis de ambiente do banco e do pool de conexões.
+    Fora do GitHub Actions, as variáveis são lidas do arquivo .env.
+
+    Variáveis do pool (opcionais):
+      - DB_POOL_MIN: conexões mantidas abertas (padrão 1).
+      - DB_POOL_MAX: limite de conexões simultâneas (padrão 5).
+      - DB_POOL_TIMEOUT: segundos de espera por uma conexão livre (padrão 30).
+      - DB_CONNECT_TIMEOUT: segundos para estabelecer uma conexão (padrão 10).
+      - DB_STATEMENT_TIMEOUT_MS: tempo máximo de cada comando SQL (padrão 0, sem limite).
+      - DB_POOL_PING_INTERVAL: segundos ociosos após os quais a conexão é testada
+        com SELECT 1 antes de ser entregue (padrão 30).
+
+    Variáveis da conexão (opcionais):
+      - DB_SSLMODE: sslmode do libpq (padrão require; disable para um Postgres local sem SSL).
+      - DB_SEARCH_PATH: search_path das sessões, para isolar tabelas em outro schema
+        (usado pelos benchmarks de gravação).
     """
     # Se não estiver no GitHub Actions, tente carregar as variáveis do .env
     if os.getenv("GITHUB_ACTIONS") != "true":
-        from dotenv import load_dotenv
         load_dotenv()
-    USER = os.getenv("USER")
-    PASSWORD = os.getenv("PASSWORD")
-    HOST = os.getenv("HOST")
-    PORT = os.getenv("PORT")
-    DBNAME = os.getenv("DBNAME")
-    # Para debug, podemos imprimir (ou registrar) se as variáveis estão sendo capturadas (não imprima senhas em produção!)
-    print("Tentando conectar com:")
-    print("USER:", USER)
-    print("HOST:", HOST)
-    print("PORT:", PORT)
-    print("DBNAME:", DBNAME)
-    
+    return {
+        "user": os.getenv("USER"),
+        "password": os.getenv("PASSWORD"),
+        "host": os.getenv("HOST"),
+        "port": os.getenv("PORT"),
+        "dbname": os.getenv("DBNAME"),
+        "pool_min": int(os.getenv("DB_POOL_MIN", "1")),
+        "pool_max": int(os.getenv("DB_POOL_MAX", "5")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10")),
+        "statement_timeout_ms": int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),
+        "ping_interval": float(os.getenv("DB_POOL_PING_INTERVAL", "30")),
+        "sslmode": os.getenv("DB_SSLMODE", "require"),
+        "search_path": os.getenv("DB_SEARCH_PATH"),
+    }
+
+def _parametros_conexao(config):
+    parametros = {
+        "user": config["user"],
+        "password": config["password"],
+        "host": config["host"],
+        "port": config["port"],
+        "dbname": config["dbname"],
+        "sslmode": config["sslmode"],
+        "connect_timeout": config["connect_timeout"],
+        # Keepalives evitam que conexões ociosas no pool sejam derrubadas silenciosamente
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 3,
+    }
+    opcoes = []
+    if config["statement_timeout_ms"] > 0:
+        opcoes.append(f"-c statement_timeout={config['statement_timeout_ms']}")
+    if config["search_path"]:
+        opcoes.append(f"-c search_path={config['search_path']}")
+    if opcoes:
+        parametros["options"] = " ".join(opcoes)
+    return parametros
+
+def get_connection():
+    """
+    Abre uma conexão avulsa (fora do pool) com o banco de dados PostgreSQL.
+    Prefira o gerenciador de contexto conexao(), que reutiliza conexões do pool.
+    """
     try:
-        conn = psycopg2.connect(
-        user=USER,
-        password=PASSWORD,
-        host=HOST,
-        port=PORT,
-        dbname=DBNAME,
-        sslmode='require'
-    )
-        print("Connection successful!")
-        return conn
+        return psycopg2.connect(**_parametros_conexao(carregar_config()))
     except Exception as e:
-        print("Connection failed!", e)
+        logger.error("Falha na conexão com o banco: %s", e)
         raise e
 
-'''    # Create a cursor to execute SQL queries
-    db_url = os.getenv('DATABASE_URL')
-    if not db_url:
-        raise Exception("A variável de ambiente DATABASE_URL não está definida!")
-    conn = psycopg2.connect(db_url)
-    return conn'''
+_pool = None
+_pool_semaforo = None
+_pool_lock = threading.Lock()
+# Instante (time.monotonic) da última devolução de cada conexão ao pool, usado no health check
+_ultimo_uso = {}
 
-def init_db():
+def _obter_pool():
     """
-    Inicializa o banco de dados e cria a tabela 'resultados' se ela não existir.
-    Agora inclui a coluna TRECHO.
-    """
-    conn = get_connection()
-    cur = conn.cursor()
-    print("Verificando/criando a tabela 'resultados'...")
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS resultados2 (
-            id SERIAL PRIMARY KEY,
-            TRECHO TEXT,
-            data_voo TEXT,
-            hora_partida TEXT,
-            hora_chegada TEXT,
-            preco INTEGER,
-            companhia TEXT,
-            dia_semana_voo TEXT,
-            data_busca TEXT,
-            horario_busca TEXT,
-            dia_semana_busca TEXT,
-            regiao_origem TEXT,
-            distancia_km TEXT
+    Cria (na primeira chamada) e retorna o pool de conexões compartilhado pelo processo.
+    """
+    global _pool, _pool_semaforo
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = carregar_config()
+                logger.info("Criando pool de conexões: user=%s host=%s port=%s dbname=%s pool=%d-%d",
+                            config["user"], config["host"], config["port"], config["dbname"],
+                            config["pool_min"], config["pool_max"])
+                _pool = pool.ThreadedConnectionPool(
+                    config["pool_min"], config["pool_max"], **_parametros_conexao(config)
+                )
+                _pool_semaforo = threading.BoundedSemaphore(config["pool_max"])
+                logger.info("Pool de conexões criado.")
+    return _pool
+
+def _conexao_saudavel(conn, ping_interval):
+    """
+    Verifica se a conexão ainda está utilizável. Conexões usadas recentemente são aceitas
+    sem ida ao servidor; as demais são testadas com SELECT 1.
+    """
+    if conn.closed:
+        return False
+    if time.monotonic() - _ultimo_uso.get(id(conn), 0) < ping_interval:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+@contextmanager
+def conexao():
+    """
+    Gerenciador de contexto que empresta uma conexão do pool e a devolve ao final.
+
+    Em caso de exceção dentro do bloco, a transação é desfeita (rollback) antes da devolução.
+    Conexões quebradas são descartadas e substituídas. Se nenhuma conexão ficar livre em
+    DB_POOL_TIMEOUT segundos, levanta psycopg2.pool.PoolError.
+
+    Exemplo:
+        with conexao() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+    """
+    pool_conexoes = _obter_pool()
+    semaforo = _pool_semaforo
+    config = carregar_config()
+    if not semaforo.acquire(timeout=config["pool_timeout"]):
+        raise pool.PoolError(f"Nenhuma conexão livre no pool após {config['pool_timeout']} s.")
+    conn = None
+    try:
+        conn = pool_conexoes.getconn()
+        if not _conexao_saudavel(conn, config["ping_interval"]):
+            logger.warning("Conexão do pool inválida; abrindo uma nova.")
+            _ultimo_uso.pop(id(conn), None)
+            pool_conexoes.putconn(conn, close=True)
+            conn = None
+            conn = pool_conexoes.getconn()
+        yield conn
+    except Exception:
+        if conn is not None and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        raise
+    finally:
+        if conn is not None:
+            if conn.closed:
+                _ultimo_uso.pop(id(conn), None)
+                pool_conexoes.putconn(conn, close=True)
+            else:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                _ultimo_uso[id(conn)] = time.monotonic()
+                pool_conexoes.putconn(conn)
+        semaforo.release()
+
+def fechar_pool():
+    """
+    Fecha todas as conexões do pool. Deve ser chamada ao final dos scripts de automação.
+    """
+    global _pool, _pool_semaforo
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _pool_semaforo = None
+            _ultimo_uso.clear()
+
+# Colunas que formam a chave natural de uma observação em 'resultados2', na ordem do INSERT
+COLUNAS_RESULTADO = (
+    "TRECHO", "data_voo", "hora_partida", "hora_chegada", "preco", "companhia", "dia_semana_voo",
+    "data_busca", "horario_busca", "dia_semana_busca", "regiao_origem", "distancia_km",
+)
+
+# Chave natural de 'observacoes' no schema tipado (índice único observacoes_chave_natural).
+# Começa por (trecho, data_voo, buscado_em) para atender também às consultas por rota/data.
+COLUNAS_CHAVE_OBSERVACOES = (
+    "trecho_id", "data_voo", "buscado_em", "hora_partida", "hora_chegada", "preco", "companhia_id",
+)
+
+# Quantidade padrão de registros enviados por comando INSERT (uma ida e volta ao servidor por lote)
+DB_BATCH_SIZE_PADRAO = 500
+
+# Quantidade padrão de registros buscados por FETCH nos cursores nomeados (leitura em streaming)
+DB_FETCH_SIZE_PADRAO = 2000
+
+# Sufixo único para os cursores nomeados abertos pelo processo
+_cursores_nomeados = itertools.count(1)
+
+# Tabelas de lookup do schema tipado e a posição, em COLUNAS_RESULTADO, do nome que armazenam
+TABELAS_LOOKUP = (("trechos", 0), ("companhias", 5), ("regioes", 10))
+
+_SQL_INSERE_OBSERVACOES = r"""
+    INSERT INTO observacoes
+        (trecho_id, data_voo, hora_partida, hora_chegada, preco, companhia_id,
+         buscado_em, regiao_id, distancia_km)
+    SELECT
+        t.id,
+        src.data_voo::date,
+        src.hora_partida,
+        src.hora_chegada,
+        src.preco,
+        c.id,
+        (src.data_busca || ' ' || src.horario_busca)::timestamp AT TIME ZONE '{fuso}',
+        r.id,
+        CASE WHEN src.distancia_km ~ '^-?[0-9]+(\.[0-9]+)?$' THEN src.distancia_km::numeric END
+    FROM {origem}
+    JOIN trechos t ON t.nome = src.trecho
+    LEFT JOIN companhias c ON c.nome = src.companhia
+    LEFT JOIN regioes r ON r.nome = src.regiao_origem
+    WHERE src.data_voo ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'
+      AND src.data_busca ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'
+      AND src.horario_busca ~ '^[0-9]{1,2}:[0-9]{2}(:[0-9]{2})?$'
+    ON CONFLICT DO NOTHING
+"""
+
+def sql_insere_observacoes(origem):
+    """
+    Monta o INSERT ... SELECT que converte registros no formato legado de 'resultados2'
+    (datas, horários e distância em TEXT) para a tabela tipada 'observacoes', resolvendo
+    os ids das tabelas de lookup. Registros com data/horário fora do formato são descartados.
+
+    `origem` é o item do FROM, com alias `src`, que expõe as colunas de COLUNAS_RESULTADO
+    (ex.: "(VALUES %s) AS src (...)" ou "(SELECT * FROM resultados2_legado ...) AS src").
+    """
+    return _SQL_INSERE_OBSERVACOES.replace("{fuso}", FUSO_BUSCA).replace("{origem}", origem)
+
+def schema_tipado(cur):
+    """
+    Indica se a base já foi migrada para o schema tipado (migracao_db.py), caso em que
+    'resultados2' é uma view sobre 'observacoes' e as tabelas de lookup.
+    """
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('resultados2')")
+    linha = cur.fetchone()
+    return linha is not None and linha[0] == "v"
+
+# Consulta os limites das partições de 'observacoes'; limites MINVALUE/MAXVALUE vêm como NULL
+_SQL_PARTICOES = r"""
+    SELECT
+        c.relname,
+        (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'FROM \(''([^'']+)''\)'))[1]::timestamptz,
+        (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::timestamptz
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'observacoes'::regclass
+    ORDER BY 3 NULLS LAST
+"""
+
+def observacoes_particionada(cur):
+    """Indica se a tabela 'observacoes' existe e é particionada por mês de busca."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('observacoes')")
+    linha = cur.fetchone()
+    return linha is not None and linha[0] == "p"
+
+def listar_particoes(cur):
+    """
+    Retorna as partições de 'observacoes' como tuplas (nome, inicio, fim), com os limites
+    em datetime com fuso (None para MINVALUE/MAXVALUE), ordenadas pelo fim do intervalo.
+    """
+    cur.execute(_SQL_PARTICOES)
+    return cur.fetchall()
+
+def inicio_do_mes(referencia, deslocamento=0):
+    """
+    Retorna a meia-noite (no fuso FUSO_BUSCA) do primeiro dia do mês de `referencia`,
+    deslocado em `deslocamento` meses.
+    """
+    indice = referencia.year * 12 + referencia.month - 1 + deslocamento
+    return datetime.datetime(indice // 12, indice % 12 + 1, 1, tzinfo=ZoneInfo(FUSO_BUSCA))
+
+def garantir_particoes(cur, meses_a_frente=None, desde=None):
+    """
+    Cria as partições mensais de 'observacoes' (observacoes_AAAA_MM) do mês de `desde`
+    (padrão: mês atual) até `meses_a_frente` meses adiante (padrão: variável de ambiente
+    PARTICOES_MESES_A_FRENTE ou 2). Meses já cobertos por alguma partição são ignorados.
+    Não faz nada se 'observacoes' não for particionada. Retorna os nomes criados.
+    """
+    if not observacoes_particionada(cur):
+        return []
+    if meses_a_frente is None:
+        meses_a_frente = int(os.getenv("PARTICOES_MESES_A_FRENTE", "2"))
+    agora = datetime.datetime.now(ZoneInfo(FUSO_BUSCA))
+    existentes = listar_particoes(cur)
+    criadas = []
+    mes = inicio_do_mes(desde or agora)
+    ultimo = inicio_do_mes(agora, meses_a_frente)
+    while mes <= ultimo:
+        proximo = inicio_do_mes(mes, 1)
+        sobreposta = any(
+            (inicio is None or inicio < proximo) and (fim is None or fim > mes)
+            for _, inicio, fim in existentes
+        )
+        if not sobreposta:
+            nome = f"observacoes_{mes:%Y_%m}"
+            cur.execute(f"""
+                CREATE TABLE {nome} PARTITION OF observacoes
+                FOR VALUES FROM ('{mes:%Y-%m-%d} 00:00:00 {FUSO_BUSCA}')
+                           TO ('{proximo:%Y-%m-%d} 00:00:00 {FUSO_BUSCA}')
+            """)
+            criadas.append(nome)
+        mes = proximo
+    if criadas:
+        logger.info("Partições criadas: %s", ", ".join(criadas))
+    return criadas
+
+def remover_duplicatas(cur, tabela, colunas):
+    """
+    Remove de `tabela` os registros repetidos nas `colunas`, mantendo o de menor id. NULLs
+    contam como iguais entre si, como no índice único da chave natural.
+    Retorna o número de registros removidos.
+    """
+    lista = ", ".join(colunas)
+    cur.execute(f"""
+        DELETE FROM {tabela} WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY {lista} ORDER BY id) AS ordem
+                FROM {tabela}
+            ) repetidos
+            WHERE ordem > 1
         )
     """)
-    conn.commit()
-    print("Tabela 'resultados' verificada/criada com sucesso.")
-    cur.close()
-    conn.close()
+    return cur.rowcount
+
+# Versão mínima do PostgreSQL (server_version_num) exigida por NULLS NOT DISTINCT
+VERSAO_MINIMA_POSTGRES = 150000
 
-def salva_resultados_em_db(resultados):
+def garantir_chave_natural(cur, tabela, indice, colunas):
     """
-    Salva uma lista de resultados no banco de dados PostgreSQL.
-    Evita a inserção de registros duplicados verificando se já existe um registro com os mesmos dados.
-    Agora inclui a coluna TRECHO.
-    """
-    conn = get_connection()
-    cur = conn.cursor()
-    for r in resultados:
-        print("Verificando duplicidade para o registro:")
-        print(r)
+    Garante o índice único `indice` sobre as `colunas` com NULLS NOT DISTINCT (PostgreSQL 15+).
+    Sem ele, registros com alguma coluna NULL (companhia ou preço ausentes, por exemplo) nunca
+    conflitam e o INSERT ... ON CONFLICT DO NOTHING os grava de novo a cada execução.
+    Se o índice não existir, remove as duplicatas já gravadas e o cria. Retorna True nesse caso.
+    """
+    cur.execute("SELECT current_setting('server_version_num')::int")
+    versao = cur.fetchone()[0]
+    if versao < VERSAO_MINIMA_POSTGRES:
+        raise RuntimeError(
+            f"PostgreSQL {versao // 10000} não suporta NULLS NOT DISTINCT, usado no índice único "
+            f"da chave natural; atualize o servidor para a versão 15 ou superior."
+        )
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (indice,))
+    if cur.fetchone()[0]:
+        return False
+    logger.info("Criando o índice único da chave natural %s em '%s'...", indice, tabela)
+    logger.info("Registros duplicados removidos: %d", remover_duplicatas(cur, tabela, colunas))
+    cur.execute(f"CREATE UNIQUE INDEX {indice} ON {tabela} ({', '.join(colunas)}) NULLS NOT DISTINCT")
+    return True
+
+def init_db():
+    """
+    Inicializa o banco de dados e cria a tabela 'resultados' se ela não existir.
+    Agora inclui a coluna TRECHO e o índice único da chave natural, usado pelo
+    INSERT ... ON CONFLICT DO NOTHING em salva_resultados_em_db.
+    Em bases já migradas para o schema tipado (migracao_db.py), apenas garante o índice
+    único de 'observacoes' e as partições mensais do mês atual e dos próximos meses.
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        if schema_tipado(cur):
+            logger.info("Schema tipado encontrado; 'resultados2' é uma view sobre 'observacoes'.")
+            garantir_chave_natural(cur, "observacoes", "observacoes_chave_natural", COLUNAS_CHAVE_OBSERVACOES)
+            garantir_particoes(cur)
+            conn.commit()
+            return
+        logger.debug("Verificando/criando a tabela 'resultados'...")
         cur.execute("""
-            SELECT COUNT(*) FROM resultados2 
-            WHERE TRECHO = %s AND data_voo = %s AND hora_partida = %s AND hora_chegada = %s 
-                  AND preco = %s AND companhia = %s AND dia_semana_voo = %s 
-                  AND data_busca = %s AND horario_busca = %s AND dia_semana_busca = %s 
-                  AND regiao_origem = %s AND distancia_km = %s
-        """, (
-            r.get("TRECHO"),
-            r.get("data_voo"), 
-            r.get("hora_partida"), 
-            r.get("hora_chegada"), 
-            r.get("preco"),
-            r.get("companhia"), 
-            r.get("dia_semana_voo"), 
-            r.get("data_busca"), 
-            r.get("horario_busca"),
-            r.get("dia_semana_busca"),
-            r.get("regiao_origem"), 
-            r.get("distancia_km")
-        ))
-        exists = cur.fetchone()[0]
-        print("Resultado da verificação (número de registros existentes):", exists)
-        if exists == 0:
-            print("Inserindo registro:")
-            print(r)
-            cur.execute("""
-                INSERT INTO resultados2
-                (TRECHO, data_voo, hora_partida, hora_chegada, preco, companhia, dia_semana_voo, 
-                 data_busca, horario_busca, dia_semana_busca, regiao_origem, distancia_km)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                r.get("TRECHO"),
-                r.get("data_voo"),  
-                r.get("hora_partida"), 
-                r.get("hora_chegada"), 
-                r.get("preco"),
-                r.get("companhia"), 
-                r.get("dia_semana_voo"), 
-                r.get("data_busca"), 
-                r.get("horario_busca"),
-                r.get("dia_semana_busca"),
-                r.get("regiao_origem"), 
-                r.get("distancia_km")
-            ))
-            print("Registro inserido com sucesso.")
+            CREATE TABLE IF NOT EXISTS resultados2 (
+                id SERIAL PRIMARY KEY,
+                TRECHO TEXT,
+                data_voo TEXT,
+                hora_partida TEXT,
+                hora_chegada TEXT,
+                preco INTEGER,
+                companhia TEXT,
+                dia_semana_voo TEXT,
+                data_busca TEXT,
+                horario_busca TEXT,
+                dia_semana_busca TEXT,
+                regiao_origem TEXT,
+                distancia_km TEXT
+            )
+        """)
+        # Bases antigas podem ter duplicatas gravadas por execuções concorrentes;
+        # garantir_chave_natural as remove antes de criar o índice único.
+        garantir_chave_natural(cur, "resultados2", "resultados2_chave_natural", COLUNAS_RESULTADO)
+        conn.commit()
+        logger.debug("Tabela 'resultados' verificada/criada com sucesso.")
+
+def salva_resultados_em_db(resultados, batch_size=None):
+    """
+    Salva uma lista de resultados no banco de dados PostgreSQL.
+    Os registros são enviados em lotes com INSERT ... ON CONFLICT DO NOTHING, de modo que
+    o número de idas e voltas ao servidor depende do número de lotes e não do número de
+    registros. Duplicidades são descartadas pelo índice único da chave natural.
+    Em bases migradas, grava direto em 'observacoes', convertendo os campos de texto.
+
+    O tamanho do lote pode ser informado em batch_size ou pela variável de ambiente
+    DB_BATCH_SIZE (padrão: 500).
+
+    Retorna um dicionário com as contagens {"inseridos": int, "ignorados": int}, que também
+    são somadas às métricas da execução junto com a duração da gravação.
+    """
+    inicio = time.perf_counter()
+    if batch_size is None:
+        batch_size = int(os.getenv("DB_BATCH_SIZE", DB_BATCH_SIZE_PADRAO))
+    if batch_size < 1:
+        raise ValueError("batch_size deve ser maior que zero.")
+
+    linhas = [tuple(r.get(c) for c in COLUNAS_RESULTADO) for r in resultados]
+    if not linhas:
+        return {"inseridos": 0, "ignorados": 0}
+
+    with conexao() as conn, conn.cursor() as cur:
+        if schema_tipado(cur):
+            # Garante os nomes nas tabelas de lookup (em ordem, para evitar deadlocks entre
+            # gravações concorrentes) antes de inserir as observações já com os ids.
+            for tabela, indice in TABELAS_LOOKUP:
+                nomes = sorted({l[indice] for l in linhas if l[indice] is not None})
+                cur.execute(
+                    f"INSERT INTO {tabela} (nome) SELECT unnest(%s::text[]) ON CONFLICT (nome) DO NOTHING",
+                    (nomes,),
+                )
+            sql_insert = sql_insere_observacoes(
+                f"(VALUES %s) AS src ({', '.join(c.lower() for c in COLUNAS_RESULTADO)})"
+            ) + " RETURNING id"
         else:
-            print("Registro já cadastrado:", r)
-    conn.commit()
-    print("Todos os registros foram processados e commit realizado.")
-    cur.close()
-    conn.close()
+            sql_insert = f"""
+                INSERT INTO resultados2 ({", ".join(COLUNAS_RESULTADO)})
+                VALUES %s
+                ON CONFLICT DO NOTHING
+                RETURNING id
+            """
+        inseridos = execute_values(cur, sql_insert, linhas, page_size=batch_size, fetch=True)
+        conn.commit()
+
+    contagem = {"inseridos": len(inseridos), "ignorados": len(linhas) - len(inseridos)}
+    for desfecho, quantidade in contagem.items():
+        metricas.incrementar("ff_db_linhas_total", quantidade, desfecho=desfecho)
+    metricas.observar("ff_db_gravacao_segundos", time.perf_counter() - inicio)
+    logger.info("%d registros processados em %d lote(s): %d inseridos, %d já cadastrados.",
+                len(linhas), -(-len(linhas) // batch_size), contagem["inseridos"], contagem["ignorados"])
+    return contagem
 
 def export_db_to_csv(csv_filename):
     """
     Exporta todos os registros da tabela 'resultados' para um arquivo CSV.
+    Usa COPY ... TO STDOUT, que envia o CSV pronto pelo servidor e o grava direto no
+    arquivo, sem montar as linhas em memória.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM resultados2")
-    rows = cur.fetchall()
-    headers = [desc[0] for desc in cur.description]
-    cur.close()
-    conn.close()
-    
-    with open(csv_filename, mode='w', newline='', encoding='utf-8') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        csv_writer.writerow(headers)
-        csv_writer.writerows(rows)
-    
+    with conexao() as conn, conn.cursor() as cur:
+        with open(csv_filename, mode='w', newline='', encoding='utf-8') as csvfile:
+            cur.copy_expert(
+                "COPY (SELECT * FROM resultados2) TO STDOUT WITH (FORMAT CSV, HEADER)",
+                csvfile,
+            )
+        conn.commit()
+
     return csv_filename
 
+def iter_lotes_resultados(tamanho_lote=None, consulta="SELECT * FROM resultados2", parametros=None):
+    """
+    Gera os registros de 'resultados' em lotes (listas de dicionários) usando um cursor
+    nomeado no servidor, de modo que a memória usada depende do tamanho do lote e não do
+    tamanho da tabela.
+
+    O tamanho do lote pode ser informado em tamanho_lote ou pela variável de ambiente
+    DB_FETCH_SIZE (padrão: 2000). A conexão fica emprestada do pool enquanto o gerador
+    estiver sendo consumido.
+    """
+    if tamanho_lote is None:
+        tamanho_lote = int(os.getenv("DB_FETCH_SIZE", DB_FETCH_SIZE_PADRAO))
+    with conexao() as conn:
+        with conn.cursor(name=f"stream_resultados_{next(_cursores_nomeados)}") as cur:
+            cur.itersize = tamanho_lote
+            cur.execute(consulta, parametros)
+            headers = None
+            while True:
+                rows = cur.fetchmany(tamanho_lote)
+                if not rows:
+                    break
+                if headers is None:
+                    headers = [desc[0] for desc in cur.description]
+                yield [dict(zip(headers, row)) for row in rows]
+        conn.commit()
+
+def iter_resultados(tamanho_lote=None, consulta="SELECT * FROM resultados2", parametros=None):
+    """
+    Gera os registros de 'resultados' um a um, como dicionários, lendo do servidor em lotes.
+    """
+    for lote in iter_lotes_resultados(tamanho_lote, consulta, parametros):
+        yield from lote
+
+def filtro_buscas_recentes(cur, dias):
+    """
+    Retorna a condição SQL (e seus parâmetros) que seleciona, em 'resultados2', os registros
+    buscados nos últimos `dias` dias. No schema tipado o filtro é feito sobre buscado_em, de
+    modo que apenas as partições recentes de 'observacoes' são lidas.
+    """
+    if schema_tipado(cur):
+        return "buscado_em >= now() - make_interval(days => %s)", (dias,)
+    desde = datetime.datetime.now(ZoneInfo(FUSO_BUSCA)).date() - datetime.timedelta(days=dias)
+    return "data_busca >= %s", (desde.isoformat(),)
+
+def iter_resultados_recentes(dias, tamanho_lote=None):
+    """Gera os registros buscados nos últimos `dias` dias (veja filtro_buscas_recentes)."""
+    with conexao() as conn, conn.cursor() as cur:
+        condicao, parametros = filtro_buscas_recentes(cur, dias)
+    yield from iter_resultados(tamanho_lote, f"SELECT * FROM resultados2 WHERE {condicao}", parametros)
+
 def get_all_results():
     """
     Retorna todos os registros da tabela 'resultados' como uma lista de dicionários.
+    Para tabelas grandes, prefira iter_resultados() ou iter_lotes_resultados().
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM resultados2")
-    rows = cur.fetchall()
-    headers = [desc[0] for desc in cur.description]
-    cur.close()
-    conn.close()
-    results = [dict(zip(headers, row)) for row in rows]
-    return results
+    return list(iter_resultados())
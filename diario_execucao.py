@@ -0,0 +1,130 @@
+import os
+import json
+import datetime
+import threading
+
+# Situação de cada busca registrada no diário
+OK = "ok"
+VAZIO = "vazio"
+FALHA = "falha"
+
+def caminho_diario(script):
+    """
+    Caminho do diário do script (ex.: "automation" -> diario_automation.jsonl), dentro do
+    diretório DIARIO_EXECUCAO_DIR (padrão: diretório atual).
+    """
+    return os.path.join(os.getenv("DIARIO_EXECUCAO_DIR", "."), f"diario_{script}.jsonl")
+
+def _chave(param):
+    return (param.get("origem"), param.get("destino"), param.get("data"))
+
+class DiarioExecucao:
+    """
+    Diário local (JSON Lines, só de acréscimo) de uma execução de busca. A primeira linha
+    guarda a lista de buscas planejadas; cada busca concluída acrescenta uma linha com sua
+    situação (ok, vazio ou falha) e o resultado, gravada assim que ela termina. Uma linha
+    final marca a execução como encerrada, depois que os resultados foram salvos no banco.
+
+    Com carregar(), uma execução interrompida é retomada: as buscas planejadas são as mesmas,
+    as concluídas (ok ou vazio) não são repetidas e seus resultados continuam disponíveis para
+    gravação. Buscas com falha voltam a ser executadas.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.execucao = None
+        self.parametros = []
+        self._registros = {}
+        self._arquivo = None
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        """
+        Lê o diário existente. Retorna True se houver uma execução não encerrada para
+        retomar; False se não houver diário ou se a última execução já foi encerrada.
+        """
+        if not os.path.exists(self.caminho):
+            return False
+        encerrada = False
+        linha = ""
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    # Linha incompleta gravada no momento da interrupção
+                    continue
+                if "execucao" in registro:
+                    self.execucao = registro["execucao"]
+                    self.parametros = registro["parametros"]
+                elif "chave" in registro:
+                    self._registros[tuple(registro["chave"])] = registro
+                elif "encerrada_em" in registro:
+                    encerrada = True
+        if self.execucao is None or encerrada:
+            self.execucao = None
+            self.parametros = []
+            self._registros.clear()
+            return False
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        if linha and not linha.endswith("\n"):
+            # Isola a linha incompleta para que o próximo registro comece em uma linha nova
+            self._gravar_linha("")
+        return True
+
+    def iniciar(self, parametros):
+        """Começa uma nova execução com as buscas planejadas, substituindo o diário anterior."""
+        self.execucao = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        self.parametros = list(parametros)
+        self._registros.clear()
+        self._arquivo = open(self.caminho, "w", encoding="utf-8")
+        self._gravar({"execucao": self.execucao, "parametros": self.parametros})
+
+    def _gravar_linha(self, texto):
+        with self._lock:
+            self._arquivo.write(texto + "\n")
+            self._arquivo.flush()
+
+    def _gravar(self, registro):
+        self._gravar_linha(json.dumps(registro, ensure_ascii=False))
+
+    def registrar(self, param, resultado, falhou=False):
+        """Registra o desfecho de uma busca assim que ela termina."""
+        situacao = FALHA if falhou else (OK if resultado else VAZIO)
+        registro = {
+            "chave": list(_chave(param)),
+            "situacao": situacao,
+            "resultado": resultado if situacao == OK else None,
+        }
+        self._registros[_chave(param)] = registro
+        self._gravar(registro)
+
+    def concluida(self, param):
+        registro = self._registros.get(_chave(param))
+        return registro is not None and registro["situacao"] != FALHA
+
+    def pendentes(self):
+        """Buscas planejadas ainda não concluídas, na ordem do plano."""
+        return [param for param in self.parametros if not self.concluida(param)]
+
+    def resultados(self):
+        """Resultados das buscas concluídas com voo encontrado, na ordem do plano."""
+        registros = (self._registros.get(_chave(param)) for param in self.parametros)
+        return [r["resultado"] for r in registros if r is not None and r["situacao"] == OK]
+
+    def execucoes(self):
+        """Lista de (parametro, sucesso) das buscas com desfecho registrado, para a agenda."""
+        return [
+            (param, self._registros[_chave(param)]["situacao"] != FALHA)
+            for param in self.parametros if _chave(param) in self._registros
+        ]
+
+    def encerrar(self):
+        """Marca a execução como encerrada; um --resume posterior começará uma nova."""
+        self._gravar({"encerrada_em": datetime.datetime.now().isoformat(timespec="seconds")})
+        self.fechar()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
@@ -0,0 +1,79 @@
+import os
+
+from precos import normalizar_preco
+
+# Definições versionadas dos seletores dos cartões de voo do Google Flights. Quando o layout
+# mudar, acrescente uma nova versão em vez de editar a anterior e selecione-a com a variável
+# de ambiente PW_SELETORES_VERSAO (ou o argumento `versao`).
+DEFINICOES_SELETORES = {
+    "2025-05": {
+        "cartao": "li.pIav2d",
+        "campos": {
+            "horario_partida": {"seletor": "span[aria-label*='Horário de partida']"},
+            "horario_chegada": {"seletor": "span[aria-label*='Horário de chegada']"},
+            "preco": {"seletor": "span[aria-label*='Reais brasileiros']"},
+            "preco_rotulo": {"seletor": "span[aria-label*='Reais brasileiros']", "atributo": "aria-label"},
+            "companhia": {"seletor": "div.sSHqwe.tPgKwe.ogfYpf span"},
+            "paradas": {"seletor": "span[aria-label*='parada'], span[aria-label*='direto']"},
+            "duracao": {"seletor": "div[aria-label^='Duração total']"},
+        },
+    },
+}
+VERSAO_PADRAO = "2025-05"
+
+# Executado no navegador: percorre todos os cartões e lê todos os campos de uma só vez,
+# devolvendo uma lista de objetos simples (uma única ida e volta ao navegador).
+_JS_EXTRAIR_CARTOES = """
+(definicao) => Array.from(document.querySelectorAll(definicao.cartao)).map((cartao) => {
+    const voo = {};
+    for (const [nome, campo] of Object.entries(definicao.campos)) {
+        const el = cartao.querySelector(campo.seletor);
+        if (!el) {
+            voo[nome] = null;
+        } else if (campo.atributo) {
+            voo[nome] = el.getAttribute(campo.atributo);
+        } else {
+            voo[nome] = (el.innerText || el.textContent || "").trim();
+        }
+    }
+    return voo;
+})
+"""
+
+def definicao_seletores(versao=None):
+    """Retorna a definição de seletores da versão pedida (ou de PW_SELETORES_VERSAO)."""
+    versao = versao or os.getenv("PW_SELETORES_VERSAO", VERSAO_PADRAO)
+    try:
+        return DEFINICOES_SELETORES[versao]
+    except KeyError:
+        raise ValueError(
+            f"Versão de seletores desconhecida: {versao}. Disponíveis: {', '.join(DEFINICOES_SELETORES)}"
+        )
+
+async def extrair_cartoes(page, definicao=None):
+    """
+    Extrai os campos (horários, preço, companhia, paradas, duração) de todos os cartões de
+    voo da página com uma única chamada a page.evaluate. Retorna uma lista de dicionários,
+    um por cartão, na ordem da página; campos não encontrados vêm como None.
+    """
+    return await page.evaluate(_JS_EXTRAIR_CARTOES, definicao or definicao_seletores())
+
+def preco_numerico(cartao):
+    """
+    Converte o preço de um cartão em número, usando o texto exibido ("R$ 2.250") ou, na
+    falta dele, o aria-label ("2250 Reais brasileiros"). Retorna None se não houver preço.
+    """
+    for chave in ("preco", "preco_rotulo"):
+        preco = normalizar_preco(cartao.get(chave))
+        if preco is not None:
+            return preco
+    return None
+
+def voo_mais_barato(cartoes):
+    """Retorna o cartão de menor preço, com o preço numérico em "preco_numerico", ou None."""
+    mais_barato = None
+    for cartao in cartoes:
+        preco = preco_numerico(cartao)
+        if preco is not None and (mais_barato is None or preco < mais_barato["preco_numerico"]):
+            mais_barato = {**cartao, "preco_numerico": preco}
+    return mais_barato
@@ -0,0 +1,106 @@
+import os
+import re
+import weakref
+from collections import Counter
+
+# Regras padrão: os scrapers só leem textos e aria-labels, então imagens, fontes, mídia,
+# blocos de mapa e beacons de telemetria podem ser abortados sem afetar a extração.
+REGRAS_PADRAO = {
+    "bloquear_tipos": {"image", "media", "font"},
+    "bloquear_urls": [
+        r"google-analytics\.com",
+        r"googletagmanager\.com",
+        r"doubleclick\.net",
+        r"/gen_204",
+        r"play\.google\.com/log",
+        r"/log\?format=",
+        r"/maps/vt",
+        r"maps\.gstatic\.com",
+        r"khms\d*\.google",
+    ],
+    # Padrões permitidos têm precedência sobre os bloqueios (por tipo ou URL)
+    "permitir_urls": [],
+}
+
+# Tamanho médio estimado (bytes) de uma resposta por tipo de recurso; o conteúdo de uma
+# requisição abortada nunca é baixado, então a economia em bytes é uma estimativa.
+BYTES_ESTIMADOS_POR_TIPO = {
+    "image": 20_000,
+    "media": 200_000,
+    "font": 40_000,
+    "script": 30_000,
+    "stylesheet": 15_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+    "ping": 500,
+}
+BYTES_ESTIMADOS_OUTROS = 1_000
+
+def filtro_habilitado(filtrar=None):
+    """
+    Resolve se o filtro de requisições deve ser usado: o argumento explícito tem precedência;
+    se for None, vale a variável de ambiente PW_FILTRAR_REQUISICOES ("1"/"true" habilita).
+    """
+    if filtrar is not None:
+        return filtrar
+    return os.getenv("PW_FILTRAR_REQUISICOES", "").lower() in ("1", "true", "sim")
+
+def _compilar(padroes):
+    return re.compile("|".join(f"(?:{p})" for p in padroes)) if padroes else None
+
+class EstatisticasFiltro:
+    """Contadores de requisições permitidas e evitadas por uma página desde o último reinício."""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.permitidas = 0
+        self.bloqueadas = 0
+        self.bloqueadas_por_tipo = Counter()
+        self.bytes_evitados = 0
+
+    def resumo(self):
+        tipos = ", ".join(f"{tipo}={n}" for tipo, n in self.bloqueadas_por_tipo.most_common())
+        return (
+            f"{self.bloqueadas} requisições evitadas (~{self.bytes_evitados / 1024:.0f} KB estimados), "
+            f"{self.permitidas} permitidas" + (f" [{tipos}]" if tipos else "")
+        )
+
+# Estatísticas de cada página com filtro instalado (a entrada some quando a página é coletada)
+_paginas_filtradas = weakref.WeakKeyDictionary()
+
+async def instalar_filtro(page, regras=None):
+    """
+    Instala na página um roteamento que aborta as requisições bloqueadas pelas regras
+    (tipos de recurso e padrões de URL, com os padrões permitidos tendo precedência).
+    Instalar de novo na mesma página não tem efeito. Retorna as estatísticas da página.
+    """
+    if page in _paginas_filtradas:
+        return _paginas_filtradas[page]
+    regras = {**REGRAS_PADRAO, **(regras or {})}
+    bloquear_tipos = set(regras["bloquear_tipos"])
+    bloquear_urls = _compilar(regras["bloquear_urls"])
+    permitir_urls = _compilar(regras["permitir_urls"])
+    estatisticas = EstatisticasFiltro()
+
+    async def rotear(route, request):
+        url = request.url
+        tipo = request.resource_type
+        permitida = permitir_urls is not None and permitir_urls.search(url)
+        if not permitida and (tipo in bloquear_tipos or (bloquear_urls is not None and bloquear_urls.search(url))):
+            estatisticas.bloqueadas += 1
+            estatisticas.bloqueadas_por_tipo[tipo] += 1
+            estatisticas.bytes_evitados += BYTES_ESTIMADOS_POR_TIPO.get(tipo, BYTES_ESTIMADOS_OUTROS)
+            await route.abort()
+        else:
+            estatisticas.permitidas += 1
+            await route.continue_()
+
+    await page.route("**/*", rotear)
+    _paginas_filtradas[page] = estatisticas
+    return estatisticas
+
+def estatisticas_filtro(page):
+    """Retorna as estatísticas do filtro instalado na página, ou None se não houver filtro."""
+    return _paginas_filtradas.get(page)
@@ -0,0 +1,5 @@
+# Fuso horário de data_busca/horario_busca: os scripts de automação registram a hora da busca
+# com datetime.now(ZoneInfo(FUSO_BUSCA)), e a gravação tipada a converte para timestamptz nele.
+# Fica em um módulo sem dependências para que o planejador e os benchmarks não precisem do
+# driver do PostgreSQL.
+FUSO_BUSCA = "America/Sao_Paulo"
@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import base64
+import asyncio
+import logging
+import datetime
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+MODOS_GRAVACAO = ("desligado", "gravar", "reproduzir")
+DIRETORIO_PADRAO = "gravacoes"
+
+# Cabeçalhos que não devem ser gravados (sessão do navegador) nem reenviados na reprodução
+# (o corpo gravado já está descomprimido e o tamanho é recalculado pelo Playwright)
+CABECALHOS_SESSAO = {"cookie", "set-cookie"}
+CABECALHOS_TRANSPORTE = {"content-encoding", "content-length", "transfer-encoding"}
+
+def modo_gravacao(modo=None):
+    """
+    Resolve o modo de gravação de tráfego das páginas: "desligado" (padrão), "gravar" (salva
+    as respostas recebidas em um arquivo HAR por trecho e data) ou "reproduzir" (serve as
+    respostas do arquivo, sem acessar a rede). O argumento explícito tem precedência sobre a
+    variável de ambiente PW_GRAVACAO.
+    """
+    modo = (modo or os.getenv("PW_GRAVACAO") or "desligado").lower()
+    if modo not in MODOS_GRAVACAO:
+        raise ValueError(f"Modo de gravação desconhecido: {modo}. Use um de: {', '.join(MODOS_GRAVACAO)}")
+    return modo
+
+def _segmento(valor):
+    return re.sub(r"[^\w.-]", "_", str(valor))
+
+def caminho_gravacao(tipo, origem, destino, data, diretorio=None):
+    """
+    Arquivo HAR de uma coleta: <PW_GRAVACAO_DIR>/<tipo>/<ORIGEM>-<DESTINO>/<data>.har, com
+    `tipo` "scrape_day" ou "historico" (as duas coletas carregam recursos diferentes).
+    """
+    diretorio = diretorio or os.getenv("PW_GRAVACAO_DIR", DIRETORIO_PADRAO)
+    return os.path.join(diretorio, _segmento(tipo), f"{_segmento(origem)}-{_segmento(destino)}",
+                        f"{_segmento(data)}.har")
+
+def _sem_query(url):
+    partes = urlsplit(url)
+    return f"{partes.scheme}://{partes.netloc}{partes.path}"
+
+def _cabecalhos_har(cabecalhos, ignorar=CABECALHOS_SESSAO):
+    return [{"name": nome, "value": valor} for nome, valor in cabecalhos.items() if nome.lower() not in ignorar]
+
+class GravadorTrafego:
+    """
+    Guarda as respostas recebidas por uma página (com corpo, cabeçalhos e status) enquanto
+    estiver ativo e as salva no formato HAR 1.2, legível pelo DevTools e por route_from_har.
+    Requisições abortadas (pelo filtro de requisições, por exemplo) não têm resposta e não
+    são gravadas.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.entradas = []
+        self.sem_corpo = 0
+        self._leituras = set()
+        # A mesma referência é usada para registrar e remover o ouvinte
+        self._ouvinte = self._ao_responder
+
+    def _ao_responder(self, response):
+        tarefa = asyncio.ensure_future(self._registrar(response))
+        self._leituras.add(tarefa)
+        tarefa.add_done_callback(self._leituras.discard)
+
+    async def _registrar(self, response):
+        request = response.request
+        try:
+            corpo = await response.body()
+        except Exception:
+            # Redirecionamentos e respostas descartadas por uma nova navegação não têm corpo legível
+            if not 300 <= response.status < 400:
+                self.sem_corpo += 1
+                return
+            corpo = b""
+        try:
+            conteudo = {"text": corpo.decode("utf-8")}
+        except UnicodeDecodeError:
+            conteudo = {"text": base64.b64encode(corpo).decode("ascii"), "encoding": "base64"}
+        requisicao = {
+            "method": request.method,
+            "url": request.url,
+            "httpVersion": "HTTP/1.1",
+            "headers": _cabecalhos_har(request.headers),
+            "queryString": [],
+            "cookies": [],
+            "headersSize": -1,
+            "bodySize": len(request.post_data_buffer or b""),
+        }
+        if request.post_data is not None:
+            requisicao["postData"] = {
+                "mimeType": request.headers.get("content-type", ""),
+                "text": request.post_data,
+            }
+        self.entradas.append({
+            "startedDateTime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "time": 0,
+            "_resourceType": request.resource_type,
+            "request": requisicao,
+            "response": {
+                "status": response.status,
+                "statusText": response.status_text,
+                "httpVersion": "HTTP/1.1",
+                "headers": _cabecalhos_har(response.headers),
+                "cookies": [],
+                "content": {
+                    "size": len(corpo),
+                    "mimeType": response.headers.get("content-type", ""),
+                    **conteudo,
+                },
+                "redirectURL": response.headers.get("location", ""),
+                "headersSize": -1,
+                "bodySize": len(corpo),
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": 0, "receive": 0},
+        })
+
+    def iniciar(self):
+        self.page.on("response", self._ouvinte)
+
+    async def parar(self):
+        """Para de ouvir a página e espera a leitura dos corpos ainda em andamento."""
+        self.page.remove_listener("response", self._ouvinte)
+        if self._leituras:
+            await asyncio.gather(*self._leituras, return_exceptions=True)
+
+    def salvar(self, caminho):
+        """Grava o HAR em um temporário e o renomeia, substituindo a gravação anterior."""
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        har = {"log": {"version": "1.2", "creator": {"name": "flight-scraper", "version": "1"},
+                       "entries": self.entradas}}
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(har, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    def resumo(self):
+        return f"{len(self.entradas)} respostas gravadas" + (
+            f", {self.sem_corpo} sem corpo legível (não gravadas)" if self.sem_corpo else ""
+        )
+
+class ReprodutorTrafego:
+    """
+    Serve as respostas de um HAR às requisições de uma página, sem acessar a rede. Cada
+    requisição é procurada pelo método e pela URL exata e, se não houver, pelo método e pela
+    URL sem a query string (que muda a cada carga em chamadas de dados). Gravações repetidas
+    da mesma requisição são servidas na ordem em que foram gravadas, repetindo a última.
+    Requisições sem gravação são abortadas.
+    """
+
+    def __init__(self, entradas):
+        self.exatas = {}
+        self.sem_query = {}
+        for entrada in entradas:
+            metodo, url = entrada["request"]["method"], entrada["request"]["url"]
+            self.exatas.setdefault((metodo, url), deque()).append(entrada)
+            self.sem_query.setdefault((metodo, _sem_query(url)), deque()).append(entrada)
+        self.servidas = 0
+        self.faltantes = 0
+
+    @classmethod
+    def carregar(cls, caminho):
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(
+                f"Gravação não encontrada: {caminho}. Grave-a antes com PW_GRAVACAO=gravar."
+            )
+        with open(caminho, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["log"]["entries"])
+
+    def _procurar(self, metodo, url):
+        for indice, chave in ((self.exatas, (metodo, url)), (self.sem_query, (metodo, _sem_query(url)))):
+            fila = indice.get(chave)
+            if fila:
+                return fila.popleft() if len(fila) > 1 else fila[0]
+        return None
+
+    async def rotear(self, route, request):
+        entrada = self._procurar(request.method, request.url)
+        if entrada is None:
+            self.faltantes += 1
+            await route.abort()
+            return
+        resposta = entrada["response"]
+        conteudo = resposta["content"]
+        texto = conteudo.get("text", "")
+        corpo = base64.b64decode(texto) if conteudo.get("encoding") == "base64" else texto.encode("utf-8")
+        self.servidas += 1
+        await route.fulfill(
+            status=resposta["status"],
+            headers={c["name"]: c["value"] for c in resposta["headers"]
+                     if c["name"].lower() not in CABECALHOS_TRANSPORTE},
+            body=corpo,
+        )
+
+    def resumo(self):
+        return f"{self.servidas} respostas servidas da gravação, {self.faltantes} requisições sem gravação (abortadas)"
+
+@asynccontextmanager
+async def trafego_gravado(page, tipo, origem, destino, data, modo=None, diretorio=None):
+    """
+    Grava ou reproduz o tráfego da página durante o bloco, conforme modo_gravacao(modo).
+    Ao gravar, o HAR da coleta é salvo ao final do bloco (apenas se ele terminar sem
+    exceção, para não substituir uma gravação boa por uma interrompida). Ao reproduzir, a
+    página é servida pelo HAR e o roteamento é removido ao final, de modo que uma página
+    reaproveitada (pool_paginas.py) pode reproduzir outro trecho ou data em seguida.
+    Retorna o gravador ou reprodutor em uso (None com o modo desligado).
+    """
+    modo = modo_gravacao(modo)
+    if modo == "desligado":
+        yield None
+        return
+    caminho = caminho_gravacao(tipo, origem, destino, data, diretorio)
+
+    if modo == "gravar":
+        gravador = GravadorTrafego(page)
+        gravador.iniciar()
+        try:
+            yield gravador
+        finally:
+            await gravador.parar()
+        gravador.salvar(caminho)
+        logger.debug("Tráfego gravado em %s: %s.", caminho, gravador.resumo())
+        return
+
+    reprodutor = ReprodutorTrafego.carregar(caminho)
+    rotear = reprodutor.rotear
+    # Registrado depois do filtro de requisições, é consultado antes dele: nada chega à rede
+    await page.route("**/*", rotear)
+    try:
+        yield reprodutor
+    finally:
+        await page.unroute("**/*", rotear)
+        logger.debug("Reprodução de %s: %s.", caminho, reprodutor.resumo())
@@ -1,8 +1,142 @@
+import os
+import re
+import json
+import time
 import asyncio
+import logging
+import argparse
+import datetime
 from playwright.async_api import async_playwright
+from psycopg2.extras import execute_values
 import pandas as pd
 
-async def scrape(origin: str, destination: str, flight_date: str, output_file: str = "historico_precos.csv"):
+from db_pg import DB_BATCH_SIZE_PADRAO, conexao, fechar_pool
+from filtro_requisicoes import filtro_habilitado, instalar_filtro
+from gravacao_trafego import trafego_gravado
+from prontidao import CronometroEtapas, timeouts_etapas
+from pesquisa_voos_playwright import url_busca
+from planejador import expandir_trechos, hoje_busca, planejar, resumo_plano
+from pool_paginas import PoolPaginas, processar_fila
+from precos import normalizar_preco
+from registro import configurar_logging, contexto_busca
+from metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+# XPath do botão que expande o gráfico de histórico de preços
+XPATH_BOTAO_GRAFICO = (
+    '//*[@id="yDmH0d"]/c-wiz[2]/div/div[2]/c-wiz/div[1]/c-wiz/div[2]/div[2]/div[2]/div/'
+    'div[2]/div[2]/div/div/div/div/div[1]/div[4]/button'
+)
+
+# Pontos do gráfico, com aria-label no formato "Tempo - Preço" (ex.: "Há 12 dias - R$ 489")
+SELETOR_PONTOS = "g[aria-label*=' - ']"
+
+# Duração típica da coleta de um gráfico, usada na estimativa do plano do lote
+SEGUNDOS_POR_HISTORICO_ESTIMADOS = 15
+
+_TEMPO_RELATIVO = re.compile(r"^há (\d+) dias?$")
+
+def data_do_ponto(tempo, referencia):
+    """
+    Converte o tempo de um ponto do gráfico em data absoluta: "HOJE" é `referencia` (o dia
+    da coleta), "ONTEM" o dia anterior e "Há N dias" N dias antes. Retorna None para
+    formatos desconhecidos.
+    """
+    texto = " ".join(str(tempo).split()).lower()
+    if texto == "hoje":
+        return referencia
+    if texto == "ontem":
+        return referencia - datetime.timedelta(days=1)
+    encontrado = _TEMPO_RELATIVO.match(texto)
+    if encontrado is None:
+        return None
+    return referencia - datetime.timedelta(days=int(encontrado.group(1)))
+
+async def coletar_historico(page, origin, destination, flight_date, cronometro=None, gravacao=None):
+    """
+    Abre a busca na página, expande o gráfico de histórico de preços e retorna seus pontos
+    como [{"Tempo": "Há 12 dias", "Preço": "R$ 489"}, ...] (lista vazia se o gráfico não
+    carregar). Os aria-labels de todos os pontos são lidos em uma única chamada ao navegador.
+    O tráfego da página pode ser gravado ou reproduzido (gravacao_trafego.py).
+    """
+    if cronometro is None:
+        cronometro = CronometroEtapas()
+    url = url_busca(origin, destination, flight_date)
+    logger.debug("URL construída: %s", url)
+    timeouts = timeouts_etapas()
+
+    async with trafego_gravado(page, "historico", origin, destination, flight_date, gravacao):
+        # Acessa a página e espera apenas pelos sinais de que cada etapa precisa,
+        # em vez do networkidle seguido de pausas fixas
+        with cronometro.etapa("navegacao"):
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeouts["navegacao"])
+        logger.debug("Página acessada. Aguardando os resultados...")
+        with cronometro.etapa("resultados"):
+            try:
+                await page.wait_for_selector("li.pIav2d", timeout=timeouts["resultados"])
+            except Exception as e:
+                logger.debug("Resultados não apareceram: %s", e)
+
+        # Rola a página para disparar o carregamento de elementos dinâmicos e
+        # tenta localizar e clicar no botão que expande o gráfico
+        with cronometro.etapa("botao"):
+            try:
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                button_locator = page.locator(f"xpath={XPATH_BOTAO_GRAFICO}")
+                await button_locator.wait_for(state="visible", timeout=timeouts["botao"])
+                await button_locator.scroll_into_view_if_needed()
+                await button_locator.click(timeout=timeouts["botao"])
+                logger.debug("Botão de expandir gráfico clicado.")
+            except Exception as e:
+                logger.debug("Erro ao clicar no botão: %s", e)
+
+        # Aguarda os pontos do gráfico serem desenhados
+        with cronometro.etapa("grafico"):
+            try:
+                await page.wait_for_selector(SELETOR_PONTOS, timeout=timeouts["grafico"])
+                logger.debug("Gráfico carregado.")
+            except Exception as e:
+                logger.warning("Gráfico de histórico não carregou: %s", e)
+                return []
+
+        with cronometro.etapa("extracao"):
+            rotulos = await page.eval_on_selector_all(
+                SELETOR_PONTOS, "els => els.map(el => el.getAttribute('aria-label'))"
+            )
+            logger.debug("Número de elementos encontrados: %d", len(rotulos))
+            pontos = []
+            for aria_label in rotulos:
+                if aria_label and " - " in aria_label:
+                    # Divide a string no formato "Tempo - Preço"
+                    time_info, price_info = [part.strip() for part in aria_label.split(" - ", 1)]
+                    pontos.append({"Tempo": time_info, "Preço": price_info})
+    return pontos
+
+def serie_historico(origem, destino, data_voo, pontos, referencia):
+    """
+    Converte os pontos do gráfico em linhas {"origem", "destino", "data_voo", "data_preco",
+    "preco"}, com a data absoluta de cada ponto (em relação ao dia da coleta) e o preço em
+    número. Pontos sem data ou preço reconhecíveis são descartados.
+    """
+    linhas = []
+    for ponto in pontos:
+        data_preco = data_do_ponto(ponto["Tempo"], referencia)
+        preco = normalizar_preco(ponto["Preço"])
+        if data_preco is None or preco is None:
+            logger.debug("Ponto ignorado: %s", ponto)
+            continue
+        linhas.append({
+            "origem": origem,
+            "destino": destino,
+            "data_voo": data_voo,
+            "data_preco": data_preco.isoformat(),
+            "preco": round(preco),
+        })
+    return linhas
+
+async def scrape(origin: str, destination: str, flight_date: str, output_file: str = "historico_precos.csv",
+                 filtrar_requisicoes: bool = None, gravacao: str = None):
     """
     Realiza uma busca one-way no Google Flights utilizando os parâmetros:
       - origin: código ou nome do aeroporto de origem.
@@ -10,84 +144,198 @@ async def scrape(origin: str, destination: str, flight_date: str, output_file: s
       - flight_date: data do voo (no formato AAAA-MM-DD).
 
     O script acessa a URL de busca, clica no botão para expandir o gráfico de histórico
-    de preços, aguarda o carregamento dos dados, extrai informações de tempo e preço dos
+    de preços, aguarda os pontos do gráfico serem desenhados, extrai informações de tempo e preço dos
     elementos do gráfico e, por fim, salva os resultados em um arquivo CSV.
-    """
-    # Monta a URL da busca
-    url = (
-        "https://www.google.com/travel/flights?hl=pt-BR&gl=BR&curr=BRL&q="
-        f"Flights%20to%20{destination}%20from%20{origin}%20on%20{flight_date}%20oneway"
-    )
-    print(f"[DEBUG] URL construída: {url}")
+    Para vários trechos, use scrape_lote, que reaproveita um único navegador.
 
-    # XPath do botão que expande o gráfico de histórico de preços
-    expand_button_xpath = (
-        '//*[@id="yDmH0d"]/c-wiz[2]/div/div[2]/c-wiz/div[1]/c-wiz/div[2]/div[2]/div[2]/div/'
-        'div[2]/div[2]/div/div/div/div/div[1]/div[4]/button'
-    )
+    Com filtrar_requisicoes=True (ou PW_FILTRAR_REQUISICOES=1), imagens, fontes, mapas e
+    telemetria não são baixados (filtro_requisicoes.py).
 
+    Com gravacao="gravar" (ou PW_GRAVACAO=gravar), o tráfego da página é salvo em um HAR por
+    trecho e data; com "reproduzir", a página é servida por ele, sem rede (gravacao_trafego.py).
+    """
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
-        
-        # Acessa a página e aguarda o carregamento completo (networkidle)
-        await page.goto(url)
-        print("[DEBUG] Página acessada. Aguardando carregamento (networkidle)...")
-        await page.wait_for_load_state("networkidle")
-
-        # Rola a página para disparar o carregamento de elementos dinâmicos
-        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        await page.wait_for_timeout(2000)
+        estatisticas = None
+        if filtro_habilitado(filtrar_requisicoes):
+            estatisticas = await instalar_filtro(page)
 
-        # Tenta localizar e clicar no botão que expande o gráfico
+        cronometro = CronometroEtapas()
         try:
-            button_locator = page.locator(f"xpath={expand_button_xpath}")
-            await button_locator.scroll_into_view_if_needed()
-            await page.wait_for_timeout(1000)
-            await button_locator.click(timeout=20000)
-            print("[DEBUG] Botão de expandir gráfico clicado.")
-        except Exception as e:
-            print(f"[DEBUG] Erro ao clicar no botão: {e}")
-
-        # Aguarda alguns segundos para que o gráfico seja carregado
-        await page.wait_for_timeout(5000)
-        try:
-            await page.wait_for_selector("g[aria-label*=' - ']", timeout=20000)
-            print("[DEBUG] Gráfico carregado.")
-        except Exception as e:
-            print(f"[DEBUG] Erro ao aguardar o gráfico: {e}")
+            data = await coletar_historico(page, origin, destination, flight_date, cronometro, gravacao)
+        finally:
+            logger.debug("Tempos (%s -> %s em %s): %s", origin, destination, flight_date, cronometro.resumo())
+            if estatisticas is not None:
+                logger.debug("Filtro de requisições: %s", estatisticas.resumo())
             await browser.close()
-            return
-
-        # Extrai os elementos do gráfico que contêm a informação de tempo e preço
-        elements = await page.query_selector_all("g[aria-label*=' - ']")
-        print(f"[DEBUG] Número de elementos encontrados: {len(elements)}")
-
-        # Processa os dados extraídos
-        data = []
-        for elem in elements:
-            aria_label = await elem.get_attribute("aria-label")
-            if aria_label and " - " in aria_label:
-                # Divide a string no formato "Tempo - Preço"
-                time_info, price_info = [part.strip() for part in aria_label.split(" - ", 1)]
-                data.append({"Tempo": time_info, "Preço": price_info})
-
-        await browser.close()
 
         # Salva os dados extraídos em um arquivo CSV, se houver informações
         if data:
             df = pd.DataFrame(data)
             df.to_csv(output_file, index=False, encoding="utf-8-sig")
-            print(f"[DEBUG] Dados coletados e salvos em '{output_file}'.")
+            logger.info("%d pontos do histórico salvos em '%s'.", len(data), output_file)
         else:
-            print("[DEBUG] Nenhum dado encontrado no gráfico.")
+            logger.warning("Nenhum dado encontrado no gráfico.")
+
+def rotas_historico(entradas, todas_as_datas=False, hoje=None):
+    """
+    Rotas {"origem", "destino", "data"} do lote a partir das entradas do plano
+    (params_flights.json): por padrão, uma por trecho, na primeira data de voo planejada.
+    Trechos sem datas futuras usam hoje + HISTORICO_ANTECEDENCIA_DIAS (padrão 30), para que
+    todo trecho do plano seja atualizado. Com todas_as_datas=True, uma rota por data planejada.
+    """
+    hoje = hoje or hoje_busca()
+    antecedencia = int(os.getenv("HISTORICO_ANTECEDENCIA_DIAS", "30"))
+    data_padrao = (hoje + datetime.timedelta(days=antecedencia)).isoformat()
+    planejadas = {}
+    for busca in planejar(entradas, hoje):
+        planejadas.setdefault((busca["origem"], busca["destino"]), []).append(busca)
+
+    rotas = []
+    vistos = set()
+    for entrada in entradas:
+        for origem, destino in expandir_trechos(entrada):
+            if (origem, destino) in vistos:
+                continue
+            vistos.add((origem, destino))
+            datas = planejadas.get((origem, destino)) or [{"origem": origem, "destino": destino, "data": data_padrao}]
+            rotas.extend(datas if todas_as_datas else datas[:1])
+    return rotas
+
+async def scrape_lote(rotas, filtrar_requisicoes=None, gravacao=None):
+    """
+    Coleta o gráfico de histórico de várias rotas ({"origem", "destino", "data"}) com um
+    único navegador e um pool limitado de páginas (PW_CONCORRENCIA, pool_paginas.py).
+    Retorna as linhas de todas as séries (serie_historico), com as datas dos pontos relativas
+    ao dia em que cada gráfico foi lido. Falhas em uma rota são registradas sem interromper
+    as demais; desfechos e duração de cada coleta entram nas métricas da execução.
+    """
+    desfechos = {"com_serie": 0, "sem_serie": 0, "falhas": 0}
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        async with PoolPaginas(browser) as pool:
+            resumo_plano(rotas, pool.tamanho, SEGUNDOS_POR_HISTORICO_ESTIMADOS)
 
-async def main():
-    # Exemplo de parâmetros:
-    origin = "REC"         # Aeroporto de Congonhas
-    destination = "GIG"    # Santos Dumont
-    flight_date = "2025-03-19"
-    await scrape(origin, destination, flight_date)
+            async def coletar(rota):
+                origem, destino, data_voo = rota["origem"], rota["destino"], rota["data"]
+                rotulos = {"etapa": "historico", "trecho": f"{origem} x {destino}"}
+                cronometro = CronometroEtapas()
+                with contexto_busca(trecho=rotulos["trecho"], data=data_voo):
+                    try:
+                        async with pool.pagina() as page:
+                            if filtro_habilitado(filtrar_requisicoes):
+                                await instalar_filtro(page)
+                            pontos = await coletar_historico(page, origem, destino, data_voo, cronometro, gravacao)
+                    except Exception:
+                        desfechos["falhas"] += 1
+                        metricas.incrementar("ff_buscas_total", desfecho="erro", **rotulos)
+                        raise
+                    finally:
+                        metricas.observar("ff_latencia_segundos", cronometro.total(), **rotulos)
+                        logger.debug("Tempos: %s", cronometro.resumo())
+                    serie = serie_historico(origem, destino, data_voo, pontos, hoje_busca())
+                    desfechos["com_serie" if serie else "sem_serie"] += 1
+                    metricas.incrementar("ff_buscas_total", desfecho="ok" if serie else "vazio", **rotulos)
+                    return serie
+
+            inicio = time.perf_counter()
+            series = await processar_fila(rotas, coletar, pool.tamanho)
+            logger.info("Históricos coletados: %d com pontos, %d sem pontos, %d com falha em %.1f s.",
+                        desfechos["com_serie"], desfechos["sem_serie"], desfechos["falhas"],
+                        time.perf_counter() - inicio)
+        await browser.close()
+    return [linha for serie in series if serie for linha in serie]
+
+def preparar_historico(cur):
+    """Cria a tabela com o preço de cada dia do gráfico, por trecho e data do voo."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS historico_precos (
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            data_voo DATE NOT NULL,
+            data_preco DATE NOT NULL,
+            preco INTEGER NOT NULL,
+            coletado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (origem, destino, data_voo, data_preco)
+        )
+    """)
+
+def gravar_historico(linhas, batch_size=None):
+    """
+    Grava as séries em 'historico_precos' em lotes (DB_BATCH_SIZE), com INSERT ... ON
+    CONFLICT DO UPDATE: o preço de um dia já gravado é substituído pelo da coleta mais
+    recente. Retorna {"inseridos": int, "atualizados": int}.
+    """
+    if batch_size is None:
+        batch_size = int(os.getenv("DB_BATCH_SIZE", DB_BATCH_SIZE_PADRAO))
+    # Um mesmo dia só pode aparecer uma vez por comando; prevalece o último ponto lido
+    por_chave = {(l["origem"], l["destino"], l["data_voo"], l["data_preco"]): l["preco"] for l in linhas}
+    if not por_chave:
+        return {"inseridos": 0, "atualizados": 0}
+
+    with conexao() as conn, conn.cursor() as cur:
+        preparar_historico(cur)
+        novos = execute_values(cur, """
+            INSERT INTO historico_precos (origem, destino, data_voo, data_preco, preco)
+            VALUES %s
+            ON CONFLICT (origem, destino, data_voo, data_preco)
+            DO UPDATE SET preco = EXCLUDED.preco, coletado_em = now()
+            RETURNING xmax = 0
+        """, [chave + (preco,) for chave, preco in por_chave.items()], page_size=batch_size, fetch=True)
+        conn.commit()
+
+    inseridos = sum(1 for (novo,) in novos if novo)
+    contagem = {"inseridos": inseridos, "atualizados": len(novos) - inseridos}
+    logger.info("%d pontos de histórico gravados: %d novos, %d atualizados.",
+                len(novos), contagem["inseridos"], contagem["atualizados"])
+    return contagem
+
+async def atualizar_historicos(entradas, todas_as_datas=False, gravar_banco=True, arquivo_csv=None):
+    """
+    Atualiza em uma execução o histórico de preços de todos os trechos do plano: monta as
+    rotas (rotas_historico), coleta os gráficos em lote (scrape_lote) e grava as séries no
+    banco e, opcionalmente, em um CSV.
+    """
+    rotas = rotas_historico(entradas, todas_as_datas)
+    linhas = await scrape_lote(rotas)
+    if not linhas:
+        logger.warning("Nenhum ponto de histórico coletado.")
+        return []
+    if arquivo_csv:
+        pd.DataFrame(linhas).to_csv(arquivo_csv, index=False, encoding="utf-8-sig")
+        logger.info("%d pontos do histórico salvos em '%s'.", len(linhas), arquivo_csv)
+    if gravar_banco:
+        gravar_historico(linhas)
+    return linhas
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Histórico de preços do Google Flights, em lote.")
+    parser.add_argument("--parametros", default="params_flights.json",
+                        help="plano com os trechos a atualizar (padrão params_flights.json)")
+    parser.add_argument("--rotas", nargs="+", metavar="ORIGEM-DESTINO",
+                        help="trechos a coletar, no lugar do arquivo de parâmetros")
+    parser.add_argument("--data", help="data do voo das --rotas (padrão: hoje + HISTORICO_ANTECEDENCIA_DIAS)")
+    parser.add_argument("--todas-as-datas", action="store_true",
+                        help="coleta um gráfico por data planejada, e não só a primeira de cada trecho")
+    parser.add_argument("--csv", help="também grava as séries neste arquivo CSV")
+    parser.add_argument("--sem-banco", action="store_true", help="não grava as séries no banco")
+    parser.add_argument("--gravacao", choices=("gravar", "reproduzir"),
+                        help="grava o tráfego de cada coleta em HAR ou o reproduz sem rede "
+                             "(gravacao_trafego.py); padrão PW_GRAVACAO")
+    args = parser.parse_args()
+    if args.gravacao:
+        os.environ["PW_GRAVACAO"] = args.gravacao
+    configurar_logging()
+
+    if args.rotas:
+        entradas = [{"rotas": args.rotas, **({"data": args.data} if args.data else {})}]
+    else:
+        with open(args.parametros, "r", encoding="utf-8") as f:
+            entradas = json.load(f)
+    try:
+        asyncio.run(atualizar_historicos(entradas, args.todas_as_datas, not args.sem_banco, args.csv))
+    finally:
+        fechar_pool()
+        logger.info("Métricas da execução gravadas em %s.", ", ".join(metricas.exportar("historico_precos")))
@@ -0,0 +1,147 @@
+import os
+import logging
+import argparse
+import datetime
+from zoneinfo import ZoneInfo
+
+from fuso_horario import FUSO_BUSCA
+from db_pg import (
+    conexao,
+    fechar_pool,
+    garantir_particoes,
+    inicio_do_mes,
+    listar_particoes,
+    observacoes_particionada,
+)
+from registro import configurar_logging
+
+logger = logging.getLogger(__name__)
+
+def carregar_retencao():
+    """
+    Lê as janelas de retenção das variáveis de ambiente:
+      - RETENCAO_MESES_BRUTOS: meses de observações brutas mantidos (padrão 6).
+      - RETENCAO_MESES_AGREGADOS: meses de agregados diários mantidos (padrão 0, sem limite).
+    """
+    return {
+        "meses_brutos": int(os.getenv("RETENCAO_MESES_BRUTOS", "6")),
+        "meses_agregados": int(os.getenv("RETENCAO_MESES_AGREGADOS", "0")),
+    }
+
+def preparar_agregados(cur):
+    """
+    Cria a tabela de agregados diários por trecho e data do voo, se não existir.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS observacoes_diarias (
+            trecho_id INTEGER NOT NULL REFERENCES trechos (id),
+            data_voo DATE NOT NULL,
+            dia DATE NOT NULL,
+            preco_min INTEGER,
+            preco_mediana NUMERIC(10, 2),
+            preco_max INTEGER,
+            observacoes INTEGER NOT NULL,
+            PRIMARY KEY (trecho_id, data_voo, dia)
+        )
+    """)
+
+def agregar_particao(cur, particao):
+    """
+    Resume uma partição de 'observacoes' em preço mínimo, mediano e máximo por trecho, data
+    do voo e dia de busca, preservando a evolução do preço de cada voo. As partições começam
+    à meia-noite de FUSO_BUSCA, então cada dia fica inteiro em uma única partição e reexecutar
+    a agregação apenas regrava os mesmos valores.
+    Retorna o número de linhas diárias gravadas.
+    """
+    cur.execute(f"""
+        INSERT INTO observacoes_diarias (trecho_id, data_voo, dia, preco_min, preco_mediana, preco_max, observacoes)
+        SELECT
+            trecho_id,
+            data_voo,
+            (buscado_em AT TIME ZONE '{FUSO_BUSCA}')::date,
+            MIN(preco),
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY preco),
+            MAX(preco),
+            COUNT(*)
+        FROM {particao}
+        GROUP BY 1, 2, 3
+        ON CONFLICT (trecho_id, data_voo, dia) DO UPDATE SET
+            preco_min = EXCLUDED.preco_min,
+            preco_mediana = EXCLUDED.preco_mediana,
+            preco_max = EXCLUDED.preco_max,
+            observacoes = EXCLUDED.observacoes
+    """)
+    return cur.rowcount
+
+def aplicar_retencao(meses_brutos=None, meses_agregados=None, simular=False):
+    """
+    Rotina de manutenção do armazenamento de observações:
+      1. Garante as partições do mês atual e dos próximos meses.
+      2. Para cada partição inteiramente anterior à janela de `meses_brutos` meses, grava os
+         agregados diários em 'observacoes_diarias' e remove a partição, na mesma transação.
+      3. Remove os agregados anteriores à janela de `meses_agregados` meses (0 = sem limite).
+
+    Com simular=True, apenas lista o que seria feito.
+    """
+    retencao = carregar_retencao()
+    if meses_brutos is None:
+        meses_brutos = retencao["meses_brutos"]
+    if meses_agregados is None:
+        meses_agregados = retencao["meses_agregados"]
+    agora = datetime.datetime.now(ZoneInfo(FUSO_BUSCA))
+    corte_brutos = inicio_do_mes(agora, -meses_brutos)
+
+    with conexao() as conn, conn.cursor() as cur:
+        if not observacoes_particionada(cur):
+            logger.warning("'observacoes' não é particionada; execute migracao_db.py antes da manutenção.")
+            return
+        preparar_agregados(cur)
+        if not simular:
+            garantir_particoes(cur)
+        conn.commit()
+        expiradas = [
+            nome for nome, _, fim in listar_particoes(cur)
+            if fim is not None and fim <= corte_brutos
+        ]
+
+    logger.info("Corte das observações brutas: %s (%d partição(ões) expirada(s)).",
+                corte_brutos.date(), len(expiradas))
+    for particao in expiradas:
+        if simular:
+            logger.info("(simulação) Agregaria e removeria a partição %s.", particao)
+            continue
+        with conexao() as conn, conn.cursor() as cur:
+            linhas = agregar_particao(cur, particao)
+            cur.execute(f"DROP TABLE {particao}")
+            conn.commit()
+        logger.info("Partição %s agregada em %d linha(s) diária(s) e removida.", particao, linhas)
+
+    if meses_agregados > 0:
+        corte_agregados = inicio_do_mes(agora, -meses_agregados).date()
+        if simular:
+            logger.info("(simulação) Removeria agregados anteriores a %s.", corte_agregados)
+            return
+        with conexao() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM observacoes_diarias WHERE dia < %s", (corte_agregados,))
+            removidos = cur.rowcount
+            conn.commit()
+        logger.info("%d agregado(s) diário(s) anteriores a %s removido(s).", removidos, corte_agregados)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Agrega e remove partições antigas de 'observacoes' conforme a retenção configurada."
+    )
+    parser.add_argument("--meses-brutos", type=int, default=None,
+                        help="Meses de observações brutas mantidos (padrão: RETENCAO_MESES_BRUTOS ou 6).")
+    parser.add_argument("--meses-agregados", type=int, default=None,
+                        help="Meses de agregados diários mantidos, 0 = sem limite (padrão: RETENCAO_MESES_AGREGADOS ou 0).")
+    parser.add_argument("--simular", action="store_true", help="Apenas mostra o que seria feito.")
+    args = parser.parse_args()
+    configurar_logging()
+    try:
+        aplicar_retencao(args.meses_brutos, args.meses_agregados, args.simular)
+    finally:
+        fechar_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+
+# Limites (s) dos baldes dos histogramas de latência: de acertos de cache a navegações lentas
+LIMITES_LATENCIA = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+# Descrição (# HELP) e tipo de cada métrica exportada
+METRICAS = {
+    "ff_buscas_total": ("counter", "Buscas concluídas por etapa, trecho e desfecho (ok, vazio, erro)."),
+    "ff_retentativas_total": ("counter", "Novas tentativas de busca após uma falha ou resultado vazio."),
+    "ff_latencia_segundos": ("histogram", "Duração de cada tentativa de busca, por etapa e trecho."),
+    "ff_etapa_segundos": ("histogram", "Duração das etapas do scraping (navegação, espera, extração...)."),
+    "ff_db_linhas_total": ("counter", "Linhas enviadas ao banco, por desfecho (inseridos, ignorados)."),
+    "ff_db_gravacao_segundos": ("histogram", "Duração de cada chamada a salva_resultados_em_db."),
+    "ff_execucao_duracao_segundos": ("gauge", "Duração da execução do script."),
+    "ff_execucao_timestamp_segundos": ("gauge", "Momento (epoch) em que a execução terminou."),
+}
+
+def _rotulos(rotulos):
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+def _texto_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    escapar = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{chave}="{escapar(valor)}"' for chave, valor in pares) + "}"
+
+def _quantil(limites, contagens, total, q):
+    """
+    Estima o quantil q a partir dos baldes (não cumulativos), interpolando linearmente dentro
+    do balde, como o histogram_quantile do Prometheus. Acima do último limite, devolve o limite.
+    """
+    if total == 0:
+        return None
+    alvo = q * total
+    acumulado = 0
+    for i, contagem in enumerate(contagens):
+        if acumulado + contagem >= alvo and contagem:
+            if i == len(limites):
+                return limites[-1]
+            inferior = limites[i - 1] if i else 0.0
+            return round(inferior + (limites[i] - inferior) * (alvo - acumulado) / contagem, 4)
+        acumulado += contagem
+    return limites[-1]
+
+class _Histograma:
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self, limites):
+        # Um balde por limite e um último para os valores acima do maior limite (+Inf)
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+class Metricas:
+    """
+    Contadores, gauges e histogramas de latência de uma execução, identificados pelo nome e
+    pelos rótulos (etapa, trecho, desfecho...). Ao final da execução, exportar() grava o
+    formato texto do Prometheus (para o textfile collector do node_exporter) e um resumo JSON.
+
+    Exemplo:
+        metricas.incrementar("ff_buscas_total", etapa="search_flights", trecho="GRU x GIG", desfecho="ok")
+        with metricas.cronometrar("ff_latencia_segundos", etapa="search_flights", trecho="GRU x GIG"):
+            ...
+    """
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        self.inicio = time.perf_counter()
+        self._contadores = {}
+        self._gauges = {}
+        self._histogramas = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, _rotulos(rotulos))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        with self._lock:
+            self._gauges[(nome, _rotulos(rotulos))] = valor
+
+    def observar(self, nome, segundos, **rotulos):
+        chave = (nome, _rotulos(rotulos))
+        i = 0
+        while i < len(self.limites) and segundos > self.limites[i]:
+            i += 1
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = _Histograma(self.limites)
+            histograma.contagens[i] += 1
+            histograma.soma += segundos
+            histograma.total += 1
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        """Observa em `nome` a duração do bloco, mesmo que ele termine com exceção."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def reiniciar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._gauges.clear()
+            self._histogramas.clear()
+            self.inicio = time.perf_counter()
+
+    def texto_prometheus(self, rotulos_fixos=None):
+        """
+        Retorna as métricas no formato texto de exposição do Prometheus. `rotulos_fixos`
+        (dict) são acrescentados a todas as séries.
+        """
+        fixos = rotulos_fixos or {}
+        com_fixos = lambda rotulos: _rotulos({**dict(rotulos), **fixos}) if fixos else rotulos
+        with self._lock:
+            series = {}
+            for (nome, rotulos), valor in self._contadores.items():
+                series.setdefault(nome, []).append((com_fixos(rotulos), valor))
+            for (nome, rotulos), valor in self._gauges.items():
+                series.setdefault(nome, []).append((com_fixos(rotulos), valor))
+            for (nome, rotulos), histograma in self._histogramas.items():
+                series.setdefault(nome, []).append(
+                    (com_fixos(rotulos), (list(histograma.contagens), histograma.soma, histograma.total))
+                )
+
+        linhas = []
+        for nome in sorted(series):
+            tipo, descricao = METRICAS.get(nome, ("untyped", ""))
+            if descricao:
+                linhas.append(f"# HELP {nome} {descricao}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, valor in sorted(series[nome]):
+                if tipo != "histogram":
+                    linhas.append(f"{nome}{_texto_rotulos(rotulos)} {valor!r}")
+                    continue
+                contagens, soma, total = valor
+                acumulado = 0
+                for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+                    acumulado += contagem
+                    le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                    linhas.append(f"{nome}_bucket{_texto_rotulos(rotulos, [('le', le)])} {acumulado}")
+                linhas.append(f"{nome}_sum{_texto_rotulos(rotulos)} {soma:.6f}")
+                linhas.append(f"{nome}_count{_texto_rotulos(rotulos)} {total}")
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self):
+        """
+        Resumo JSON-serializável: contadores e gauges com seus rótulos e, para cada histograma,
+        contagem, soma, média e os quantis p50, p95 e p99 estimados pelos baldes.
+        """
+        with self._lock:
+            contadores = [
+                {"metrica": nome, **dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(self._contadores.items())
+            ]
+            gauges = [
+                {"metrica": nome, **dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(self._gauges.items())
+            ]
+            histogramas = [
+                {
+                    "metrica": nome,
+                    **dict(rotulos),
+                    "contagem": h.total,
+                    "soma_s": round(h.soma, 4),
+                    "media_s": round(h.soma / h.total, 4) if h.total else None,
+                    **{
+                        f"p{int(q * 100)}_s": _quantil(self.limites, h.contagens, h.total, q)
+                        for q in (0.5, 0.95, 0.99)
+                    },
+                }
+                for (nome, rotulos), h in sorted(self._histogramas.items(), key=lambda item: item[0])
+            ]
+        return {"contadores": contadores, "gauges": gauges, "histogramas": histogramas}
+
+    def exportar(self, script, diretorio=None):
+        """
+        Grava metricas_<script>.prom (formato texto do Prometheus) e metricas_<script>.json
+        no diretório METRICAS_DIR (padrão: diretório atual), substituindo os da execução
+        anterior. Cada arquivo é escrito em um temporário e renomeado, para que um coletor
+        nunca leia um arquivo pela metade. Todas as séries do .prom levam o rótulo
+        script="<script>": o coletor textfile do node_exporter rejeita séries repetidas entre
+        arquivos, e os scripts registram as mesmas métricas. Retorna os caminhos gravados.
+        """
+        diretorio = diretorio or os.getenv("METRICAS_DIR", ".")
+        os.makedirs(diretorio, exist_ok=True)
+        rotulo_script = {"script": script}
+        self.definir("ff_execucao_duracao_segundos", round(time.perf_counter() - self.inicio, 3), **rotulo_script)
+        self.definir("ff_execucao_timestamp_segundos", int(time.time()), **rotulo_script)
+
+        resumo = {
+            "script": script,
+            "encerrada_em": datetime.datetime.now().isoformat(timespec="seconds"),
+            **self.resumo(),
+        }
+        caminhos = []
+        for extensao, conteudo in (
+            ("prom", self.texto_prometheus(rotulo_script)),
+            ("json", json.dumps(resumo, ensure_ascii=False, indent=2)),
+        ):
+            caminho = os.path.join(diretorio, f"metricas_{script}.{extensao}")
+            temporario = caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+            caminhos.append(caminho)
+        return caminhos
+
+# Métricas do processo, compartilhadas pelos módulos de busca e gravação
+metricas = Metricas()
@@ -0,0 +1,235 @@
+import logging
+import argparse
+import time
+import datetime
+
+from fuso_horario import FUSO_BUSCA
+from db_pg import (
+    COLUNAS_CHAVE_OBSERVACOES,
+    COLUNAS_RESULTADO,
+    TABELAS_LOOKUP,
+    conexao,
+    fechar_pool,
+    garantir_chave_natural,
+    garantir_particoes,
+    schema_tipado,
+    sql_insere_observacoes,
+)
+from registro import configurar_logging
+
+logger = logging.getLogger(__name__)
+
+# Tamanho padrão do intervalo de ids copiado por transação no backfill
+LOTE_PADRAO = 5000
+
+# Nome da tabela legada depois da finalização (mantida para conferência/rollback)
+TABELA_LEGADA = "resultados2_legado"
+
+def preparar(cur):
+    """
+    Cria as tabelas de lookup, a tabela tipada 'observacoes' (com as partições mensais
+    necessárias para os dados legados), seus índices e a tabela de controle do backfill.
+    Pode ser executada várias vezes.
+    """
+    for tabela, _ in TABELAS_LOOKUP:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabela} (
+                id SERIAL PRIMARY KEY,
+                nome TEXT NOT NULL UNIQUE
+            )
+        """)
+    _criar_observacoes(cur)
+    if not schema_tipado(cur):
+        # Cria de antemão as partições dos meses já presentes na tabela legada
+        cur.execute(r"""
+            SELECT MIN(data_busca) FROM resultados2
+            WHERE data_busca ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'
+        """)
+        primeira_busca = cur.fetchone()[0]
+        desde = datetime.date.fromisoformat(primeira_busca) if primeira_busca else None
+        garantir_particoes(cur, desde=desde)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS migracao_progresso (
+            nome TEXT PRIMARY KEY,
+            ultimo_id BIGINT NOT NULL
+        )
+    """)
+    cur.execute("""
+        INSERT INTO migracao_progresso (nome, ultimo_id) VALUES ('resultados2', 0)
+        ON CONFLICT (nome) DO NOTHING
+    """)
+
+def _criar_observacoes(cur):
+    """
+    Cria a tabela 'observacoes', particionada por intervalo (mensal) de buscado_em, e seus
+    índices. Como a chave de partição precisa fazer parte dos índices únicos, a chave natural
+    inclui buscado_em e o id não é chave primária.
+    """
+    cur.execute("CREATE SEQUENCE IF NOT EXISTS observacoes_id_seq")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS observacoes (
+            id BIGINT NOT NULL DEFAULT nextval('observacoes_id_seq'),
+            trecho_id INTEGER NOT NULL REFERENCES trechos (id),
+            data_voo DATE NOT NULL,
+            hora_partida TEXT,
+            hora_chegada TEXT,
+            preco INTEGER,
+            companhia_id INTEGER REFERENCES companhias (id),
+            buscado_em TIMESTAMPTZ NOT NULL,
+            regiao_id INTEGER REFERENCES regioes (id),
+            distancia_km NUMERIC(8, 2)
+        ) PARTITION BY RANGE (buscado_em)
+    """)
+    cur.execute("ALTER SEQUENCE observacoes_id_seq OWNED BY observacoes.id")
+    # A chave natural atende também às consultas por rota/data do voo e à deduplicação
+    # do ON CONFLICT DO NOTHING
+    garantir_chave_natural(cur, "observacoes", "observacoes_chave_natural", COLUNAS_CHAVE_OBSERVACOES)
+    cur.execute("CREATE INDEX IF NOT EXISTS observacoes_buscado_em ON observacoes (buscado_em)")
+
+def _copiar_intervalo(cur, tabela_origem, inicio, fim):
+    """
+    Copia os registros com inicio < id <= fim da tabela legada para o schema tipado.
+    Retorna o número de observações inseridas.
+    """
+    for tabela, indice in TABELAS_LOOKUP:
+        coluna = COLUNAS_RESULTADO[indice].lower()
+        cur.execute(f"""
+            INSERT INTO {tabela} (nome)
+            SELECT DISTINCT {coluna} FROM {tabela_origem}
+            WHERE id > %s AND id <= %s AND {coluna} IS NOT NULL
+            ON CONFLICT (nome) DO NOTHING
+        """, (inicio, fim))
+    cur.execute(
+        sql_insere_observacoes(
+            f"(SELECT * FROM {tabela_origem} WHERE id > %(inicio)s AND id <= %(fim)s) AS src"
+        ),
+        {"inicio": inicio, "fim": fim},
+    )
+    inseridos = cur.rowcount
+    cur.execute("UPDATE migracao_progresso SET ultimo_id = %s WHERE nome = 'resultados2'", (fim,))
+    return inseridos
+
+def backfill(lote=LOTE_PADRAO, pausa=0.0):
+    """
+    Copia 'resultados2' para o schema tipado em intervalos de `lote` ids, cada um em sua
+    própria transação, de modo que os scripts de automação possam continuar gravando na
+    tabela legada durante a migração. O progresso fica em 'migracao_progresso', então uma
+    execução interrompida continua de onde parou. `pausa` (segundos) espaça os lotes para
+    limitar a carga no servidor.
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ultimo_id FROM migracao_progresso WHERE nome = 'resultados2'")
+        ultimo_id = cur.fetchone()[0]
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM resultados2")
+        max_id = cur.fetchone()[0]
+        conn.commit()
+
+    logger.info("Backfill de resultados2: ids %d a %d, lotes de %d.", ultimo_id + 1, max_id, lote)
+    total = 0
+    while ultimo_id < max_id:
+        fim = min(ultimo_id + lote, max_id)
+        with conexao() as conn, conn.cursor() as cur:
+            inseridos = _copiar_intervalo(cur, "resultados2", ultimo_id, fim)
+            conn.commit()
+        total += inseridos
+        logger.info("Ids %d-%d: %d observações copiadas.", ultimo_id + 1, fim, inseridos)
+        ultimo_id = fim
+        if pausa:
+            time.sleep(pausa)
+    logger.info("Backfill concluído: %d observações copiadas.", total)
+    return total
+
+def finalizar():
+    """
+    Conclui a migração em uma única transação: bloqueia gravações em 'resultados2', copia os
+    registros que chegaram depois do backfill, renomeia a tabela para 'resultados2_legado' e
+    cria a view 'resultados2' com as colunas antigas sobre o schema tipado. A partir daí,
+    db_pg.salva_resultados_em_db grava direto em 'observacoes'.
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute("LOCK TABLE resultados2 IN EXCLUSIVE MODE")
+        cur.execute("SELECT ultimo_id FROM migracao_progresso WHERE nome = 'resultados2'")
+        ultimo_id = cur.fetchone()[0]
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM resultados2")
+        max_id = cur.fetchone()[0]
+        restantes = _copiar_intervalo(cur, "resultados2", ultimo_id, max_id) if max_id > ultimo_id else 0
+        logger.info("%d observações copiadas na finalização.", restantes)
+        cur.execute(f"ALTER TABLE resultados2 RENAME TO {TABELA_LEGADA}")
+        criar_view_resultados(cur)
+        conn.commit()
+    logger.info("Migração finalizada. Tabela antiga preservada como '%s'.", TABELA_LEGADA)
+
+def criar_view_resultados(cur):
+    """
+    (Re)cria a view 'resultados2' com as mesmas colunas da tabela legada, agora tipadas,
+    mais a coluna buscado_em (TIMESTAMPTZ) para filtros por período.
+    """
+    cur.execute(f"""
+        CREATE OR REPLACE VIEW resultados2 AS
+        SELECT
+            o.id,
+            t.nome AS trecho,
+            o.data_voo,
+            o.hora_partida,
+            o.hora_chegada,
+            o.preco,
+            c.nome AS companhia,
+            to_char(o.data_voo, 'FMDay') AS dia_semana_voo,
+            (o.buscado_em AT TIME ZONE '{FUSO_BUSCA}')::date AS data_busca,
+            (o.buscado_em AT TIME ZONE '{FUSO_BUSCA}')::time(0) AS horario_busca,
+            to_char(o.buscado_em AT TIME ZONE '{FUSO_BUSCA}', 'FMDay') AS dia_semana_busca,
+            r.nome AS regiao_origem,
+            o.distancia_km,
+            o.buscado_em
+        FROM observacoes o
+        JOIN trechos t ON t.id = o.trecho_id
+        LEFT JOIN companhias c ON c.id = o.companhia_id
+        LEFT JOIN regioes r ON r.id = o.regiao_id
+    """)
+
+def migrar(lote=LOTE_PADRAO, pausa=0.0):
+    """
+    Executa todas as etapas: preparar, backfill e finalizar.
+    Não faz nada se a base já estiver migrada.
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        ja_migrada = schema_tipado(cur)
+        if not ja_migrada:
+            preparar(cur)
+        conn.commit()
+    if ja_migrada:
+        logger.info("A base já utiliza o schema tipado.")
+        return
+    backfill(lote, pausa)
+    finalizar()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migra 'resultados2' para o schema tipado (DATE/TIMESTAMPTZ/NUMERIC, lookups e índices)."
+    )
+    parser.add_argument(
+        "etapa", nargs="?", default="migrar",
+        choices=["migrar", "preparar", "backfill", "finalizar"],
+        help="Etapa a executar (padrão: todas, em sequência).",
+    )
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="Ids copiados por transação no backfill.")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos de pausa entre os lotes do backfill.")
+    args = parser.parse_args()
+    configurar_logging()
+
+    try:
+        if args.etapa == "preparar":
+            with conexao() as conn, conn.cursor() as cur:
+                preparar(cur)
+                conn.commit()
+        elif args.etapa == "backfill":
+            backfill(args.lote, args.pausa)
+        elif args.etapa == "finalizar":
+            finalizar()
+        else:
+            migrar(args.lote, args.pausa)
+    finally:
+        fechar_pool()
+
+if __name__ == "__main__":
+    main()
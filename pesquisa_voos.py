@@ -1,8 +1,46 @@
+import os
+import asyncio
+
+import httpx
 from fast_flights import FlightData, Passengers, Result, get_flights_from_filter, get_flights, TFSData, create_filter
+from fast_flights.core import parse_response
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-def search_flights(date: str, origem: str, destino: str) -> Result:
+from cache_voos import cache_habilitado, cache_padrao, chave_filtro
+from coalescencia import SingleFlight, SingleFlightAsync
+
+URL_BASE_GOOGLE = "https://www.google.com"
+URL_GOOGLE_FLIGHTS = URL_BASE_GOOGLE + "/travel/flights"
+
+def url_google_flights():
+    """
+    URL de busca usada por search_flights_async. A variável GOOGLE_FLIGHTS_URL_BASE troca o
+    endereço do Google por outro (ex.: http://127.0.0.1:8800, o servidor simulado de
+    benchmarks/servidor_simulado.py), mantendo o caminho /travel/flights.
+    """
+    return os.getenv("GOOGLE_FLIGHTS_URL_BASE", URL_BASE_GOOGLE).rstrip("/") + "/travel/flights"
+
+# Cabeçalhos de navegador enviados pelo cliente assíncrono
+CABECALHOS_HTTP = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Buscas ao Google em andamento neste processo, por chave de filtro
+_buscas_em_andamento = SingleFlight()
+_buscas_async_em_andamento = SingleFlightAsync()
+
+# Cliente HTTP assíncrono compartilhado (conexões keep-alive reaproveitadas entre buscas)
+_cliente_http = None
+
+def search_flights(date: str, origem: str, destino: str, seat: str = "economy", adultos: int = 1,
+                   criancas: int = 0, bebes_assento: int = 0, bebes_colo: int = 0, max_stops: int = 2,
+                   usar_cache: bool = True) -> Result:
     """
     Busca voos com base na data, aeroporto de origem e aeroporto de destino.
 
@@ -10,21 +48,35 @@ def search_flights(date: str, origem: str, destino: str) -> Result:
         date (str): Data do voo no formato YYYY-MM-DD.
         origem (str): Código do aeroporto de origem.
         destino (str): Código do aeroporto de destino.
+        seat (str): Classe do assento (padrão "economy").
+        adultos, criancas, bebes_assento, bebes_colo (int): Passageiros.
+        max_stops (int): Número máximo de paradas.
+        usar_cache (bool): Se False, ignora o cache e sempre consulta o Google.
+
+    Resultados recentes da mesma busca são servidos do cache persistente (cache_voos.py),
+    sem nova requisição, enquanto estiverem dentro do TTL configurado. Chamadas concorrentes
+    para a mesma busca são coalescidas em uma única requisição (coalescencia.py).
 
     Retorna:
         Result: Resultado da busca de voos.
     """
-    
-    '''    result: Result = get_flights(
-        flight_data=[
-            FlightData(date=date, from_airport=origem, to_airport=destino)
-        ],
-        trip="one-way",
-        seat="economy",
-        passengers=Passengers(adults=1, children=0, infants_in_seat=0, infants_on_lap=0),
-        fetch_mode="fallback",
-    )'''
-    filter: TFSData = create_filter(
+    passageiros = (adultos, criancas, bebes_assento, bebes_colo)
+    chave = chave_filtro(date, origem, destino, seat, passageiros, max_stops)
+    cache = cache_padrao() if usar_cache and cache_habilitado() else None
+    if cache is not None:
+        result = cache.obter(chave)
+        if result is not None:
+            return result
+
+    # Buscas idênticas disparadas ao mesmo tempo (várias threads ou sessões do Streamlit)
+    # compartilham uma única requisição ao Google
+    return _buscas_em_andamento.executar(
+        chave, _buscar_e_guardar, chave, cache, date, origem, destino, seat, passageiros, max_stops
+    )
+
+def _montar_filtro(date, origem, destino, seat, passageiros, max_stops) -> TFSData:
+    adultos, criancas, bebes_assento, bebes_colo = passageiros
+    return create_filter(
         flight_data=[
             FlightData(
                 date=date,
@@ -33,17 +85,109 @@ def search_flights(date: str, origem: str, destino: str) -> Result:
             )
         ],
         trip="one-way",
-        passengers=Passengers(adults=1, children=0, infants_in_seat=0, infants_on_lap=0),
-        seat="economy",
-        max_stops=2,
+        passengers=Passengers(adults=adultos, children=criancas, infants_in_seat=bebes_assento, infants_on_lap=bebes_colo),
+        seat=seat,
+        max_stops=max_stops,
     )
-    filter.as_b64()  # Base64-encoded (bytes)
-    filter.to_string()  # Serialize to string
+
+def _buscar_e_guardar(chave, cache, date, origem, destino, seat, passageiros, max_stops):
+    filter = _montar_filtro(date, origem, destino, seat, passageiros, max_stops)
     result = get_flights_from_filter(filter)
-    
 
+    if cache is not None:
+        cache.gravar(chave, result)
     return result
 
+def parametros_filtro(filter: TFSData, moeda: str = "") -> dict:
+    """Parâmetros da URL de busca para o filtro TFS, os mesmos usados por get_flights_from_filter."""
+    return {"tfs": filter.as_b64().decode("utf-8"), "hl": "en", "tfu": "EgQIABABIgA", "curr": moeda}
+
+class _RespostaHTML:
+    """Adapta o corpo HTML recebido pelo httpx à resposta do primp esperada pelo parser do fast_flights."""
+
+    def __init__(self, texto):
+        self.text = texto
+        # O fast_flights inclui text_markdown na mensagem de "No flights found"; a página
+        # inteira iria para o log a cada trecho sem voos
+        self.text_markdown = ""
+
+def cliente_http():
+    """
+    Retorna o cliente HTTP assíncrono compartilhado, criando-o na primeira chamada. O pool de
+    conexões é configurado por FF_HTTP_MAX_CONEXOES (padrão 100) e o tempo limite de cada
+    requisição por FF_HTTP_TIMEOUT (segundos, padrão 30). Deve ser usado sempre no mesmo event loop.
+    """
+    global _cliente_http
+    if _cliente_http is None or _cliente_http.is_closed:
+        max_conexoes = int(os.getenv("FF_HTTP_MAX_CONEXOES", "100"))
+        _cliente_http = httpx.AsyncClient(
+            headers=CABECALHOS_HTTP,
+            timeout=float(os.getenv("FF_HTTP_TIMEOUT", "30")),
+            limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes),
+            follow_redirects=True,
+        )
+    return _cliente_http
+
+async def fechar_cliente_http():
+    """Fecha o cliente HTTP compartilhado e suas conexões (chamar ao final do event loop)."""
+    global _cliente_http
+    if _cliente_http is not None:
+        await _cliente_http.aclose()
+        _cliente_http = None
+
+async def search_flights_async(date: str, origem: str, destino: str, seat: str = "economy", adultos: int = 1,
+                               criancas: int = 0, bebes_assento: int = 0, bebes_colo: int = 0, max_stops: int = 2,
+                               usar_cache: bool = True) -> Result:
+    """
+    Versão assíncrona de search_flights, com os mesmos parâmetros, cache e coalescência.
+
+    Monta o mesmo filtro TFS e faz a requisição pelo cliente HTTP compartilhado
+    (cliente_http()), de modo que centenas de buscas concorrentes usam um único event loop e
+    um pool de conexões keep-alive, sem uma thread por busca. A conversão do HTML no
+    resultado roda fora do event loop (asyncio.to_thread), com o mesmo parser do fast_flights.
+
+    Diferente do caminho síncrono, a requisição não passa pelo primp e, portanto, não imita a
+    impressão digital TLS/HTTP2 do Chrome: só os cabeçalhos (CABECALHOS_HTTP) são de navegador.
+    O primp.AsyncClient da versão usada (0.14) apenas executa o cliente síncrono em um pool de
+    threads, o que anularia o ganho da busca assíncrona. Se o Google passar a recusar essas
+    requisições (429 ou páginas sem voos), use search_flights.
+
+    Levanta RuntimeError com o status HTTP no início da mensagem quando a resposta não é 200.
+    """
+    passageiros = (adultos, criancas, bebes_assento, bebes_colo)
+    chave = chave_filtro(date, origem, destino, seat, passageiros, max_stops)
+    cache = cache_padrao() if usar_cache and cache_habilitado() else None
+    if cache is not None:
+        result = cache.obter(chave)
+        if result is not None:
+            return result
+
+    return await _buscas_async_em_andamento.executar(
+        chave, _buscar_e_guardar_async, chave, cache, date, origem, destino, seat, passageiros, max_stops
+    )
+
+async def _buscar_e_guardar_async(chave, cache, date, origem, destino, seat, passageiros, max_stops):
+    filter = _montar_filtro(date, origem, destino, seat, passageiros, max_stops)
+    resposta = await cliente_http().get(url_google_flights(), params=parametros_filtro(filter))
+    if resposta.status_code != 200:
+        raise RuntimeError(f"{resposta.status_code} Result: {resposta.text[:200]}")
+    result = await asyncio.to_thread(parse_response, _RespostaHTML(resposta.text))
+
+    if cache is not None:
+        cache.gravar(chave, result)
+    return result
+
+def estatisticas_cache():
+    """Retorna os contadores do cache de buscas deste processo (acertos, falhas, remoções)."""
+    return cache_padrao().estatisticas()
+
+def estatisticas_coalescencia():
+    """Retorna quantas buscas foram executadas e quantas aproveitaram uma busca idêntica em andamento."""
+    estatisticas = _buscas_em_andamento.estatisticas()
+    for nome, valor in _buscas_async_em_andamento.estatisticas().items():
+        estatisticas[nome] += valor
+    return estatisticas
+
 
 
 
@@ -1,119 +1,184 @@
+import os
+import time
 import asyncio
-from datetime import date, timedelta
+import logging
 import pandas as pd
-import re
 
 from playwright.async_api import async_playwright
 
-# Função para coletar os voos de UM dia específico
-async def scrape_day(page, origin, destination, flight_date):
-    print(f"[DEBUG] Iniciando o scraping para a data: {flight_date}")
-    url = (
-        "https://www.google.com/travel/flights?hl=pt-BR&gl=BR&curr=BRL&q="
+from filtro_requisicoes import filtro_habilitado, instalar_filtro
+from prontidao import CronometroEtapas, timeouts_etapas
+from extracao_cartoes import definicao_seletores, extrair_cartoes, voo_mais_barato
+from captura_respostas import capturar_ofertas, modo_captura
+from gravacao_trafego import trafego_gravado
+from planejador import expandir_datas, resumo_plano
+from registro import configurar_logging, contexto_busca
+from metricas import metricas
+
+logger = logging.getLogger(__name__)
+
+URL_BASE_GOOGLE = "https://www.google.com"
+
+def url_busca(origin, destination, flight_date):
+    """
+    Monta a URL de busca one-way do Google Flights (pt-BR, preços em BRL). A variável
+    GOOGLE_FLIGHTS_URL_BASE troca o endereço do Google por outro, como o servidor simulado
+    de benchmarks/servidor_simulado.py.
+    """
+    base = os.getenv("GOOGLE_FLIGHTS_URL_BASE", URL_BASE_GOOGLE).rstrip("/")
+    return (
+        f"{base}/travel/flights?hl=pt-BR&gl=BR&curr=BRL&q="
         f"Flights%20to%20{destination}%20from%20{origin}%20on%20{flight_date}%20oneway"
     )
-    print(f"[INFO] Acessando: {url}")
-    print("[DEBUG] Iniciando o carregamento da página...")
-    await page.goto(url)
-    await page.wait_for_load_state("networkidle")
-    print("[DEBUG] Página carregada.")
-
-    selector = "li.pIav2d"
-    print("[DEBUG] Buscando pelo seletor dos cartões de voo...")
-    try:
-        await page.wait_for_selector(selector, timeout=3000)
-    except:
-        print(f"[WARN] Não encontrei nenhum voo na data {flight_date}.")
-        return None
-
-    flight_cards = await page.query_selector_all(selector)
-    print(f"[DEBUG] Encontrados {len(flight_cards)} cartões de voo.")
 
-    if not flight_cards:
-        print(f"[WARN] Nenhum cartão de voo encontrado em {flight_date}.")
+# Função para coletar os voos de UM dia específico
+async def scrape_day(page, origin, destination, flight_date, filtrar_requisicoes=None, cronometro=None,
+                     modo=None, gravacao=None):
+    """
+    Coleta o voo mais barato de um dia. Com filtrar_requisicoes=True (ou a variável de
+    ambiente PW_FILTRAR_REQUISICOES=1), imagens, fontes, mapas e telemetria são abortados
+    (filtro_requisicoes.py) e a economia da página é informada ao final.
+
+    Com modo="resposta" (ou PW_MODO_CAPTURA=resposta), as ofertas são lidas das respostas
+    de dados da página (captura_respostas.py) em vez dos cartões renderizados, considerando
+    todas as ofertas da busca.
+
+    Com gravacao="gravar" (ou PW_GRAVACAO=gravar), as respostas recebidas pela página são
+    salvas em um HAR por trecho e data; com "reproduzir", a página é servida por esse HAR,
+    sem acesso à rede, para testar a extração de forma determinística (gravacao_trafego.py).
+
+    O tempo de cada etapa (navegação, espera pelos cartões, pelos preços e extração) é
+    registrado em `cronometro` (um CronometroEtapas novo se não for informado) e registrado em
+    DEBUG ao final, com o trecho e a data no contexto das mensagens. A duração de cada etapa e da
+    chamada inteira também é observada nas métricas da execução (metricas.py).
+    """
+    estatisticas = None
+    if filtro_habilitado(filtrar_requisicoes):
+        estatisticas = await instalar_filtro(page)
+        estatisticas.reiniciar()
+    if cronometro is None:
+        cronometro = CronometroEtapas()
+    with contexto_busca(trecho=f"{origin} x {destination}", data=flight_date):
+        try:
+            async with trafego_gravado(page, "scrape_day", origin, destination, flight_date, gravacao):
+                if modo_captura(modo) == "resposta":
+                    return await _scrape_day_respostas(page, origin, destination, flight_date, cronometro)
+                return await _scrape_day_pagina(page, origin, destination, flight_date, cronometro)
+        finally:
+            trecho = f"{origin} x {destination}"
+            for etapa, segundos in cronometro.etapas.items():
+                metricas.observar("ff_etapa_segundos", segundos, etapa=etapa, trecho=trecho)
+            metricas.observar("ff_latencia_segundos", cronometro.total(), etapa="scrape_day", trecho=trecho)
+            logger.debug("Tempos: %s", cronometro.resumo())
+            if estatisticas is not None:
+                logger.debug("Filtro de requisições: %s", estatisticas.resumo())
+
+async def _scrape_day_respostas(page, origin, destination, flight_date, cronometro):
+    url = url_busca(origin, destination, flight_date)
+    logger.debug("Acessando (captura de respostas): %s", url)
+    ofertas = await capturar_ofertas(page, url, timeouts_etapas(), cronometro)
+    logger.debug("%d ofertas lidas das respostas de dados.", len(ofertas))
+    if not ofertas:
+        logger.debug("Nenhuma oferta encontrada nas respostas.")
         return None
+    mais_barata = min(ofertas, key=lambda oferta: oferta["preco"])
+    cheapest_flight_info = {
+        "data_voo": flight_date,
+        "dia_semana": "",
+        "horario_partida": mais_barata["horario_partida"] or "N/A",
+        "horario_chegada": mais_barata["horario_chegada"] or "N/A",
+        "companhia": mais_barata["companhia"] or "N/A",
+        "preco": float(mais_barata["preco"]),
+        "paradas": mais_barata["paradas"],
+        "duracao": mais_barata["duracao"],
+        "total_ofertas": len(ofertas),
+    }
+    logger.debug("Voo mais barato encontrado: %s", cheapest_flight_info)
+    return cheapest_flight_info
 
-    cheapest_flight_info = None
-    cheapest_price = float("inf")
-
-    for index, card in enumerate(flight_cards):
-        if index >= 5:  # Limitar a 10 cartões
-            break
-        print(f"[DEBUG] Processando cartão {index + 1} de {len(flight_cards)}")
+async def _scrape_day_pagina(page, origin, destination, flight_date, cronometro):
+    url = url_busca(origin, destination, flight_date)
+    timeouts = timeouts_etapas()
+    logger.debug("Acessando: %s", url)
+    # Em vez de esperar o networkidle (que pode não acontecer em uma página com telemetria
+    # contínua), cada etapa espera apenas o sinal do DOM de que a extração precisa.
+    with cronometro.etapa("navegacao"):
+        await page.goto(url, wait_until="domcontentloaded", timeout=timeouts["navegacao"])
+
+    definicao = definicao_seletores()
+    selector = definicao["cartao"]
+    with cronometro.etapa("resultados"):
         try:
-            departure_span = page.locator("span[aria-label*='Horário de partida']").first
-            departure_time = (await departure_span.inner_text()) if departure_span else "N/A"
-
-            arrival_span = page.locator("span[aria-label*='Horário de chegada']").first
-            arrival_time = (await arrival_span.inner_text()) if arrival_span else "N/A"
-
-            price_el = await card.query_selector("div.YMlIz FpEdX jLMuyc span")
-            if not price_el:
-                price_locator = page.locator("span[aria-label*='Reais brasileiros']").first
-                await price_locator.wait_for()
-                raw_price_text = await price_locator.inner_text()
-                price_el = page.locator(f"span:has-text('{raw_price_text}')").first
-                
-            
-            raw_price = await price_el.inner_text() if price_el else "N/A"
-            print(f"[DEBUG] Horário de partida: {departure_time}, Preço bruto: {raw_price}")
-
-            price_numeric = float("inf")
-            if "R$" in raw_price:
-                only_digits = "".join(ch for ch in raw_price if ch.isdigit())
-                if only_digits:
-                    price_numeric = float(only_digits)
-            only_digits = re.sub(r"\D", "", raw_price)  # ex.: "2250"
-            price_numeric = float(only_digits) if only_digits else float("inf")
-
-            airline_el = await card.query_selector("div.sSHqwe.tPgKwe.ogfYpf span")
-            airline = (await airline_el.inner_text()) if airline_el else "N/A"
-
-            if price_numeric < cheapest_price:
-                cheapest_price = price_numeric
-                cheapest_flight_info = {
-                    "data_voo": flight_date,
-                    "dia_semana": "",
-                    "horario_partida": departure_time,
-                    "horario_chegada": arrival_time,
-                    "companhia": airline,
-                    "preco": cheapest_price,
-                }
-        except Exception as e:
-            print(f"[DEBUG] Erro ao parsear um cartão: {e}")
-            continue
-
-        print(f"[DEBUG] Voo mais barato encontrado: {cheapest_flight_info}")
+            await page.wait_for_selector(selector, timeout=timeouts["resultados"])
+        except Exception:
+            logger.debug("Nenhum cartão de voo apareceu na página.")
+            return None
+    with cronometro.etapa("precos"):
+        try:
+            await page.wait_for_selector(
+                f"{selector} {definicao['campos']['preco']['seletor']}", timeout=timeouts["precos"]
+            )
+        except Exception:
+            logger.warning("Preços não preenchidos nos cartões; seguindo com o que há na página.")
+
+    with cronometro.etapa("extracao"):
+        # Todos os campos de todos os cartões vêm em uma única chamada ao navegador
+        cartoes = await extrair_cartoes(page, definicao)
+        logger.debug("Encontrados %d cartões de voo.", len(cartoes))
+
+        if not cartoes:
+            logger.debug("Nenhum cartão de voo encontrado.")
+            return None
+
+        mais_barato = voo_mais_barato(cartoes)
+        if not mais_barato:
+            logger.warning("Nenhum cartão com preço.")
+            return None
+
+        cheapest_flight_info = {
+            "data_voo": flight_date,
+            "dia_semana": "",
+            "horario_partida": mais_barato.get("horario_partida") or "N/A",
+            "horario_chegada": mais_barato.get("horario_chegada") or "N/A",
+            "companhia": mais_barato.get("companhia") or "N/A",
+            "preco": mais_barato["preco_numerico"],
+            "paradas": mais_barato.get("paradas"),
+            "duracao": mais_barato.get("duracao"),
+        }
+        logger.debug("Voo mais barato encontrado: %s", cheapest_flight_info)
     return cheapest_flight_info
 
 
-async def scrape_range(origin, destination, days_ahead=60):
-    today = date.today()
+async def scrape_range(origin, destination, days_ahead=60, pausa_ms=0, dias_semana=None):
+    """
+    Coleta o voo mais barato de cada dia entre hoje e `days_ahead` dias à frente, opcionalmente
+    apenas nos `dias_semana` informados (ex.: ["sex", "dom"]), reaproveitando a mesma página.
+    Cada data espera apenas pelos sinais de prontidão de scrape_day; `pausa_ms` permite,
+    opcionalmente, espaçar as buscas.
+    """
+    datas = expandir_datas({"proximos_dias": days_ahead, "dias_semana": dias_semana})
+    resumo_plano([{"origem": origin, "destino": destination, "data": d.isoformat()} for d in datas], 1, 10)
     all_data = []
+    inicio = time.perf_counter()
 
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
         page = await browser.new_page()
 
-        for i in range(days_ahead + 1):
-            target_date = today + timedelta(days=i)
-            #flight_date_str = target_date.strftime("%Y-%m-%d")
-            flight_date_str = "2025-05-22"
-            print(f"[DEBUG] Processando a data: {flight_date_str}")
-
+        for target_date in datas:
+            flight_date_str = target_date.strftime("%Y-%m-%d")
             flight_info = await scrape_day(page, origin, destination, flight_date_str)
             if flight_info:
                 flight_info["dia_semana"] = target_date.strftime("%A")
                 all_data.append(flight_info)
-                print(f"[DEBUG] Voo encontrado para {flight_date_str}: {flight_info}")
-            else:
-                print(f"[DEBUG] Nenhum voo encontrado para {flight_date_str}.")
 
-            await page.wait_for_timeout(2000)
+            if pausa_ms:
+                await page.wait_for_timeout(pausa_ms)
 
         await browser.close()
 
-    print(f"[DEBUG] Total de voos encontrados: {len(all_data)}")
+    logger.info("Datas coletadas (%s -> %s): %d com voo, %d sem voo em %.1f s.", origin, destination,
+                len(all_data), len(datas) - len(all_data), time.perf_counter() - inicio)
     return all_data
 
 
@@ -122,18 +187,18 @@ async def main():
     destination = "SDU"
     days_ahead = 0
 
-    print(f"[INFO] Iniciando coleta de {origin} para {destination} em até {days_ahead} dias...")
+    logger.info("Iniciando coleta de %s para %s em até %d dias...", origin, destination, days_ahead)
 
     results = await scrape_range(origin, destination, days_ahead)
-    print(f"[INFO] Coleta finalizada. {len(results)} dias encontrados com voos.")
 
     if results:
         df = pd.DataFrame(results)
-        print(f"[DEBUG] Dados coletados: {df.head()}")
+        logger.debug("Dados coletados: %s", df.head())
         df.to_csv("voos_proximos_60_dias.csv", index=False, encoding="utf-8-sig")
-        print("[INFO] Dados salvos em 'voos_proximos_60_dias.csv'.")
+        logger.info("Dados salvos em 'voos_proximos_60_dias.csv'.")
     else:
-        print("[WARN] Não foi encontrado nenhum voo (ou todos falharam).")
+        logger.warning("Não foi encontrado nenhum voo (ou todos falharam).")
 
 if __name__ == "__main__":
+    configurar_logging()
     asyncio.run(main())
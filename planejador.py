@@ -0,0 +1,121 @@
+import os
+import logging
+import datetime
+from itertools import product
+from zoneinfo import ZoneInfo
+
+from fuso_horario import FUSO_BUSCA
+
+logger = logging.getLogger(__name__)
+
+# Dias da semana aceitos em "dias_semana", no padrão de date.weekday() (segunda = 0)
+DIAS_SEMANA = {
+    "seg": 0, "segunda": 0,
+    "ter": 1, "terca": 1, "terça": 1,
+    "qua": 2, "quarta": 2,
+    "qui": 3, "quinta": 3,
+    "sex": 4, "sexta": 4,
+    "sab": 5, "sabado": 5, "sábado": 5,
+    "dom": 6, "domingo": 6,
+}
+
+def hoje_busca():
+    """Data de hoje no fuso em que as buscas são registradas."""
+    return datetime.datetime.now(ZoneInfo(FUSO_BUSCA)).date()
+
+def _lista(valor):
+    if valor is None:
+        return []
+    return valor if isinstance(valor, list) else [valor]
+
+def _dia_semana(valor):
+    if isinstance(valor, int):
+        return valor
+    try:
+        return DIAS_SEMANA[valor.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Dia da semana desconhecido: {valor}. Use seg, ter, qua, qui, sex, sab ou dom.")
+
+def expandir_trechos(entrada):
+    """
+    Retorna os pares (origem, destino) de uma entrada do plano. Aceita:
+      - "origem" e "destino", cada um um código ou uma lista de códigos (todas as combinações,
+        exceto origem igual ao destino);
+      - "rotas": lista de pares ["GRU", "GIG"] ou de textos "GRU-GIG".
+    """
+    trechos = []
+    for rota in _lista(entrada.get("rotas")):
+        origem, destino = rota.split("-") if isinstance(rota, str) else rota
+        trechos.append((origem.strip().upper(), destino.strip().upper()))
+    for origem, destino in product(_lista(entrada.get("origem")), _lista(entrada.get("destino"))):
+        if origem.upper() != destino.upper():
+            trechos.append((origem.strip().upper(), destino.strip().upper()))
+    return trechos
+
+def expandir_datas(entrada, hoje=None):
+    """
+    Retorna as datas de voo de uma entrada do plano, combinando:
+      - "data" ou "datas": datas avulsas (YYYY-MM-DD);
+      - "de" / "ate": intervalo fechado de datas ("de" é opcional e vale hoje quando omitido);
+      - "proximos_dias": janela relativa de hoje até N dias à frente (com "a_partir_de_dias"
+        opcional para começar alguns dias depois de hoje);
+      - "dias_semana": filtro opcional (ex.: ["sex", "dom"] ou [4, 6]).
+    Datas anteriores a hoje são descartadas.
+    """
+    hoje = hoje or hoje_busca()
+    datas = [datetime.date.fromisoformat(d) for d in _lista(entrada.get("data")) + _lista(entrada.get("datas"))]
+    if "de" in entrada or "ate" in entrada:
+        if "ate" not in entrada:
+            raise ValueError(f"Intervalo sem \"ate\" na entrada do plano: {entrada}")
+        inicio = datetime.date.fromisoformat(entrada.get("de", hoje.isoformat()))
+        fim = datetime.date.fromisoformat(entrada["ate"])
+        datas.extend(inicio + datetime.timedelta(days=i) for i in range((fim - inicio).days + 1))
+    if "proximos_dias" in entrada:
+        inicio = hoje + datetime.timedelta(days=int(entrada.get("a_partir_de_dias", 0)))
+        fim = hoje + datetime.timedelta(days=int(entrada["proximos_dias"]))
+        datas.extend(inicio + datetime.timedelta(days=i) for i in range((fim - inicio).days + 1))
+    dias_semana = {_dia_semana(d) for d in _lista(entrada.get("dias_semana"))}
+    return [d for d in datas if d >= hoje and (not dias_semana or d.weekday() in dias_semana)]
+
+def planejar(entradas, hoje=None):
+    """
+    Expande as entradas do plano (ex.: params_flights.json) em uma lista de buscas
+    {"origem", "destino", "data"} sem duplicatas e sem datas passadas, agrupada por trecho
+    (na ordem em que o trecho aparece pela primeira vez) e ordenada por data dentro de cada
+    trecho. Entradas no formato antigo, com origem, destino e data únicos, continuam válidas.
+    """
+    hoje = hoje or hoje_busca()
+    por_trecho = {}
+    for entrada in entradas:
+        datas = expandir_datas(entrada, hoje)
+        for trecho in expandir_trechos(entrada):
+            por_trecho.setdefault(trecho, set()).update(datas)
+    return agrupar_por_trecho(
+        {"origem": origem, "destino": destino, "data": data.isoformat()}
+        for (origem, destino), datas in por_trecho.items()
+        for data in datas
+    )
+
+def agrupar_por_trecho(buscas):
+    """
+    Reordena as buscas para que as do mesmo trecho fiquem juntas (trechos na ordem da primeira
+    ocorrência, datas em ordem crescente), aproveitando páginas, conexões e cache entre elas.
+    """
+    ordem_trechos = {}
+    buscas = list(buscas)
+    for busca in buscas:
+        ordem_trechos.setdefault((busca["origem"], busca["destino"]), len(ordem_trechos))
+    return sorted(buscas, key=lambda b: (ordem_trechos[(b["origem"], b["destino"])], b["data"]))
+
+def resumo_plano(buscas, concorrencia, segundos_por_busca):
+    """
+    Registra e retorna o número de buscas e de trechos e a duração estimada da execução:
+    buscas / concorrencia * segundos_por_busca. PLANO_SEGUNDOS_POR_BUSCA substitui a estimativa
+    por busca informada pelo script.
+    """
+    segundos_por_busca = float(os.getenv("PLANO_SEGUNDOS_POR_BUSCA", segundos_por_busca))
+    trechos = {(b["origem"], b["destino"]) for b in buscas}
+    estimativa = datetime.timedelta(seconds=round(len(buscas) / max(1, concorrencia) * segundos_por_busca))
+    logger.info("Plano: %d buscas em %d trechos; duração estimada %s (%d simultâneas, ~%g s por busca).",
+                len(buscas), len(trechos), estimativa, concorrencia, segundos_por_busca)
+    return {"buscas": len(buscas), "trechos": len(trechos), "duracao_estimada_s": estimativa.total_seconds()}
@@ -0,0 +1,114 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+class _Slot:
+    """Um contexto do navegador com sua página e o número de usos desde a criação."""
+    __slots__ = ("contexto", "pagina", "usos")
+
+    def __init__(self):
+        self.contexto = None
+        self.pagina = None
+        self.usos = 0
+
+class PoolPaginas:
+    """
+    Pool de páginas reutilizáveis do Playwright sobre um único navegador.
+
+    Cada uma das `tamanho` vagas mantém um contexto (BrowserContext) com uma página, criada
+    sob demanda. A página é emprestada com `async with pool.pagina() as page:` e devolvida ao
+    final; quem pede uma página com todas as vagas ocupadas espera na fila, o que limita a
+    concorrência e a memória do navegador. Depois de `usos_por_contexto` empréstimos, ou se
+    ocorrer uma exceção durante o uso, o contexto é fechado e recriado no próximo empréstimo.
+
+    Os padrões vêm das variáveis de ambiente PW_CONCORRENCIA (4) e PW_USOS_POR_CONTEXTO (20).
+    Opções extras são repassadas para browser.new_context().
+    """
+
+    def __init__(self, browser, tamanho=None, usos_por_contexto=None, **opcoes_contexto):
+        self.browser = browser
+        self.tamanho = tamanho or int(os.getenv("PW_CONCORRENCIA", "4"))
+        self.usos_por_contexto = usos_por_contexto or int(os.getenv("PW_USOS_POR_CONTEXTO", "20"))
+        self.opcoes_contexto = opcoes_contexto
+        self.contextos_criados = 0
+        self.emprestimos = 0
+        self._slots = [_Slot() for _ in range(self.tamanho)]
+        self._livres = asyncio.Queue()
+        for slot in self._slots:
+            self._livres.put_nowait(slot)
+
+    async def _abrir(self, slot):
+        slot.contexto = await self.browser.new_context(**self.opcoes_contexto)
+        slot.pagina = await slot.contexto.new_page()
+        slot.usos = 0
+        self.contextos_criados += 1
+
+    async def _fechar(self, slot):
+        contexto = slot.contexto
+        slot.contexto = None
+        slot.pagina = None
+        slot.usos = 0
+        if contexto is not None:
+            try:
+                await contexto.close()
+            except Exception as e:
+                logger.warning("Erro ao fechar o contexto do navegador: %s", e)
+
+    @asynccontextmanager
+    async def pagina(self):
+        """Empresta uma página do pool, esperando uma vaga livre se necessário."""
+        slot = await self._livres.get()
+        try:
+            if slot.contexto is None:
+                await self._abrir(slot)
+            self.emprestimos += 1
+            yield slot.pagina
+            slot.usos += 1
+            if slot.usos >= self.usos_por_contexto:
+                await self._fechar(slot)
+        except BaseException:
+            # O estado da página é desconhecido após uma falha; recria o contexto
+            await self._fechar(slot)
+            raise
+        finally:
+            self._livres.put_nowait(slot)
+
+    async def fechar(self):
+        """Fecha todos os contextos abertos pelo pool."""
+        for slot in self._slots:
+            await self._fechar(slot)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.fechar()
+
+async def processar_fila(itens, corrotina, trabalhadores):
+    """
+    Executa `corrotina(item)` para cada item usando uma fila consumida por `trabalhadores`
+    tarefas, em vez de disparar todas as chamadas de uma vez. Exceções de um item são
+    registradas e o resultado correspondente fica None.
+    Retorna os resultados na mesma ordem dos itens.
+    """
+    fila = asyncio.Queue()
+    for indice, item in enumerate(itens):
+        fila.put_nowait((indice, item))
+    resultados = [None] * len(itens)
+
+    async def trabalhador():
+        while True:
+            try:
+                indice, item = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                resultados[indice] = await corrotina(item)
+            except Exception as e:
+                logger.error("Falha ao processar %s: %s", item, e)
+
+    await asyncio.gather(*(trabalhador() for _ in range(max(1, min(trabalhadores, len(itens))))))
+    return resultados
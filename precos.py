@@ -0,0 +1,122 @@
+import re
+import math
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Textos que indicam preço indisponível
+_INDISPONIVEL = re.compile(r"unavailable|indispon[ií]vel", re.IGNORECASE)
+
+# Primeiro número do texto, com separadores de milhar/decimais. Em faixas de preço
+# ("R$ 1.234 – R$ 1.500") é o limite inferior.
+_NUMERO = re.compile(r"\d(?:[\d.,]*\d)?")
+
+# Números formados apenas por grupos de milhar: "1.234", "12.345.678", "1,234"
+_MILHAR_PONTO = re.compile(r"\d{1,3}(?:\.\d{3})+")
+_MILHAR_VIRGULA = re.compile(r"\d{1,3}(?:,\d{3})+")
+
+# Número já normalizado, pronto para float(); textos como "1,2,3" ou "12.34.567" não chegam a
+# esse formato e resultam em None
+_NORMALIZADO = re.compile(r"\d+(?:\.\d+)?")
+
+def _separador_decimal(numero):
+    """
+    Decide o separador decimal de um número já extraído do texto:
+      - com ponto e vírgula, o que aparece por último é o decimal ("1.234,56", "1,234.56");
+      - só com um tipo de separador, ele é de milhar quando separa grupos de exatamente três
+        dígitos ("1.234", "1,234") e decimal nos demais casos ("12,5", "99.90").
+    Retorna ",", "." ou None (número sem parte decimal).
+    """
+    ponto = numero.rfind(".")
+    virgula = numero.rfind(",")
+    if ponto >= 0 and virgula >= 0:
+        return "." if ponto > virgula else ","
+    if virgula >= 0:
+        return None if _MILHAR_VIRGULA.fullmatch(numero) else ","
+    if ponto >= 0:
+        return None if _MILHAR_PONTO.fullmatch(numero) else "."
+    return None
+
+def normalizar_preco(valor):
+    """
+    Converte um preço em número (float), nos formatos usados pelo Google Flights e pelos
+    pipelines: "R$ 1.234", "R$1,234", "US$ 1,234.56", "1.234,56", "2250 Reais brasileiros",
+    faixas ("R$ 1.234 – R$ 1.500", devolve o limite inferior) e números já convertidos.
+    Retorna None para valores vazios, sem dígitos, indisponíveis ("unavailable") ou com
+    separadores malformados ("1,2,3", "1,234,56").
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, (int, float)):
+        return None if isinstance(valor, float) and math.isnan(valor) else float(valor)
+    texto = str(valor)
+    if _INDISPONIVEL.search(texto):
+        return None
+    encontrado = _NUMERO.search(texto)
+    if encontrado is None:
+        return None
+    numero = encontrado.group()
+    decimal = _separador_decimal(numero)
+    if decimal is None:
+        normalizado = numero.replace(".", "").replace(",", "")
+    else:
+        milhar = "," if decimal == "." else "."
+        normalizado = numero.replace(milhar, "").replace(decimal, ".")
+    return float(normalizado) if _NORMALIZADO.fullmatch(normalizado) else None
+
+def normalizar_precos(valores):
+    """
+    Versão em lote de normalizar_preco: converte uma coluna inteira (Series, lista ou array) em
+    uma Series de float, com NaN onde o preço é indisponível ou malformado. As mesmas regras são
+    aplicadas a todos os textos distintos de uma vez, com os kernels vetorizados do Arrow
+    (pyarrow.compute) em vez de uma chamada Python por valor.
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(list(valores), dtype=object)
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.astype(float)
+
+    eh_texto = serie.map(type).eq(str).to_numpy()
+    # As regras são avaliadas uma vez por texto distinto (colunas de preço repetem muito)
+    # Ausentes de colunas string (NaN, pd.NA) e valores não textuais viram nulos do Arrow
+    textos = [valor if isinstance(valor, str) else None for valor in serie]
+    codificado = pc.dictionary_encode(pa.array(textos, type=pa.string()))
+    texto = codificado.dictionary
+    numero = pc.struct_field(pc.extract_regex(texto, f"(?P<numero>{_NUMERO.pattern})"), [0])
+
+    tem_ponto = pc.match_substring(numero, ".")
+    tem_virgula = pc.match_substring(numero, ",")
+    so_milhar = pc.or_(
+        pc.and_not(pc.match_substring_regex(numero, f"^{_MILHAR_PONTO.pattern}$"), tem_virgula),
+        pc.and_not(pc.match_substring_regex(numero, f"^{_MILHAR_VIRGULA.pattern}$"), tem_ponto),
+    )
+    # Com os dois separadores, o decimal é o último: ponto depois de vírgula => decimal "."
+    ponto_por_ultimo = pc.or_(pc.invert(tem_virgula), pc.match_substring_regex(numero, r",.*\."))
+    decimal_ponto = pc.and_not(pc.and_(tem_ponto, ponto_por_ultimo), so_milhar)
+    decimal_virgula = pc.and_not(pc.and_not(tem_virgula, decimal_ponto), so_milhar)
+
+    normalizado = pc.if_else(
+        decimal_ponto,
+        pc.replace_substring(numero, ",", ""),
+        pc.if_else(
+            decimal_virgula,
+            pc.replace_substring(pc.replace_substring(numero, ".", ""), ",", "."),
+            pc.replace_substring_regex(numero, r"[.,]", ""),
+        ),
+    )
+    # Só os números que ficaram bem formados são convertidos; os demais ficam nulos
+    normalizado = pc.if_else(
+        pc.match_substring_regex(normalizado, f"^{_NORMALIZADO.pattern}$"),
+        normalizado,
+        pa.scalar(None, pa.string()),
+    )
+    indisponivel = pc.match_substring_regex(texto, _INDISPONIVEL.pattern, ignore_case=True)
+    convertidos = pc.if_else(indisponivel, pa.scalar(None, pa.float64()), pc.cast(normalizado, pa.float64()))
+    convertidos = pc.take(convertidos, codificado.indices)
+    resultado = pd.Series(convertidos.to_numpy(zero_copy_only=False), index=serie.index, dtype=float)
+
+    # Valores que já eram numéricos (int/float) em uma coluna mista são mantidos
+    if not eh_texto.all():
+        numericos = pd.to_numeric(serie.where(~eh_texto), errors="coerce")
+        resultado = resultado.fillna(numericos)
+    return resultado
@@ -0,0 +1,52 @@
+import os
+import time
+from contextlib import contextmanager
+
+# Tempo máximo (ms) de cada etapa de espera dos scrapers; cada um pode ser sobrescrito pela
+# variável de ambiente PW_TIMEOUT_<ETAPA>_MS (ex.: PW_TIMEOUT_RESULTADOS_MS=20000).
+TIMEOUTS_PADRAO_MS = {
+    "navegacao": 30000,   # até o DOMContentLoaded da página de busca
+    "resultados": 15000,  # até o primeiro cartão de voo (li.pIav2d) aparecer
+    "precos": 5000,       # até os preços dentro dos cartões serem preenchidos
+    "botao": 10000,       # até o botão de expandir o gráfico de histórico ficar visível
+    "grafico": 20000,     # até os pontos do gráfico de histórico serem desenhados
+    "silencio": 1500,     # sem novas respostas de dados, a captura de respostas termina
+}
+
+def timeouts_etapas():
+    """Retorna os timeouts (ms) de cada etapa, aplicando as sobrescritas do ambiente."""
+    return {
+        etapa: int(os.getenv(f"PW_TIMEOUT_{etapa.upper()}_MS", padrao))
+        for etapa, padrao in TIMEOUTS_PADRAO_MS.items()
+    }
+
+class CronometroEtapas:
+    """
+    Registra quanto tempo cada etapa de um scraping levou, para mostrar onde o tempo de
+    cada rota é gasto (navegação, espera pelos dados, extração...).
+
+    Exemplo:
+        cronometro = CronometroEtapas()
+        with cronometro.etapa("navegacao"):
+            await page.goto(url)
+        logger.debug("Tempos: %s", cronometro.resumo())
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + time.perf_counter() - inicio
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def resumo(self):
+        etapas = " ".join(f"{nome}={segundos:.2f}s" for nome, segundos in self.etapas.items())
+        return f"{etapas} total={self.total():.2f}s"
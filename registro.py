@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import random
+import logging
+import contextvars
+from contextlib import contextmanager
+
+# Contexto da busca em andamento (trecho, data, tentativa...), anexado a cada mensagem.
+# Por ser uma ContextVar, cada tarefa asyncio e cada thread enxerga o seu.
+_contexto = contextvars.ContextVar("contexto_registro", default={})
+
+# Bibliotecas que registram cada requisição em INFO
+_BIBLIOTECAS_RUIDOSAS = ("httpx", "httpcore", "asyncio")
+
+@contextmanager
+def contexto_busca(**campos):
+    """
+    Acrescenta campos ao contexto das mensagens registradas dentro do bloco:
+
+        with contexto_busca(trecho="GRU x GIG", data="2025-05-21"):
+            with contexto_busca(tentativa=2):
+                logger.warning("...")   # sai com trecho, data e tentativa
+    """
+    token = _contexto.set({**_contexto.get(), **campos})
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+class FiltroContexto(logging.Filter):
+    """Copia o contexto atual da busca para o registro (atributo `contexto`)."""
+
+    def filter(self, record):
+        record.contexto = _contexto.get()
+        return True
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Deixa passar apenas uma fração `taxa` (0 a 1) das mensagens DEBUG, sorteadas; mensagens
+    de nível INFO ou acima passam sempre.
+    """
+
+    def __init__(self, taxa=1.0):
+        super().__init__()
+        self.taxa = taxa
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.taxa >= 1 or random.random() < self.taxa
+
+class FormatadorTexto(logging.Formatter):
+    """Formato legível: data, nível, módulo, mensagem e o contexto da busca entre chaves."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    def format(self, record):
+        texto = super().format(record)
+        contexto = getattr(record, "contexto", None)
+        if contexto:
+            texto += " {" + " ".join(f"{chave}={valor}" for chave, valor in contexto.items()) + "}"
+        return texto
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por mensagem, com o contexto da busca e os campos de `extra={"dados": {...}}`."""
+
+    def format(self, record):
+        registro = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "contexto", {}),
+            **getattr(record, "dados", {}),
+        }
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+def configurar_logging(nivel=None, formato=None, amostra_debug=None):
+    """
+    Configura o logging do processo (uma vez, no início dos scripts), a partir dos argumentos
+    ou das variáveis de ambiente:
+      - LOG_NIVEL: DEBUG, INFO (padrão), WARNING ou ERROR.
+      - LOG_FORMATO: "texto" (padrão) ou "json" (uma linha JSON por mensagem).
+      - LOG_AMOSTRA_DEBUG: fração das mensagens DEBUG mantidas (padrão 1, todas).
+    As mensagens vão para a saída padrão. Chamadas repetidas substituem a configuração anterior.
+    """
+    nivel = (nivel or os.getenv("LOG_NIVEL", "INFO")).upper()
+    formato = (formato or os.getenv("LOG_FORMATO", "texto")).lower()
+    amostra_debug = float(amostra_debug if amostra_debug is not None else os.getenv("LOG_AMOSTRA_DEBUG", "1"))
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(FiltroContexto())
+    handler.addFilter(FiltroAmostragem(amostra_debug))
+    handler.setFormatter(FormatadorJSON() if formato == "json" else FormatadorTexto())
+    handler._configurado_por_registro = True
+
+    raiz = logging.getLogger()
+    for anterior in [h for h in raiz.handlers if getattr(h, "_configurado_por_registro", False)]:
+        raiz.removeHandler(anterior)
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel)
+    for biblioteca in _BIBLIOTECAS_RUIDOSAS:
+        logging.getLogger(biblioteca).setLevel(max(logging.WARNING, raiz.level))
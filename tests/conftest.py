@@ -0,0 +1,9 @@
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Os módulos do projeto e dos benchmarks são importados pelo nome, como nos scripts
+for caminho in (RAIZ, os.path.join(RAIZ, "benchmarks")):
+    if caminho not in sys.path:
+        sys.path.insert(0, caminho)
@@ -0,0 +1,97 @@
+"""
+Testes do parser das respostas GetShoppingResults e da captura em lotes, sem rede: cada
+layout de LAYOUTS_RESPOSTA tem respostas salvas em tests/fixtures/respostas/<versão>/, com
+as ofertas esperadas em um .json de mesmo nome.
+"""
+import os
+import json
+import asyncio
+
+import pytest
+
+from captura_respostas import LAYOUTS_RESPOSTA, capturar_ofertas, parse_resposta
+from prontidao import CronometroEtapas
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "respostas")
+
+def _ler(versao, nome):
+    with open(os.path.join(FIXTURES, versao, nome), encoding="utf-8") as f:
+        return f.read()
+
+def _respostas_salvas():
+    casos = []
+    for versao in sorted(LAYOUTS_RESPOSTA):
+        pasta = os.path.join(FIXTURES, versao)
+        nomes = sorted(n for n in os.listdir(pasta) if n.endswith(".txt")) if os.path.isdir(pasta) else []
+        casos += [pytest.param(versao, nome, id=f"{versao}/{nome}") for nome in nomes]
+    return casos
+
+@pytest.mark.parametrize("versao", sorted(LAYOUTS_RESPOSTA))
+def test_todo_layout_tem_respostas_salvas(versao):
+    assert any(n.endswith(".txt") for n in os.listdir(os.path.join(FIXTURES, versao)))
+
+@pytest.mark.parametrize("versao, nome", _respostas_salvas())
+def test_parse_resposta_salva(versao, nome):
+    esperado = json.loads(_ler(versao, nome[:-len(".txt")] + ".json"))
+    assert parse_resposta(_ler(versao, nome), LAYOUTS_RESPOSTA[versao]) == esperado
+
+def test_corpo_sem_payload_de_ofertas():
+    assert parse_resposta(")]}'\n\n12\n[[\"di\",142]]\n", LAYOUTS_RESPOSTA["2025-05"]) == []
+    assert parse_resposta("", LAYOUTS_RESPOSTA["2025-05"]) == []
+
+class _Resposta:
+    def __init__(self, url, texto):
+        self.url = url
+        self._texto = texto
+
+    async def text(self):
+        return self._texto
+
+class _Pagina:
+    """Página falsa que, após o goto, emite as respostas agendadas (atraso em ms, url, corpo)."""
+
+    def __init__(self, agendadas):
+        self.agendadas = agendadas
+        self.ouvintes = []
+
+    def on(self, evento, ouvinte):
+        self.ouvintes.append(ouvinte)
+
+    def remove_listener(self, evento, ouvinte):
+        self.ouvintes.remove(ouvinte)
+
+    async def goto(self, url, **opcoes):
+        for atraso, url_resposta, corpo in self.agendadas:
+            asyncio.get_running_loop().call_later(atraso / 1000, self._emitir, _Resposta(url_resposta, corpo))
+
+    def _emitir(self, resposta):
+        for ouvinte in list(self.ouvintes):
+            ouvinte(resposta)
+
+URL_DADOS = "https://www.google.com/_/FlightsFrontendService/data/travel.frontend.flights.FlightsFrontendService/GetShoppingResults?f.sid=1"
+TIMEOUTS = {"navegacao": 1000, "resultados": 2000, "silencio": 200}
+
+def _capturar(agendadas, timeouts=TIMEOUTS):
+    pagina = _Pagina(agendadas)
+    ofertas = asyncio.run(capturar_ofertas(pagina, "https://www.google.com/travel/flights", timeouts,
+                                           CronometroEtapas(), LAYOUTS_RESPOSTA["2025-05"]))
+    assert pagina.ouvintes == []
+    return ofertas
+
+def test_captura_junta_os_lotes_do_streaming_sem_duplicatas():
+    lote1, lote2 = _ler("2025-05", "lote1.txt"), _ler("2025-05", "lote2.txt")
+    ofertas = _capturar([
+        (10, URL_DADOS, lote1),
+        (50, "https://www.google.com/travel/flights/outro", lote2),
+        (120, URL_DADOS, lote2),
+    ])
+    precos = sorted(o["preco"] for o in ofertas)
+    assert precos == [298, 389, 459, 512]
+
+def test_captura_para_apos_o_silencio():
+    lote1, lote2 = _ler("2025-05", "lote1.txt"), _ler("2025-05", "lote2.txt")
+    ofertas = _capturar([(10, URL_DADOS, lote1), (600, URL_DADOS, lote2)])
+    assert sorted(o["preco"] for o in ofertas) == [389, 459, 512]
+
+def test_captura_sem_respostas_de_dados_retorna_lista_vazia():
+    assert _capturar([], {**TIMEOUTS, "resultados": 100}) == []
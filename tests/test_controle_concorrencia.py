@@ -0,0 +1,14 @@
+import pytest
+
+from controle_concorrencia import classificar_erro
+
+@pytest.mark.parametrize("erro, tipo", [
+    (RuntimeError("No flights found:\n"), "vazio"),
+    (RuntimeError("429 Result: Too Many Requests"), "limitacao"),
+    (RuntimeError("rate limit exceeded"), "limitacao"),
+    (TimeoutError(), "timeout"),
+    (RuntimeError("Read timed out"), "timeout"),
+    (RuntimeError("500 Result: Internal Server Error"), "erro"),
+])
+def test_classificar_erro(erro, tipo):
+    assert classificar_erro(erro) == tipo
@@ -0,0 +1,14 @@
+import re
+
+from metricas import Metricas
+
+def test_exportar_rotula_todas_as_series_com_o_script(tmp_path):
+    metricas = Metricas()
+    metricas.incrementar("ff_buscas_total", desfecho="ok", trecho="GRU x GIG")
+    metricas.observar("ff_latencia_segundos", 0.3, etapa="search_flights", trecho="GRU x GIG")
+    metricas.exportar("automation", str(tmp_path))
+
+    series = [l for l in (tmp_path / "metricas_automation.prom").read_text().splitlines() if not l.startswith("#")]
+    assert series
+    for linha in series:
+        assert re.search(r'\{[^}]*script="automation"', linha), linha
@@ -0,0 +1,85 @@
+"""
+Testes de search_flights_async contra o servidor simulado (benchmarks/servidor_simulado.py)
+em uma porta local, sem acessar o Google.
+"""
+import asyncio
+import threading
+
+import pytest
+from fast_flights.core import parse_response
+
+from servidor_simulado import criar_servidor
+from pesquisa_voos import (
+    _montar_filtro,
+    fechar_cliente_http,
+    parametros_filtro,
+    search_flights_async,
+    url_google_flights,
+)
+
+DATA = "2030-01-15"
+
+@pytest.fixture
+def servidor(monkeypatch):
+    """Inicia um servidor simulado com as opções informadas e aponta a busca para ele."""
+    iniciados = []
+
+    def iniciar(**opcoes):
+        servidor = criar_servidor(0, latencia_ms=0, jitter_ms=0, semente=1, **opcoes)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        iniciados.append(servidor)
+        host, porta = servidor.server_address[:2]
+        monkeypatch.setenv("GOOGLE_FLIGHTS_URL_BASE", f"http://{host}:{porta}")
+        return servidor
+
+    monkeypatch.setenv("CACHE_VOOS_DESATIVADO", "1")
+    yield iniciar
+    for servidor in iniciados:
+        servidor.shutdown()
+        servidor.server_close()
+
+def _executar(*buscas):
+    async def principal():
+        try:
+            return await asyncio.gather(*(search_flights_async(DATA, o, d, usar_cache=False) for o, d in buscas))
+        finally:
+            await fechar_cliente_http()
+    return asyncio.run(principal())
+
+def test_busca_devolve_os_voos_da_pagina(servidor):
+    servidor(voos=7)
+    (result,) = _executar(("GRU", "GIG"))
+    assert len(result.flights) == 7
+    assert all(f.price.startswith("R$") for f in result.flights)
+    assert all(f.name for f in result.flights)
+
+@pytest.mark.parametrize("opcao, status", [("taxa_limitacao", 429), ("taxa_erro", 500)])
+def test_status_diferente_de_200_levanta_runtime_error_com_o_status(servidor, opcao, status):
+    servidor(**{opcao: 1.0})
+    with pytest.raises(RuntimeError, match=rf"^{status} "):
+        _executar(("GRU", "GIG"))
+
+def test_pagina_sem_voos_nao_leva_o_html_para_a_mensagem(servidor):
+    servidor(taxa_vazio=1.0)
+    with pytest.raises(RuntimeError, match="No flights found") as erro:
+        _executar(("GRU", "GIG"))
+    assert "<html" not in str(erro.value)
+
+def test_buscas_identicas_simultaneas_fazem_uma_requisicao(servidor):
+    simulado = servidor(voos=3)
+    simulado.latencia_ms = 100
+    primeira, segunda, outra = _executar(("GRU", "GIG"), ("GRU", "GIG"), ("GIG", "GRU"))
+    assert primeira is segunda
+    assert outra is not primeira
+    assert simulado.estatisticas()["total"] == 2
+
+def test_resultado_igual_ao_do_cliente_primp_do_caminho_sincrono(servidor):
+    """O HTML obtido pelo httpx e adaptado por _RespostaHTML gera os mesmos voos que a resposta do primp."""
+    primp = pytest.importorskip("primp")
+    servidor(voos=5)
+    (result,) = _executar(("GRU", "GIG"))
+
+    filtro = _montar_filtro(DATA, "GRU", "GIG", "economy", (1, 0, 0, 0), 2)
+    resposta = primp.Client(verify=False).get(url_google_flights(), params=parametros_filtro(filtro))
+    assert resposta.status_code == 200
+    assert parse_response(resposta).flights == result.flights
@@ -0,0 +1,31 @@
+import datetime
+
+import pytest
+
+from planejador import expandir_datas, planejar
+
+HOJE = datetime.date(2025, 5, 12)  # segunda-feira
+
+def test_expandir_datas_intervalo_sem_de_comeca_hoje():
+    datas = expandir_datas({"ate": "2025-05-14"}, HOJE)
+    assert datas == [HOJE, datetime.date(2025, 5, 13), datetime.date(2025, 5, 14)]
+
+def test_expandir_datas_intervalo_sem_ate_nomeia_a_entrada():
+    with pytest.raises(ValueError, match="2025-05-20"):
+        expandir_datas({"de": "2025-05-20"}, HOJE)
+
+def test_expandir_datas_descarta_passadas_e_filtra_dias_semana():
+    entrada = {"de": "2025-05-10", "ate": "2025-05-18", "dias_semana": ["sex", "dom"]}
+    assert expandir_datas(entrada, HOJE) == [datetime.date(2025, 5, 16), datetime.date(2025, 5, 18)]
+
+def test_planejar_agrupa_por_trecho_sem_duplicatas():
+    entradas = [
+        {"rotas": ["GRU-GIG", "CNF-SDU"], "datas": ["2025-05-14", "2025-05-13"]},
+        {"origem": "gru", "destino": "gig", "data": "2025-05-13"},
+    ]
+    assert planejar(entradas, HOJE) == [
+        {"origem": "GRU", "destino": "GIG", "data": "2025-05-13"},
+        {"origem": "GRU", "destino": "GIG", "data": "2025-05-14"},
+        {"origem": "CNF", "destino": "SDU", "data": "2025-05-13"},
+        {"origem": "CNF", "destino": "SDU", "data": "2025-05-14"},
+    ]
@@ -0,0 +1,52 @@
+import io
+import math
+
+import pandas as pd
+import pytest
+
+from precos import normalizar_preco, normalizar_precos
+
+CASOS = [
+    ("R$ 1.234", 1234.0),
+    ("R$1,234", 1234.0),
+    ("US$ 1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("12,5", 12.5),
+    ("99.90", 99.9),
+    ("2250 Reais brasileiros", 2250.0),
+    ("R$ 1.234 – R$ 1.500", 1234.0),
+    ("Price unavailable", None),
+    ("", None),
+    ("sem preço", None),
+    # Separadores malformados
+    ("1,2,3", None),
+    ("12.34.567", None),
+    ("1,234,56", None),
+    ("Voo 1.2.3 R$ 500", None),
+]
+
+@pytest.mark.parametrize("texto, esperado", CASOS)
+def test_normalizar_preco(texto, esperado):
+    assert normalizar_preco(texto) == esperado
+
+def test_normalizar_precos_igual_ao_escalar():
+    valores = [texto for texto, _ in CASOS] + [None, 321, 45.5]
+    resultado = normalizar_precos(valores)
+    for valor, obtido in zip(valores, resultado):
+        esperado = normalizar_preco(valor)
+        assert (esperado is None and math.isnan(obtido)) or obtido == esperado, valor
+
+def test_normalizar_precos_numericos():
+    assert normalizar_precos(pd.Series([1, 2.5])).tolist() == [1.0, 2.5]
+
+@pytest.mark.parametrize("dtype", ["string", "str", object])
+def test_normalizar_precos_com_ausentes_em_coluna_de_texto(dtype):
+    serie = pd.Series(["R$ 1.234", float("nan"), None, "R$ 987"], dtype=dtype)
+    resultado = normalizar_precos(serie)
+    assert resultado[0] == 1234.0 and resultado[3] == 987.0
+    assert resultado[1:3].isna().all()
+
+def test_normalizar_precos_csv_com_preco_vazio():
+    csv = io.StringIO("Data,Preço\n2025-06-01,R$ 1.234\n2025-06-02,\n")
+    resultado = normalizar_precos(pd.read_csv(csv)["Preço"])
+    assert resultado[0] == 1234.0 and math.isnan(resultado[1])